@@ -1,20 +1,82 @@
 """Mining Pool Hub Custom Component"""
 import asyncio
+from datetime import timedelta
 import logging
+from time import monotonic
+from typing import Any, Dict, List, Optional
 
 from homeassistant import config_entries, core
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry, entity_registry
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN
+from .const import (
+    CONF_CURRENCY_NAMES,
+    CONF_FAST_LANE_COINS,
+    CONF_FAST_LANE_INTERVAL,
+    CONF_FIAT_CURRENCY,
+    CONF_HASHRATE_FLOORS,
+    CONF_INVALID_SHARES_PERCENT,
+    CONF_MAX_CACHE_AGE,
+    CONF_PAYOUT_THRESHOLDS,
+    CONF_STATE_ATTRIBUTES,
+    DATA_COORDINATOR,
+    DATA_FAST_LANE,
+    DEFAULT_FAST_LANE_INTERVAL,
+    DEFAULT_INVALID_SHARES_PERCENT,
+    DEFAULT_MAX_CACHE_AGE,
+    DEFAULT_STATE_ATTRIBUTES,
+    DOMAIN,
+    SIGNAL_COINS_ADDED,
+    STARTUP_BUDGET,
+    STORAGE_VERSION,
+)
+from .coordinator import async_get_coordinator_registry, intervals_from_config
+from .helpers import scoped_id
+from .transport import HashrateTransport, PollingTransport
 
 _LOGGER = logging.getLogger(__name__)
 
+# Options the running sensors cannot follow, changing them reloads the entry.
+RELOAD_OPTIONS = {CONF_STATE_ATTRIBUTES: DEFAULT_STATE_ATTRIBUTES}
+
 
 async def async_setup_entry(
     hass: core.HomeAssistant, entry: config_entries.ConfigEntry
 ) -> bool:
-    """Set up platform from a ConfigEntry."""
+    """Set up platform from a ConfigEntry.
+
+    Setup never waits on MiningPoolHub for longer than ``STARTUP_BUDGET``.
+    Sensors start from the persisted snapshot or their restored state and
+    pick up the first refresh whenever it completes.
+    """
+    started = monotonic()
     hass.data.setdefault(DOMAIN, {})
     hass_data = dict(entry.data)
+    # Update our config to include new coins and remove those that have been removed.
+    if entry.options:
+        hass_data.update(entry.options)
+
+    # A YAML platform with the same API key shares the coordinator.
+    coordinator = await async_get_coordinator_registry(hass).async_acquire(
+        hass_data[CONF_API_KEY],
+        entry.entry_id,
+        hass_data[CONF_CURRENCY_NAMES],
+        store=Store(hass, STORAGE_VERSION, _storage_key(entry)),
+        **_coordinator_settings(hass_data),
+    )
+    # Populate sensors from the last run's snapshot instead of waiting on
+    # MiningPoolHub, the snapshot is refreshed in the background.
+    max_cache_age = timedelta(
+        minutes=hass_data.get(CONF_MAX_CACHE_AGE, DEFAULT_MAX_CACHE_AGE)
+    )
+    shared = coordinator.data is not None
+    restored = not shared and await coordinator.async_load_snapshot(max_cache_age)
+    hass_data[DATA_COORDINATOR] = coordinator
+    hass_data[DATA_FAST_LANE] = _async_start_fast_lane(hass, hass_data)
+
     # Registers update listener to update config entry when options are updated.
     unsub_options_update_listener = entry.add_update_listener(options_update_listener)
     # Store a reference to the unsubscribe function to cleanup if an entry is unloaded.
@@ -25,14 +87,182 @@ async def async_setup_entry(
     hass.async_create_task(
         hass.config_entries.async_forward_entry_setup(entry, "sensor")
     )
+    # Not tracked by Home Assistant so a slow MiningPoolHub does not hold up
+    # its startup either.
+    refresh = hass.loop.create_task(coordinator.async_refresh())
+    entry.async_on_unload(refresh.cancel)
+    if shared:
+        source = "shared with a YAML platform"
+    elif restored:
+        source = "restored from snapshot"
+    else:
+        # Without a snapshot give the first refresh a chance to finish, a
+        # slow MiningPoolHub leaves the sensors on their restored state.
+        await asyncio.wait({refresh}, timeout=STARTUP_BUDGET.total_seconds())
+        source = "fetched" if refresh.done() else "still being fetched"
+    _LOGGER.debug(
+        "Set up %s in %.3fs, data %s", entry.title, monotonic() - started, source
+    )
     return True
 
 
+def _storage_key(entry: config_entries.ConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}"
+
+
+def _coordinator_settings(hass_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the entry's refresh intervals, fiat currency and event thresholds."""
+    return {
+        "intervals": intervals_from_config(hass_data),
+        "fiat_currency": hass_data.get(CONF_FIAT_CURRENCY),
+        "hashrate_floors": hass_data.get(CONF_HASHRATE_FLOORS, {}),
+        "invalid_shares_percent": hass_data.get(
+            CONF_INVALID_SHARES_PERCENT, DEFAULT_INVALID_SHARES_PERCENT
+        ),
+        "payout_thresholds": hass_data.get(CONF_PAYOUT_THRESHOLDS, {}),
+    }
+
+
+@callback
+def _async_start_fast_lane(
+    hass: core.HomeAssistant, hass_data: Dict[str, Any]
+) -> HashrateTransport:
+    """Start polling the hashrate of the entry's fast lane coins."""
+    coordinator = hass_data[DATA_COORDINATOR]
+    fast_lane = PollingTransport(
+        hass,
+        coordinator,
+        [
+            coin_name
+            for coin_name in hass_data.get(CONF_FAST_LANE_COINS, [])
+            if coin_name in coordinator.coin_names
+        ],
+        coordinator.miningpoolhub_api,
+        timedelta(
+            seconds=hass_data.get(CONF_FAST_LANE_INTERVAL, DEFAULT_FAST_LANE_INTERVAL)
+        ),
+    )
+    fast_lane.async_start()
+    return fast_lane
+
+
 async def options_update_listener(
     hass: core.HomeAssistant, config_entry: config_entries.ConfigEntry
 ):
-    """Handle options update."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    """Handle options update.
+
+    Added and removed coins, new refresh intervals and event thresholds are
+    applied to the running coordinator, coins that did not change keep their
+    sensors, data and cached requests. Only a change of ``RELOAD_OPTIONS``
+    reloads the entry.
+    """
+    hass_data = hass.data[DOMAIN][config_entry.entry_id]
+    if any(
+        config_entry.options.get(key, default) != hass_data.get(key, default)
+        for key, default in RELOAD_OPTIONS.items()
+    ):
+        await hass.config_entries.async_reload(config_entry.entry_id)
+        return
+
+    previous = hass_data[CONF_CURRENCY_NAMES]
+    hass_data.update(config_entry.options)
+    coin_names = hass_data[CONF_CURRENCY_NAMES]
+    registry = async_get_coordinator_registry(hass)
+    await registry.async_set_settings(
+        hass_data[CONF_API_KEY],
+        config_entry.entry_id,
+        **_coordinator_settings(hass_data),
+    )
+    removed = [coin_name for coin_name in previous if coin_name not in coin_names]
+    # Coins a YAML platform already follows are not new to the coordinator
+    # but still need the entry's sensors.
+    added = [coin_name for coin_name in coin_names if coin_name not in previous]
+    await registry.async_set_coins(
+        hass_data[CONF_API_KEY], config_entry.entry_id, coin_names
+    )
+    _async_remove_coins(hass, config_entry, removed)
+    hass_data[DATA_FAST_LANE].async_stop()
+    hass_data[DATA_FAST_LANE] = _async_start_fast_lane(hass, hass_data)
+    if added:
+        async_dispatcher_send(
+            hass, SIGNAL_COINS_ADDED.format(config_entry.entry_id), added
+        )
+
+
+@callback
+def _async_remove_coins(
+    hass: core.HomeAssistant,
+    config_entry: config_entries.ConfigEntry,
+    coin_names: List[str],
+) -> None:
+    """Remove the devices and entities of coins the entry no longer follows."""
+    devices = device_registry.async_get(hass)
+    entities = entity_registry.async_get(hass)
+    for coin_name in coin_names:
+        device = devices.async_get_device(
+            {(DOMAIN, scoped_id(config_entry.entry_id, coin_name))}
+        )
+        if device is None:
+            continue
+        for entity in entity_registry.async_entries_for_device(
+            entities, device.id, include_disabled_entities=True
+        ):
+            entities.async_remove(entity.entity_id)
+        devices.async_remove_device(device.id)
+
+
+async def async_migrate_entry(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> bool:
+    """Migrate an entry created by an older version of the integration.
+
+    Version 1 entities and devices were identified by coin alone, so accounts
+    mining the same coin clashed. Version 2 scopes them with the entry id.
+    """
+    if entry.version == 1:
+        prefix = scoped_id(entry.entry_id, "")
+
+        @callback
+        def scope_unique_id(
+            entity: entity_registry.RegistryEntry,
+        ) -> Optional[Dict[str, Any]]:
+            if entity.unique_id.startswith(prefix):
+                # Diagnostic sensors were always scoped.
+                return None
+            return {"new_unique_id": scoped_id(entry.entry_id, entity.unique_id)}
+
+        await entity_registry.async_migrate_entries(
+            hass, entry.entry_id, scope_unique_id
+        )
+
+        devices = device_registry.async_get(hass)
+        for device in device_registry.async_entries_for_config_entry(
+            devices, entry.entry_id
+        ):
+            coins = [
+                identifier
+                for domain, identifier in device.identifiers
+                if domain == DOMAIN
+            ]
+            if len(device.config_entries) > 1:
+                # Shared with another account, each gets a device of its own
+                # when its sensors are added.
+                devices.async_update_device(
+                    device.id, remove_config_entry_id=entry.entry_id
+                )
+            elif coins:
+                devices.async_update_device(
+                    device.id,
+                    new_identifiers={
+                        (DOMAIN, scoped_id(entry.entry_id, coin_name))
+                        for coin_name in coins
+                    },
+                )
+
+        entry.version = 2
+        hass.config_entries.async_update_entry(entry)
+        _LOGGER.debug("Migrated %s to version %d", entry.title, entry.version)
+    return True
 
 
 async def async_unload_entry(
@@ -46,14 +276,25 @@ async def async_unload_entry(
     )
     # Remove options_update_listener.
     hass.data[DOMAIN][entry.entry_id]["unsub_options_update_listener"]()
+    hass.data[DOMAIN][entry.entry_id][DATA_FAST_LANE].async_stop()
 
     # Remove config entry from domain.
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        hass_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await async_get_coordinator_registry(hass).async_release(
+            hass_data[CONF_API_KEY], entry.entry_id
+        )
 
     return unload_ok
 
 
+async def async_remove_entry(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Remove the persisted snapshot of a deleted config entry."""
+    await Store(hass, STORAGE_VERSION, _storage_key(entry)).async_remove()
+
+
 # noinspection PyUnusedLocal
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
     """Set up the Mining Pool Hub component from yaml configuration."""
@@ -0,0 +1,42 @@
+"""Circuit breaker with exponential backoff for MiningPoolHub requests."""
+from datetime import timedelta
+import random
+
+from .const import MAX_BACKOFF
+
+
+class CircuitBreaker:
+    """Tracks consecutive failures of an account and how long to back off.
+
+    The breaker opens on the first failure. While it is open the caller waits
+    for ``delay`` and then probes with a single request, a successful probe
+    closes the breaker and full polling resumes.
+    """
+
+    def __init__(self, base_delay: timedelta, max_delay: timedelta = MAX_BACKOFF):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while requests are failing."""
+        return self.failures > 0
+
+    @property
+    def delay(self) -> timedelta:
+        """Return how long to wait before the next request."""
+        if not self.is_open:
+            return self.base_delay
+        backoff = min(self.base_delay * 2 ** self.failures, self.max_delay)
+        # Jitter keeps accounts that failed together from probing together.
+        return backoff * random.uniform(0.5, 1.0)
+
+    def record_failure(self) -> timedelta:
+        """Record a failed request and return how long to back off."""
+        self.failures += 1
+        return self.delay
+
+    def record_success(self) -> None:
+        """Record a successful request, closing the breaker."""
+        self.failures = 0
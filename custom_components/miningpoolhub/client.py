@@ -0,0 +1,259 @@
+"""Shared access to the MiningPoolHub API."""
+import asyncio
+from datetime import timedelta
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from aiohttp import ClientSession
+import async_timeout
+from homeassistant import core
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from miningpoolhub_py import MiningPoolHubAPI
+
+from .const import (
+    DATA_CLIENT_MANAGER,
+    DOMAIN,
+    POOL_CACHE_TTL,
+    REQUEST_CACHE_TTL,
+    REQUEST_TIMEOUT,
+)
+from .metrics import RequestMetrics
+from .rate_limiter import RateLimiter
+
+ACTION_DASHBOARD = "getdashboarddata"
+ACTION_POOL_STATUS = "getpoolstatus"
+ACTION_USER_ALL_BALANCES = "getuserallbalances"
+ACTION_USER_HASHRATE = "getuserhashrate"
+ACTION_USER_WORKERS = "getuserworkers"
+
+
+class RequestCache:
+    """Coalesces identical requests and keeps their results for a short time.
+
+    Concurrent callers asking for the same key share one in-flight request.
+    Successful results are served from memory until ``ttl`` has passed,
+    failures are never cached.
+    """
+
+    def __init__(self, ttl: timedelta = REQUEST_CACHE_TTL):
+        self.ttl = ttl.total_seconds()
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._in_flight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    async def async_get(
+        self, key: Hashable, request: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the result for key, calling request only when needed
+
+        Parameters
+        ----------
+        key : Hashable
+            Identifies requests that are interchangeable
+        request : Callable[[], Awaitable[Any]]
+            Performs the request when there is neither a fresh result nor an
+            identical request in flight
+
+        Returns
+        -------
+        Any
+            Result of the request
+        """
+        cached = self._results.get(key)
+        if cached is not None and monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(request())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._async_done(key, done))
+        # Shield the shared request so one cancelled caller does not cancel
+        # it for everyone else.
+        return await asyncio.shield(future)
+
+    @callback
+    def _async_done(self, key: Hashable, future: "asyncio.Future[Any]") -> None:
+        self._in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        now = monotonic()
+        self._results = {
+            cached_key: cached
+            for cached_key, cached in self._results.items()
+            if now - cached[0] < self.ttl
+        }
+        self._results[key] = (now, future.result())
+
+
+class MiningPoolHubClient:
+    """MiningPoolHubAPI for one API key whose requests go through a RequestCache.
+
+    With a ``rate_limiter`` the requests that miss the cache wait for their
+    turn among the requests of every account.
+
+    Pool-level requests do not depend on the API key, they go through
+    ``pool_cache`` keyed by coin only so that every account sharing it
+    fetches a pool's statistics once. Hashrate polls of the fast lane are only
+    coalesced, they have to reach MiningPoolHub every time.
+
+    ``metrics`` records the latency and errors of the requests that
+    reach MiningPoolHub and how many calls the cache answered. Requests taking
+    longer than ``REQUEST_TIMEOUT`` fail with ``asyncio.TimeoutError``.
+    """
+
+    def __init__(
+        self,
+        miningpoolhub_api: MiningPoolHubAPI,
+        api_key: str,
+        request_cache: Optional[RequestCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        pool_cache: Optional[RequestCache] = None,
+    ):
+        self.miningpoolhub_api = miningpoolhub_api
+        self.api_key = api_key
+        self.request_cache = request_cache or RequestCache()
+        self.rate_limiter = rate_limiter
+        self.pool_cache = pool_cache or RequestCache(POOL_CACHE_TTL)
+        self.live_cache = RequestCache(timedelta(0))
+        self.metrics = RequestMetrics()
+
+    async def _async_request(
+        self,
+        key: Tuple[str, Optional[str]],
+        request: Callable[[], Awaitable[Any]],
+        cache: Optional[RequestCache] = None,
+    ) -> Any:
+        endpoint = key[0]
+        untimed = request
+        missed = False
+
+        async def request() -> Any:
+            nonlocal missed
+            missed = True
+            self.metrics.cache_misses += 1
+            started = monotonic()
+            try:
+                # Bounded inside the rate limiter slot, a timed out request
+                # frees it for the next one.
+                async with async_timeout.timeout(REQUEST_TIMEOUT.total_seconds()):
+                    result = await untimed()
+            except Exception as err:
+                self.metrics.record_error(endpoint, monotonic() - started, err)
+                raise
+            self.metrics.record_response(endpoint, monotonic() - started)
+            return result
+
+        if self.rate_limiter is not None:
+            unlimited = request
+
+            def request() -> Awaitable[Any]:
+                return self.rate_limiter.async_request(self.api_key, unlimited)
+
+        try:
+            if cache is not None:
+                return await cache.async_get(key, request)
+            return await self.request_cache.async_get((self.api_key, *key), request)
+        finally:
+            # Served from the cache or by another caller's request in flight.
+            if not missed:
+                self.metrics.cache_hits += 1
+
+    async def async_get_dashboard(self, coin_name: str) -> Dict[str, Any]:
+        """Load a user's dashboard data for a pool."""
+        return await self._async_request(
+            (ACTION_DASHBOARD, coin_name),
+            lambda: self.miningpoolhub_api.async_get_dashboard(coin_name),
+        )
+
+    async def async_get_pool_status(self, coin_name: str) -> Dict[str, Any]:
+        """Get the hashrate, difficulty and block statistics of a pool."""
+        return await self._async_request(
+            (ACTION_POOL_STATUS, coin_name),
+            lambda: self.miningpoolhub_api.async_get_pool_status(coin_name),
+            cache=self.pool_cache,
+        )
+
+    async def async_get_user_all_balances(self) -> Any:
+        """Get all currency balances for a user."""
+        return await self._async_request(
+            (ACTION_USER_ALL_BALANCES, None),
+            self.miningpoolhub_api.async_get_user_all_balances,
+        )
+
+    async def async_get_user_hashrate(self, coin_name: str) -> Any:
+        """Fetch a user's current hashrate of a pool, bypassing the cache."""
+        return await self._async_request(
+            (ACTION_USER_HASHRATE, coin_name),
+            lambda: self.miningpoolhub_api.async_get_user_hash_rate(coin_name),
+            cache=self.live_cache,
+        )
+
+    async def async_get_user_workers(self, coin_name: str) -> Any:
+        """Fetch a user's workers of a pool."""
+        return await self._async_request(
+            (ACTION_USER_WORKERS, coin_name),
+            lambda: self.miningpoolhub_api.async_get_user_workers(coin_name),
+        )
+
+
+class ClientManager:
+    """Clients of every account sharing their caches and one rate limiter."""
+
+    def __init__(
+        self,
+        session: ClientSession,
+        request_cache: Optional[RequestCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        pool_cache: Optional[RequestCache] = None,
+    ):
+        self._session = session
+        self.request_cache = request_cache or RequestCache()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.pool_cache = pool_cache or RequestCache(POOL_CACHE_TTL)
+        self._clients: Dict[str, MiningPoolHubClient] = {}
+
+    def get_client(self, api_key: str) -> MiningPoolHubClient:
+        """Return the client of an API key, creating it on first use."""
+        if api_key not in self._clients:
+            self._clients[api_key] = MiningPoolHubClient(
+                MiningPoolHubAPI(self._session, api_key=api_key),
+                api_key,
+                self.request_cache,
+                self.rate_limiter,
+                self.pool_cache,
+            )
+        return self._clients[api_key]
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Return the shared rate limiter's queue and latency statistics."""
+        return {"accounts": len(self._clients), **self.rate_limiter.metrics}
+
+
+@callback
+def async_get_client_manager(hass: core.HomeAssistant) -> ClientManager:
+    """Return the client manager shared by every account."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_CLIENT_MANAGER not in domain_data:
+        domain_data[DATA_CLIENT_MANAGER] = ClientManager(async_get_clientsession(hass))
+    return domain_data[DATA_CLIENT_MANAGER]
+
+
+@callback
+def async_get_client(hass: core.HomeAssistant, api_key: str) -> MiningPoolHubClient:
+    """Return a client for api_key sharing requests with the rest of the integration
+
+    Parameters
+    ----------
+    hass : core.HomeAssistant
+        hass instance
+    api_key : str
+        MiningPoolHub API key
+
+    Returns
+    -------
+    MiningPoolHubClient
+        Client using the integration wide caches and rate limiter
+    """
+    return async_get_client_manager(hass).get_client(api_key)
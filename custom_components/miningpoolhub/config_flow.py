@@ -1,13 +1,12 @@
+import asyncio
 from copy import deepcopy
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from miningpoolhub_py.exceptions import InvalidCoinError, UnauthorizedError
-from miningpoolhub_py.miningpoolhubapi import MiningPoolHubAPI
 from homeassistant import config_entries, core
 from homeassistant.const import CONF_API_KEY, CONF_NAME
 from homeassistant.core import callback
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity_registry import (
     async_entries_for_config_entry,
@@ -15,7 +14,39 @@ from homeassistant.helpers.entity_registry import (
 )
 import voluptuous as vol
 
-from .const import CONF_CURRENCY_NAMES, CONF_FIAT_CURRENCY, DOMAIN
+from .client import async_get_client
+from .const import (
+    CONF_BALANCE_INTERVAL,
+    CONF_CREDITS_INTERVAL,
+    CONF_CURRENCY_NAMES,
+    CONF_FAST_LANE_COINS,
+    CONF_FAST_LANE_INTERVAL,
+    CONF_FIAT_CURRENCY,
+    CONF_HASHRATE_FLOORS,
+    CONF_HASHRATE_INTERVAL,
+    CONF_INVALID_SHARES_PERCENT,
+    CONF_MAX_CACHE_AGE,
+    CONF_PAYOUT_THRESHOLDS,
+    CONF_POOL_INFO_INTERVAL,
+    CONF_POOL_STATUS_INTERVAL,
+    CONF_STATE_ATTRIBUTES,
+    CONF_WORKERS_INTERVAL,
+    DEFAULT_BALANCE_INTERVAL,
+    DEFAULT_CREDITS_INTERVAL,
+    DEFAULT_FAST_LANE_INTERVAL,
+    DEFAULT_HASHRATE_INTERVAL,
+    DEFAULT_INVALID_SHARES_PERCENT,
+    DEFAULT_MAX_CACHE_AGE,
+    DEFAULT_POOL_INFO_INTERVAL,
+    DEFAULT_POOL_STATUS_INTERVAL,
+    DEFAULT_STATE_ATTRIBUTES,
+    DEFAULT_WORKERS_INTERVAL,
+    DOMAIN,
+    MIN_FAST_LANE_INTERVAL,
+)
+from .coordinator import UPDATE_ERRORS, parse_balance, parse_balance_coin
+from .fields import SchemaError
+from .helpers import scoped_id
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,15 +56,125 @@ AUTH_SCHEMA = vol.Schema(
         vol.Optional(CONF_FIAT_CURRENCY, default="USD"): cv.string,
     }
 )
-CURRENCY_NAME_SCHEMA = vol.Schema(
-    {
-        vol.Required(CONF_NAME): cv.string,
-        vol.Optional("add_another"): cv.boolean,
-    }
-)
-
 OPTIONS_SCHEMA = vol.Schema({vol.Optional(CONF_NAME, default="foo"): cv.string})
 
+# Options given in minutes and their defaults.
+MINUTE_OPTIONS = {
+    CONF_HASHRATE_INTERVAL: DEFAULT_HASHRATE_INTERVAL,
+    CONF_WORKERS_INTERVAL: DEFAULT_WORKERS_INTERVAL,
+    CONF_POOL_STATUS_INTERVAL: DEFAULT_POOL_STATUS_INTERVAL,
+    CONF_BALANCE_INTERVAL: DEFAULT_BALANCE_INTERVAL,
+    CONF_CREDITS_INTERVAL: DEFAULT_CREDITS_INTERVAL,
+    CONF_POOL_INFO_INTERVAL: DEFAULT_POOL_INFO_INTERVAL,
+    CONF_MAX_CACHE_AGE: DEFAULT_MAX_CACHE_AGE,
+}
+
+
+def coin_names_from_input(text: str) -> List[str]:
+    """Split comma separated coin names typed by the user
+
+    Parameters
+    ----------
+    text : str
+        Coin names separated by commas or whitespace
+
+    Returns
+    -------
+    List[str]
+        Lower case coin names in the order given, without duplicates
+    """
+    names = text.replace(",", " ").lower().split()
+    return list(dict.fromkeys(names))
+
+
+def coin_values_from_input(text: str) -> Dict[str, float]:
+    """Parse per coin numbers typed as comma separated coin=value pairs
+
+    Parameters
+    ----------
+    text : str
+        Values e.g. hashrate floors "ethereum=150, monero=2.5"
+
+    Returns
+    -------
+    Dict[str, float]
+        Value keyed by lower case coin name
+
+    Raises
+    ------
+    ValueError
+        if a pair has no coin name or its value is not a number
+    """
+    values = {}
+    for pair in text.split(","):
+        if not pair.strip():
+            continue
+        coin, separator, value = pair.partition("=")
+        if not separator or not coin.strip():
+            raise ValueError(pair)
+        values[coin.strip().lower()] = float(value)
+    return values
+
+
+def coin_values_to_input(values: Dict[str, float]) -> str:
+    """Format per coin numbers the way ``coin_values_from_input`` reads them."""
+    return ", ".join(f"{coin}={value:g}" for coin, value in values.items())
+
+
+def discover_coins(all_balances: List[Dict[str, Any]]) -> Dict[str, bool]:
+    """Lists the coins of a getuserallbalances response
+
+    Parameters
+    ----------
+    all_balances : List[Dict[str, Any]]
+        Balance entries of every coin the account has mined
+
+    Returns
+    -------
+    Dict[str, bool]
+        Whether each coin currently has any balance, sorted by coin name
+    """
+    coins = {}
+    for balance in all_balances:
+        try:
+            coins[parse_balance_coin(balance)] = any(parse_balance(balance).values())
+        except SchemaError:
+            _LOGGER.debug("Skipping unexpected balance entry: %s", balance)
+    return dict(sorted(coins.items()))
+
+
+def coins_schema(
+    discovered: Dict[str, bool],
+    selected: Optional[List[str]] = None,
+    coin_names: str = "",
+) -> vol.Schema:
+    """Builds the form to pick discovered coins and enter other coin names
+
+    Parameters
+    ----------
+    discovered : Dict[str, bool]
+        Coins of the account, those with a balance are checked by default
+    selected : Optional[List[str]]
+        Checked coins when showing the form again
+    coin_names : str
+        Default of the coin names field
+
+    Returns
+    -------
+    vol.Schema
+        Schema of the coin step
+    """
+    if selected is None:
+        selected = [coin for coin, active in discovered.items() if active]
+    return vol.Schema(
+        {
+            vol.Optional("coins", default=selected): cv.multi_select(
+                {coin: coin.title() for coin in discovered}
+            ),
+            vol.Optional(CONF_NAME, default=coin_names): cv.string,
+        }
+    )
+
 
 async def validate_coin(coin: str, api_key: str, hass: core.HomeAssistant) -> None:
     """Validates a coin
@@ -52,15 +193,45 @@ async def validate_coin(coin: str, api_key: str, hass: core.HomeAssistant) -> No
     ValueError
         if the coin is invalid
     """
-    session = async_get_clientsession(hass)
-    miningpoolhubapi = MiningPoolHubAPI(session, api_key=api_key)
+    miningpoolhubapi = async_get_client(hass, api_key)
     try:
         await miningpoolhubapi.async_get_dashboard(coin_name=coin)
     except InvalidCoinError:
         raise ValueError
 
 
-async def validate_auth(api_key: str, hass: core.HomeAssistant) -> None:
+async def validate_coins(
+    coins: List[str], api_key: str, hass: core.HomeAssistant
+) -> List[str]:
+    """Validates coins concurrently
+
+    Parameters
+    ----------
+    coins : List[str]
+        Coin names
+    api_key : str
+        MiningPoolHub API key
+    hass : core.HomeAssistant
+        hass instance
+
+    Returns
+    -------
+    List[str]
+        Coins that are invalid
+    """
+    results = await asyncio.gather(
+        *[validate_coin(coin, api_key, hass) for coin in coins],
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, BaseException) and not isinstance(result, ValueError):
+            raise result
+    return [
+        coin for coin, result in zip(coins, results) if isinstance(result, ValueError)
+    ]
+
+
+async def validate_auth(api_key: str, hass: core.HomeAssistant) -> Dict[str, bool]:
     """Validates a Mining Pool Hub API key.
 
     Parameters
@@ -70,30 +241,41 @@ async def validate_auth(api_key: str, hass: core.HomeAssistant) -> None:
     hass : core.HomeAssistant
         hass instance
 
+    Returns
+    -------
+    Dict[str, bool]
+        Coins of the account, see ``discover_coins``
+
     Raises
     ------
     ValueError
         if the API key is invalid
     """
-    session = async_get_clientsession(hass)
-    miningpoolhubapi = MiningPoolHubAPI(session, api_key=api_key)
+    miningpoolhubapi = async_get_client(hass, api_key)
     try:
-        await miningpoolhubapi.async_get_user_all_balances()
+        all_balances = await miningpoolhubapi.async_get_user_all_balances()
     except UnauthorizedError:
         raise ValueError
+    return discover_coins(all_balances)
 
 
 class MiningPoolHubConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Mining Pool Hub config flow."""
 
+    # Version 2 scopes unique IDs and device identifiers with the entry id.
+    VERSION = 2
     data: Optional[Dict[str, Any]] = {"api_key": "default"}
+    # Coins found on the account, whether they have a balance.
+    discovered: Dict[str, bool] = {}
 
     async def async_step_user(self, user_input: Optional[Dict[str, Any]] = None):
         """Invoked when a user initiates a flow via the user interface."""
         errors: Dict[str, str] = {}
         if user_input is not None:
             try:
-                await validate_auth(user_input[CONF_API_KEY], self.hass)
+                self.discovered = await validate_auth(
+                    user_input[CONF_API_KEY], self.hass
+                )
             except ValueError:
                 errors["base"] = "auth"
             if not errors:
@@ -108,30 +290,39 @@ class MiningPoolHubConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
     async def async_step_coin(self, user_input: Optional[Dict[str, Any]] = None):
-        """Second step in config flow to add a repo to watch."""
+        """Second step in config flow to pick the coins to watch.
+
+        The coins found on the account are offered with those holding a
+        balance checked, other coin names are validated in one batch.
+        """
         errors: Dict[str, str] = {}
         if user_input is not None:
-            # Validate the coin.
-            try:
-                await validate_coin(
-                    user_input[CONF_NAME], self.data[CONF_API_KEY], self.hass
-                )
-            except ValueError:
+            selected = list(user_input.get("coins", []))
+            entered = [
+                coin
+                for coin in coin_names_from_input(user_input.get(CONF_NAME, ""))
+                if coin not in selected
+            ]
+            invalid = await validate_coins(entered, self.data[CONF_API_KEY], self.hass)
+            if invalid:
                 errors["base"] = "invalid_coin"
+            elif not selected and not entered:
+                errors["base"] = "no_coins"
 
             if not errors:
-                # Input is valid, set data.
-                self.data[CONF_CURRENCY_NAMES].append(user_input[CONF_NAME].lower())
-                # If user ticked the box show this form again so they can add an
-                # additional coins.
-                if user_input.get("add_another", False):
-                    return await self.async_step_coin()
-
-                # User is done adding coins, create the config entry.
+                # Input is valid, create the config entry.
+                self.data[CONF_CURRENCY_NAMES] = selected + entered
                 return self.async_create_entry(title="MiningPoolHub", data=self.data)
 
+            # Show the form again with the invalid names left to correct.
+            return self.async_show_form(
+                step_id="coin",
+                data_schema=coins_schema(self.discovered, selected, ", ".join(invalid)),
+                errors=errors,
+            )
+
         return self.async_show_form(
-            step_id="coin", data_schema=CURRENCY_NAME_SCHEMA, errors=errors
+            step_id="coin", data_schema=coins_schema(self.discovered), errors=errors
         )
 
     @staticmethod
@@ -154,16 +345,29 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         errors: Dict[str, str] = {}
         # Grab all configured pools from the entity registry so we can populate the
         # multi-select dropdown that will allow a user to remove a mining pool.
+        # Diagnostic sensors of the entry are not coins and are left out.
         entity_registry = await async_get_registry(self.hass)
-        entries = async_entries_for_config_entry(
-            entity_registry, self.config_entry.entry_id
-        )
+        coin_names = self.hass.data[DOMAIN][self.config_entry.entry_id][
+            CONF_CURRENCY_NAMES
+        ]
+        coin_unique_ids = {
+            scoped_id(self.config_entry.entry_id, coin_name): coin_name
+            for coin_name in coin_names
+        }
+        entries = [
+            e
+            for e in async_entries_for_config_entry(
+                entity_registry, self.config_entry.entry_id
+            )
+            if e.unique_id in coin_unique_ids
+        ]
         # Default value for our multi-select.
         all_coins = {e.entity_id: e.original_name[14:] for e in entries}
         coin_map = {e.entity_id: e for e in entries}
+        api_key = self.hass.data[DOMAIN][self.config_entry.entry_id][CONF_API_KEY]
 
         if user_input is not None:
-            updated_coins = deepcopy(self.config_entry.data[CONF_CURRENCY_NAMES])
+            updated_coins = deepcopy(coin_names)
 
             # Remove any unchecked coins.
             removed_entities = [
@@ -173,43 +377,167 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             ]
 
             for entity_id in removed_entities:
-                # Unregister from HA
-                entity_registry.async_remove(entity_id)
-
-                # Remove from our configured coins.
+                # Remove from our configured coins, the update listener removes
+                # the coin's entities.
                 entry = coin_map[entity_id]
-                entry_name = entry.unique_id
+                entry_name = coin_unique_ids[entry.unique_id]
                 updated_coins = [e for e in updated_coins if e != entry_name]
 
-            if user_input.get(CONF_NAME):
-                # Validate the coin.
-                api_key = self.hass.data[DOMAIN][self.config_entry.entry_id][
-                    CONF_API_KEY
-                ]
-                try:
-                    await validate_coin(user_input[CONF_NAME], api_key, self.hass)
-                except ValueError:
-                    errors["base"] = "invalid_coin"
+            # Discovered coins are known to exist, the entered ones are
+            # validated in one batch.
+            added = [
+                coin
+                for coin in user_input.get("add_coins", [])
+                if coin not in updated_coins
+            ]
+            entered = [
+                coin
+                for coin in coin_names_from_input(user_input.get(CONF_NAME, ""))
+                if coin not in updated_coins and coin not in added
+            ]
+            if await validate_coins(entered, api_key, self.hass):
+                errors["base"] = "invalid_coin"
+            else:
+                updated_coins.extend(added + entered)
 
-                if not errors:
-                    # Add the new repo.
-                    updated_coins.append(user_input.get(CONF_NAME).lower())
+            try:
+                hashrate_floors = coin_values_from_input(
+                    user_input.get(
+                        CONF_HASHRATE_FLOORS,
+                        coin_values_to_input(self._hashrate_floors()),
+                    )
+                )
+            except ValueError:
+                errors["base"] = "invalid_hashrate_floors"
+            try:
+                payout_thresholds = coin_values_from_input(
+                    user_input.get(
+                        CONF_PAYOUT_THRESHOLDS,
+                        coin_values_to_input(self._payout_thresholds()),
+                    )
+                )
+            except ValueError:
+                errors["base"] = "invalid_payout_thresholds"
 
             if not errors:
-                # Value of data will be set on the options property of our config_entry instance.
+                minutes = {
+                    key: user_input.get(key, self._current_minutes(key))
+                    for key in MINUTE_OPTIONS
+                }
+                # Value of data will be set on the options property of our
+                # config_entry instance.
                 return self.async_create_entry(
                     title="",
-                    data={CONF_CURRENCY_NAMES: updated_coins},
+                    data={
+                        CONF_CURRENCY_NAMES: updated_coins,
+                        CONF_STATE_ATTRIBUTES: user_input.get(
+                            CONF_STATE_ATTRIBUTES, self._state_attributes()
+                        ),
+                        CONF_HASHRATE_FLOORS: hashrate_floors,
+                        CONF_PAYOUT_THRESHOLDS: payout_thresholds,
+                        CONF_FAST_LANE_COINS: [
+                            coin
+                            for coin in user_input.get(
+                                CONF_FAST_LANE_COINS, self._fast_lane_coins()
+                            )
+                            if coin in updated_coins
+                        ],
+                        CONF_FAST_LANE_INTERVAL: user_input.get(
+                            CONF_FAST_LANE_INTERVAL, self._fast_lane_interval()
+                        ),
+                        CONF_INVALID_SHARES_PERCENT: user_input.get(
+                            CONF_INVALID_SHARES_PERCENT, self._invalid_shares_percent()
+                        ),
+                        **minutes,
+                    },
                 )
 
+        discovered = {
+            coin: coin.title()
+            for coin in await self._async_discover_coins(api_key)
+            if coin not in coin_names
+        }
         options_schema = vol.Schema(
             {
                 vol.Optional("coins", default=list(all_coins.keys())): cv.multi_select(
                     all_coins
                 ),
+                vol.Optional("add_coins", default=[]): cv.multi_select(discovered),
                 vol.Optional(CONF_NAME): cv.string,
+                **{
+                    vol.Optional(key, default=self._current_minutes(key)): vol.All(
+                        vol.Coerce(int), vol.Range(min=1)
+                    )
+                    for key in MINUTE_OPTIONS
+                },
+                vol.Optional(
+                    CONF_STATE_ATTRIBUTES, default=self._state_attributes()
+                ): cv.boolean,
+                vol.Optional(
+                    CONF_HASHRATE_FLOORS,
+                    default=coin_values_to_input(self._hashrate_floors()),
+                ): cv.string,
+                vol.Optional(
+                    CONF_INVALID_SHARES_PERCENT,
+                    default=self._invalid_shares_percent(),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Optional(
+                    CONF_PAYOUT_THRESHOLDS,
+                    default=coin_values_to_input(self._payout_thresholds()),
+                ): cv.string,
+                vol.Optional(
+                    CONF_FAST_LANE_COINS,
+                    default=[
+                        coin for coin in self._fast_lane_coins() if coin in coin_names
+                    ],
+                ): cv.multi_select({coin: coin.title() for coin in coin_names}),
+                vol.Optional(
+                    CONF_FAST_LANE_INTERVAL, default=self._fast_lane_interval()
+                ): vol.All(vol.Coerce(int), vol.Range(min=MIN_FAST_LANE_INTERVAL)),
             }
         )
         return self.async_show_form(
             step_id="init", data_schema=options_schema, errors=errors
         )
+
+    async def _async_discover_coins(self, api_key: str) -> Dict[str, bool]:
+        """Return the coins of the account, empty if they cannot be fetched."""
+        try:
+            return await validate_auth(api_key, self.hass)
+        except (ValueError, *UPDATE_ERRORS) as err:
+            _LOGGER.warning("Error discovering coins of the account: %s", repr(err))
+            return {}
+
+    def _current_minutes(self, key: str) -> int:
+        """Return the configured value in minutes for an option."""
+        return self.config_entry.options.get(key, MINUTE_OPTIONS[key])
+
+    def _hashrate_floors(self) -> Dict[str, float]:
+        """Return the hashrate below which each coin fires an event."""
+        return self.config_entry.options.get(CONF_HASHRATE_FLOORS, {})
+
+    def _payout_thresholds(self) -> Dict[str, float]:
+        """Return the balance at which each coin is paid out."""
+        return self.config_entry.options.get(CONF_PAYOUT_THRESHOLDS, {})
+
+    def _fast_lane_coins(self) -> List[str]:
+        """Return the coins whose hashrate is polled on the short interval."""
+        return self.config_entry.options.get(CONF_FAST_LANE_COINS, [])
+
+    def _fast_lane_interval(self) -> int:
+        """Return the seconds between hashrate polls of the fast lane."""
+        return self.config_entry.options.get(
+            CONF_FAST_LANE_INTERVAL, DEFAULT_FAST_LANE_INTERVAL
+        )
+
+    def _invalid_shares_percent(self) -> int:
+        """Return the invalid share percentage that fires an event."""
+        return self.config_entry.options.get(
+            CONF_INVALID_SHARES_PERCENT, DEFAULT_INVALID_SHARES_PERCENT
+        )
+
+    def _state_attributes(self) -> bool:
+        """Return whether coin sensors carry all fields as attributes."""
+        return self.config_entry.options.get(
+            CONF_STATE_ATTRIBUTES, DEFAULT_STATE_ATTRIBUTES
+        )
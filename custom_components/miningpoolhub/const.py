@@ -1,14 +1,120 @@
+from datetime import timedelta
+
 DOMAIN = "miningpoolhub"
 
 CONF_CURRENCY_NAMES = "currency_names"
 CONF_FIAT_CURRENCY = "fiat_currency"
+CONF_POOL_INFO_INTERVAL = "pool_info_interval"
+CONF_BALANCE_INTERVAL = "balance_interval"
+CONF_CREDITS_INTERVAL = "credits_interval"
+CONF_HASHRATE_INTERVAL = "hashrate_interval"
+CONF_WORKERS_INTERVAL = "workers_interval"
+CONF_POOL_STATUS_INTERVAL = "pool_status_interval"
+CONF_MAX_CACHE_AGE = "max_cache_age"
+CONF_STATE_ATTRIBUTES = "state_attributes"
+CONF_HASHRATE_FLOORS = "hashrate_floors"
+CONF_INVALID_SHARES_PERCENT = "invalid_shares_percent"
+CONF_PAYOUT_THRESHOLDS = "payout_thresholds"
+CONF_FAST_LANE_COINS = "fast_lane_coins"
+CONF_FAST_LANE_INTERVAL = "fast_lane_interval"
 
 SENSOR_PREFIX = "MiningPoolHub "
 
+DATA_COORDINATOR = "coordinator"
+DATA_CLIENT_MANAGER = "client_manager"
+DATA_PRICE_CACHE = "price_cache"
+DATA_FAST_LANE = "fast_lane"
+DATA_COORDINATOR_REGISTRY = "coordinator_registry"
+
+# Dispatched with the coins added to a config entry, formatted with its entry id
+SIGNAL_COINS_ADDED = "miningpoolhub_coins_added_{}"
+
+# Longest a single MiningPoolHub request may take, well under the shortest
+# refresh interval so a hung request cannot hold up a refresh or its rate
+# limiter slot
+REQUEST_TIMEOUT = timedelta(seconds=30)
+# How long identical MiningPoolHub requests are served from memory
+REQUEST_CACHE_TTL = timedelta(seconds=30)
+# How long coin prices are reused before asking CoinGecko again
+PRICE_CACHE_TTL = timedelta(minutes=5)
+# Longest a CoinGecko price request may take
+PRICE_REQUEST_TIMEOUT = timedelta(seconds=10)
+# How long pool statistics fetched for one account are reused by the others,
+# shorter than the default pool status interval so each account's refresh
+# still finds fresh data or fetches it for everyone
+POOL_CACHE_TTL = timedelta(minutes=4)
+
+# Field groups that are refreshed from MiningPoolHub on their own cadence
+GROUP_POOL_INFO = "pool_info"
+GROUP_BALANCES = "balances"
+GROUP_CREDITS = "credits"
+GROUP_HASHRATE = "hashrate"
+GROUP_WORKERS = "workers"
+GROUP_POOL_STATUS = "pool_status"
+
+# Default minutes between refreshing each field group
+DEFAULT_POOL_INFO_INTERVAL = 1440
+DEFAULT_BALANCE_INTERVAL = 2
+DEFAULT_CREDITS_INTERVAL = 30
+DEFAULT_HASHRATE_INTERVAL = 10
+DEFAULT_WORKERS_INTERVAL = 10
+DEFAULT_POOL_STATUS_INTERVAL = 5
+# Default minutes a persisted snapshot may be used to populate sensors at startup
+DEFAULT_MAX_CACHE_AGE = 60
+# Whether coin sensors carry every parsed field as state attributes
+DEFAULT_STATE_ATTRIBUTES = True
+# Percentage of invalid shares among those submitted since the last update
+# that fires EVENT_INVALID_SHARES
+DEFAULT_INVALID_SHARES_PERCENT = 10
+# Default seconds between hashrate polls of the fast lane coins
+DEFAULT_FAST_LANE_INTERVAL = 20
+# Shortest allowed seconds between hashrate polls of the fast lane
+MIN_FAST_LANE_INTERVAL = 10
+
+# Events fired when successive updates of a coin show a transition
+EVENT_PAYOUT = "miningpoolhub_payout"
+EVENT_HASHRATE_LOW = "miningpoolhub_hashrate_low"
+EVENT_HASHRATE_RESTORED = "miningpoolhub_hashrate_restored"
+EVENT_INVALID_SHARES = "miningpoolhub_invalid_shares"
+
+# Persisted snapshot of the last successful update of each config entry
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 30
+# Longest time setting up an account waits for its first refresh
+STARTUP_BUDGET = timedelta(seconds=5)
+# Maximum number of requests in flight to MiningPoolHub per account
+MAX_CONCURRENT_REQUESTS = 4
+# Limits on requests to MiningPoolHub shared by every account
+MAX_CONNECTIONS = 8
+RATE_LIMIT_PER_SECOND = 4.0
+RATE_LIMIT_BURST = 8
+# Longest time to back off while MiningPoolHub keeps failing
+MAX_BACKOFF = timedelta(minutes=30)
+# Windows of the rolling aggregates computed from the in-memory history
+HISTORY_SHORT_WINDOW = timedelta(hours=1)
+HISTORY_LONG_WINDOW = timedelta(hours=24)
+
+# Combined confirmed and unconfirmed balance of a coin
+METRIC_BALANCE = "balance"
+
 ATTR_ACTIVE_WORKERS = "active_workers"
+ATTR_AMOUNT = "amount"
+ATTR_COIN = "coin"
+ATTR_FLOOR = "floor"
+ATTR_INVALID_PERCENT = "invalid_percent"
+ATTR_AVERAGE_HASHRATE_1H = "average_hashrate_1h"
 ATTR_AVERAGE_HASHRATE_24h = "average_hashrate_24h"
+ATTR_MIN_HASHRATE_24H = "min_hashrate_24h"
+ATTR_MAX_HASHRATE_24H = "max_hashrate_24h"
+ATTR_VALID_SHARES_1H = "valid_shares_1h"
+ATTR_INVALID_SHARES_1H = "invalid_shares_1h"
+ATTR_MIN_BALANCE_24H = "min_balance_24h"
+ATTR_MAX_BALANCE_24H = "max_balance_24h"
 ATTR_CURRENT_HASHRATE = "current_hashrate"
 ATTR_CURRENCY = "currency"
+ATTR_DIFFICULTY = "difficulty"
+ATTR_LAST_SHARE = "last_share"
+ATTR_ONLINE = "online"
 ATTR_INVALID_SHARES = "invalid_shares"
 ATTR_VALID_SHARES = "valid_shares"
 ATTR_LAST_UPDATE = "last_update"
@@ -21,7 +127,30 @@ ATTR_RECENT_CREDITS_24_HOURS = "recent_credits_24_hours"
 ATTR_SINGLE_COIN_LOCAL_CURRENCY = "single_coin_in_local_currency"
 ATTR_TOTAL_UNPAID_FIAT = "fiat_currency_unpaid_total"
 ATTR_COINS_PER_MINUTE = "coins_per_minute"
+ATTR_POOL_HASHRATE = "pool_hashrate"
+ATTR_NETWORK_DIFFICULTY = "network_difficulty"
+ATTR_LAST_BLOCK = "last_block"
+ATTR_TIME_SINCE_LAST_BLOCK = "time_since_last_block"
+ATTR_ESTIMATED_TIME_TO_BLOCK = "estimated_time_to_block"
+ATTR_ESTIMATED_BLOCK = "estimated_block"
+ATTR_ESTIMATED_FEE = "estimated_fee"
+ATTR_ESTIMATED_DONATION = "estimated_donation"
+ATTR_ESTIMATED_PAYOUT = "estimated_payout"
+ATTR_PROJECTED_DAILY_EARNINGS = "projected_daily_earnings"
+ATTR_PROJECTED_WEEKLY_EARNINGS = "projected_weekly_earnings"
+ATTR_TIME_TO_PAYOUT = "time_to_payout"
+
+COINGECKO_API_ENDPOINT = "https://api.coingecko.com/api/v3/simple/price"
 
-COINGECKO_API_ENDPOINT = (
-    "https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies="
-)
+# CoinGecko ids of MiningPoolHub coins whose name differs, mostly pools of one
+# coin mined with different algorithms.
+COINGECKO_IDS = {
+    "digibyte-groestl": "digibyte",
+    "digibyte-qubit": "digibyte",
+    "digibyte-skein": "digibyte",
+    "myriadcoin-groestl": "myriadcoin",
+    "myriadcoin-skein": "myriadcoin",
+    "myriadcoin-yescrypt": "myriadcoin",
+    "verge-scrypt": "verge",
+    "vertcoin-lyra2re": "vertcoin",
+}
@@ -0,0 +1,1455 @@
+"""MiningPoolHub data update coordinator."""
+import asyncio
+from collections import Counter
+import logging
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import miningpoolhub_py.exceptions
+from aiohttp import ClientError
+from aiohttp import ClientResponseError
+from homeassistant import core
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.const import ATTR_NAME
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+import homeassistant.util.dt as dt_util
+
+from .circuit_breaker import CircuitBreaker
+from .client import (
+    ACTION_DASHBOARD,
+    ACTION_POOL_STATUS,
+    ACTION_USER_ALL_BALANCES,
+    ACTION_USER_WORKERS,
+    MiningPoolHubClient,
+    async_get_client,
+)
+from .const import (
+    ATTR_ACTIVE_WORKERS,
+    ATTR_AMOUNT,
+    ATTR_BALANCE_AUTO_EXCHANGE_CONFIRMED,
+    ATTR_BALANCE_AUTO_EXCHANGE_UNCONFIRMED,
+    ATTR_BALANCE_CONFIRMED,
+    ATTR_BALANCE_ON_EXCHANGE,
+    ATTR_BALANCE_UNCONFIRMED,
+    ATTR_COIN,
+    ATTR_CURRENT_HASHRATE,
+    ATTR_CURRENCY,
+    ATTR_DIFFICULTY,
+    ATTR_ESTIMATED_BLOCK,
+    ATTR_ESTIMATED_DONATION,
+    ATTR_ESTIMATED_FEE,
+    ATTR_ESTIMATED_PAYOUT,
+    ATTR_ESTIMATED_TIME_TO_BLOCK,
+    ATTR_FLOOR,
+    ATTR_INVALID_PERCENT,
+    ATTR_INVALID_SHARES,
+    ATTR_LAST_BLOCK,
+    ATTR_LAST_SHARE,
+    ATTR_NETWORK_DIFFICULTY,
+    ATTR_ONLINE,
+    ATTR_POOL_HASHRATE,
+    ATTR_TIME_SINCE_LAST_BLOCK,
+    ATTR_VALID_SHARES,
+    ATTR_RECENT_CREDITS_24_HOURS,
+    ATTR_SINGLE_COIN_LOCAL_CURRENCY,
+    ATTR_TOTAL_UNPAID_FIAT,
+    CONF_BALANCE_INTERVAL,
+    CONF_CREDITS_INTERVAL,
+    CONF_HASHRATE_INTERVAL,
+    CONF_POOL_INFO_INTERVAL,
+    CONF_POOL_STATUS_INTERVAL,
+    CONF_WORKERS_INTERVAL,
+    DATA_COORDINATOR_REGISTRY,
+    DEFAULT_BALANCE_INTERVAL,
+    DEFAULT_CREDITS_INTERVAL,
+    DEFAULT_HASHRATE_INTERVAL,
+    DEFAULT_INVALID_SHARES_PERCENT,
+    DEFAULT_POOL_INFO_INTERVAL,
+    DEFAULT_POOL_STATUS_INTERVAL,
+    DEFAULT_WORKERS_INTERVAL,
+    DOMAIN,
+    EVENT_HASHRATE_LOW,
+    EVENT_HASHRATE_RESTORED,
+    EVENT_INVALID_SHARES,
+    EVENT_PAYOUT,
+    GROUP_BALANCES,
+    GROUP_CREDITS,
+    GROUP_HASHRATE,
+    GROUP_POOL_INFO,
+    GROUP_POOL_STATUS,
+    GROUP_WORKERS,
+    MAX_CONCURRENT_REQUESTS,
+    STORAGE_SAVE_DELAY,
+)
+from .earnings import EarningsEstimator
+from .fields import FieldSpec, SchemaError, compile_fields
+from .history import CoinHistory
+from .metrics import PARSE_BUCKETS, UPDATE_BUCKETS, Histogram
+from .pricing import PriceCache, async_get_price_cache
+
+_LOGGER = logging.getLogger(__name__)
+
+UPDATE_ERRORS = (
+    asyncio.TimeoutError,
+    ClientError,
+    ClientResponseError,
+    miningpoolhub_py.exceptions.APIError,
+    miningpoolhub_py.exceptions.APIRateLimitError,
+    miningpoolhub_py.exceptions.JsonFormatError,
+)
+
+# Refresh timers fire on whole seconds, so a group is considered due slightly
+# before its interval has fully elapsed.
+SCHEDULE_TOLERANCE = timedelta(seconds=5)
+
+
+class FieldGroup(NamedTuple):
+    """Sensor attributes that are refreshed together from one endpoint."""
+
+    endpoint: str
+    attributes: Tuple[str, ...]
+    conf_interval: str
+    default_interval: int
+
+
+FIELD_GROUPS: Dict[str, FieldGroup] = {
+    GROUP_POOL_INFO: FieldGroup(
+        ACTION_DASHBOARD,
+        (ATTR_NAME, ATTR_CURRENCY),
+        CONF_POOL_INFO_INTERVAL,
+        DEFAULT_POOL_INFO_INTERVAL,
+    ),
+    GROUP_BALANCES: FieldGroup(
+        ACTION_USER_ALL_BALANCES,
+        (
+            ATTR_BALANCE_CONFIRMED,
+            ATTR_BALANCE_UNCONFIRMED,
+            ATTR_BALANCE_AUTO_EXCHANGE_CONFIRMED,
+            ATTR_BALANCE_AUTO_EXCHANGE_UNCONFIRMED,
+            ATTR_BALANCE_ON_EXCHANGE,
+        ),
+        CONF_BALANCE_INTERVAL,
+        DEFAULT_BALANCE_INTERVAL,
+    ),
+    GROUP_CREDITS: FieldGroup(
+        ACTION_DASHBOARD,
+        (ATTR_RECENT_CREDITS_24_HOURS,),
+        CONF_CREDITS_INTERVAL,
+        DEFAULT_CREDITS_INTERVAL,
+    ),
+    GROUP_HASHRATE: FieldGroup(
+        ACTION_DASHBOARD,
+        (
+            ATTR_CURRENT_HASHRATE,
+            ATTR_VALID_SHARES,
+            ATTR_INVALID_SHARES,
+            ATTR_ESTIMATED_BLOCK,
+            ATTR_ESTIMATED_FEE,
+            ATTR_ESTIMATED_DONATION,
+            ATTR_ESTIMATED_PAYOUT,
+        ),
+        CONF_HASHRATE_INTERVAL,
+        DEFAULT_HASHRATE_INTERVAL,
+    ),
+    GROUP_WORKERS: FieldGroup(
+        ACTION_USER_WORKERS,
+        (ATTR_ACTIVE_WORKERS,),
+        CONF_WORKERS_INTERVAL,
+        DEFAULT_WORKERS_INTERVAL,
+    ),
+    GROUP_POOL_STATUS: FieldGroup(
+        ACTION_POOL_STATUS,
+        (
+            ATTR_POOL_HASHRATE,
+            ATTR_NETWORK_DIFFICULTY,
+            ATTR_LAST_BLOCK,
+            ATTR_TIME_SINCE_LAST_BLOCK,
+            ATTR_ESTIMATED_TIME_TO_BLOCK,
+        ),
+        CONF_POOL_STATUS_INTERVAL,
+        DEFAULT_POOL_STATUS_INTERVAL,
+    ),
+}
+
+
+def intervals_from_config(config: Mapping[str, Any]) -> Dict[str, timedelta]:
+    """Builds the refresh interval of every field group from a config entry
+
+    Parameters
+    ----------
+    config : Mapping[str, Any]
+        Config entry data merged with its options
+
+    Returns
+    -------
+    Dict[str, timedelta]
+        Refresh interval keyed by field group
+    """
+    return {
+        name: timedelta(minutes=config.get(group.conf_interval, group.default_interval))
+        for name, group in FIELD_GROUPS.items()
+    }
+
+
+# Fields of each response the sensors use, everything else is ignored.
+DASHBOARD_FIELDS = (
+    FieldSpec(ATTR_NAME, ("pool", "info", "name"), str),
+    FieldSpec(ATTR_CURRENCY, ("pool", "info", "currency"), str),
+    FieldSpec(ATTR_CURRENT_HASHRATE, ("personal", "hashrate"), float),
+    FieldSpec(ATTR_VALID_SHARES, ("personal", "shares", "valid"), int),
+    FieldSpec(ATTR_INVALID_SHARES, ("personal", "shares", "invalid"), int),
+    FieldSpec(
+        ATTR_ESTIMATED_BLOCK, ("personal", "estimates", "block"), float, default=0.0
+    ),
+    FieldSpec(ATTR_ESTIMATED_FEE, ("personal", "estimates", "fee"), float, default=0.0),
+    FieldSpec(
+        ATTR_ESTIMATED_DONATION,
+        ("personal", "estimates", "donation"),
+        float,
+        default=0.0,
+    ),
+    FieldSpec(
+        ATTR_ESTIMATED_PAYOUT, ("personal", "estimates", "payout"), float, default=0.0
+    ),
+    FieldSpec(ATTR_BALANCE_CONFIRMED, ("balance", "confirmed"), float),
+    FieldSpec(ATTR_BALANCE_UNCONFIRMED, ("balance", "unconfirmed"), float),
+    FieldSpec(
+        ATTR_BALANCE_AUTO_EXCHANGE_CONFIRMED,
+        ("balance_for_auto_exchange", "confirmed"),
+        float,
+    ),
+    FieldSpec(
+        ATTR_BALANCE_AUTO_EXCHANGE_UNCONFIRMED,
+        ("balance_for_auto_exchange", "unconfirmed"),
+        float,
+    ),
+    FieldSpec(ATTR_BALANCE_ON_EXCHANGE, ("balance_on_exchange",), float),
+    FieldSpec(
+        ATTR_RECENT_CREDITS_24_HOURS, ("recent_credits_24hours", "amount"), float
+    ),
+)
+BALANCE_FIELDS = (
+    FieldSpec(ATTR_BALANCE_CONFIRMED, ("confirmed",), float),
+    FieldSpec(ATTR_BALANCE_UNCONFIRMED, ("unconfirmed",), float),
+    FieldSpec(ATTR_BALANCE_AUTO_EXCHANGE_CONFIRMED, ("ae_confirmed",), float),
+    FieldSpec(ATTR_BALANCE_AUTO_EXCHANGE_UNCONFIRMED, ("ae_unconfirmed",), float),
+    FieldSpec(ATTR_BALANCE_ON_EXCHANGE, ("exchange",), float),
+)
+BALANCE_COIN_FIELDS = (FieldSpec(ATTR_COIN, ("coin",), str),)
+WORKER_FIELDS = (
+    FieldSpec(ATTR_CURRENT_HASHRATE, ("hashrate",), float),
+    FieldSpec(ATTR_DIFFICULTY, ("difficulty",), float, default=0.0),
+)
+WORKER_NAME_FIELDS = (FieldSpec(ATTR_NAME, ("username",), str),)
+POOL_STATUS_FIELDS = (
+    FieldSpec(ATTR_POOL_HASHRATE, ("hashrate",), float),
+    FieldSpec(ATTR_NETWORK_DIFFICULTY, ("networkdiff",), float),
+    FieldSpec(ATTR_LAST_BLOCK, ("lastblock",), int),
+    FieldSpec(ATTR_TIME_SINCE_LAST_BLOCK, ("timesincelast",), int),
+    FieldSpec(ATTR_ESTIMATED_TIME_TO_BLOCK, ("esttime",), float),
+)
+
+_extract_dashboard = compile_fields(DASHBOARD_FIELDS)
+_extract_balance = compile_fields(BALANCE_FIELDS)
+_extract_balance_coin = compile_fields(BALANCE_COIN_FIELDS)
+_extract_worker = compile_fields(WORKER_FIELDS)
+_extract_worker_name = compile_fields(WORKER_NAME_FIELDS)
+_extract_pool_status = compile_fields(POOL_STATUS_FIELDS)
+
+
+def parse_dashboard(dashboard_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Converts a getdashboarddata response into sensor attributes
+
+    Parameters
+    ----------
+    dashboard_data : Dict[str, Any]
+        Dashboard response for a single coin
+
+    Returns
+    -------
+    Dict[str, Any]
+        Sensor attributes keyed by attribute name
+
+    Raises
+    ------
+    SchemaError
+        if a field of ``DASHBOARD_FIELDS`` is missing or malformed
+    """
+    return _extract_dashboard(dashboard_data)
+
+
+def parse_balance(balance_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Converts one coin of a getuserallbalances response into sensor attributes
+
+    Parameters
+    ----------
+    balance_data : Dict[str, Any]
+        Balance entry for a single coin
+
+    Returns
+    -------
+    Dict[str, Any]
+        Balance attributes keyed by attribute name
+
+    Raises
+    ------
+    SchemaError
+        if a field of ``BALANCE_FIELDS`` is missing or malformed
+    """
+    return _extract_balance(balance_data)
+
+
+def parse_balance_coin(balance_data: Dict[str, Any]) -> str:
+    """Returns the coin name of one coin of a getuserallbalances response
+
+    Parameters
+    ----------
+    balance_data : Dict[str, Any]
+        Balance entry for a single coin
+
+    Returns
+    -------
+    str
+        MiningPoolHub coin name
+
+    Raises
+    ------
+    SchemaError
+        if the coin field of ``BALANCE_COIN_FIELDS`` is missing or malformed
+    """
+    return _extract_balance_coin(balance_data)[ATTR_COIN]
+
+
+def parse_worker(worker_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Converts one worker of a getuserworkers response into sensor attributes
+
+    Parameters
+    ----------
+    worker_data : Dict[str, Any]
+        Worker entry of a single coin's pool
+
+    Returns
+    -------
+    Dict[str, Any]
+        Worker attributes keyed by attribute name
+
+    Raises
+    ------
+    SchemaError
+        if a field of ``WORKER_FIELDS`` is missing or malformed
+    """
+    worker = _extract_worker(worker_data)
+    worker[ATTR_ONLINE] = worker[ATTR_CURRENT_HASHRATE] > 0
+    return worker
+
+
+def parse_pool_status(pool_status: Dict[str, Any]) -> Dict[str, Any]:
+    """Converts a getpoolstatus response into sensor attributes
+
+    Parameters
+    ----------
+    pool_status : Dict[str, Any]
+        Pool status response for a single coin
+
+    Returns
+    -------
+    Dict[str, Any]
+        Pool attributes keyed by attribute name
+
+    Raises
+    ------
+    SchemaError
+        if a field of ``POOL_STATUS_FIELDS`` is missing or malformed
+    """
+    return _extract_pool_status(pool_status)
+
+
+class MiningPoolHubDataUpdateCoordinator(DataUpdateCoordinator):
+    """Fetches the data of every coin of a MiningPoolHub account.
+
+    Every field group in ``FIELD_GROUPS`` has its own refresh interval. The
+    coordinator ticks at the shortest interval and only requests the
+    endpoints that serve a group which is due: one getuserallbalances request
+    for the balances of all coins and a dashboard request per coin for the
+    pool info, credits and hashrate/shares.
+
+    The dashboard also carries balances, they are used for coins missing from
+    the getuserallbalances response.
+
+    Once ``only_consumed`` is set, a due group is only requested for the coins
+    with an enabled entity that registered with ``async_add_consumer``. A
+    platform adding entities calls ``async_skip_unconsumed``, which sets it
+    at the end of the next successful refresh, by then the entities have
+    registered what they read.
+
+    ``workers`` maps each coin name to its workers, fetched with one
+    getuserworkers request per coin. A worker's ``last_share`` is the last
+    refresh that saw it hashing, as the API does not report share times.
+
+    The pool hashrate, network difficulty and block statistics of each coin
+    come from one getpoolstatus request per coin. They do not depend on the
+    account, the client serves them from a cache shared by every account.
+
+    A failing account backs off exponentially through ``circuit_breaker`` and
+    is probed with a single getuserallbalances request before every coin is
+    polled again.
+
+    With a ``price_cache`` every update also values the coins in
+    ``fiat_currency`` using one batched price lookup for all coins. The
+    lookup runs in the background, the update uses the last known prices and
+    listeners are notified again once new ones arrive.
+
+    Each coin's ``earnings`` estimator projects its earnings from the credits,
+    the dashboard estimates and the hashrate samples, and the time until the
+    unpaid balance reaches the coin's entry in ``payout_thresholds``.
+
+    Refresh times are kept per field group and coin. A coin whose request
+    failed stays due and is requested again on the next tick, without
+    refetching the coins that succeeded.
+
+    ``data`` maps each coin name to its parsed sensor attributes. A coin is
+    in ``data`` once its dashboard or its balance is known, a coin whose last
+    dashboard request failed lacks the dashboard attributes.
+
+    Every refresh of a coin's hashrate and balances groups adds a sample to
+    the coin's ``history``, its rolling aggregates are part of the coin's
+    data.
+
+    When a ``store`` is given, the raw state behind ``data`` is persisted after
+    every update so it can be restored at startup with ``async_load_snapshot``.
+
+    After every update the coordinator compares each coin with the previous
+    update and fires ``EVENT_PAYOUT`` when the confirmed balance drops,
+    ``EVENT_HASHRATE_LOW``/``EVENT_HASHRATE_RESTORED`` when the hashrate
+    crosses the coin's floor in ``hashrate_floors`` and ``EVENT_INVALID_SHARES``
+    when the invalid share percentage of the new shares reaches
+    ``invalid_shares_percent``.
+
+    Every update records its wall time in ``update_duration`` and the part of
+    it spent parsing responses and building ``data`` in ``parse_duration``,
+    ``diagnostics`` returns them along with the client's request metrics.
+    """
+
+    def __init__(
+        self,
+        hass: core.HomeAssistant,
+        miningpoolhub_api: MiningPoolHubClient,
+        coin_names: Iterable[str],
+        intervals: Optional[Mapping[str, timedelta]] = None,
+        max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+        store: Optional[Store] = None,
+        fiat_currency: Optional[str] = None,
+        price_cache: Optional[PriceCache] = None,
+        hashrate_floors: Optional[Mapping[str, float]] = None,
+        invalid_shares_percent: float = DEFAULT_INVALID_SHARES_PERCENT,
+        payout_thresholds: Optional[Mapping[str, float]] = None,
+    ):
+        self.intervals = intervals_from_config({})
+        self.intervals.update(intervals or {})
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=min(self.intervals.values()),
+        )
+        self.miningpoolhub_api = miningpoolhub_api
+        self.coin_names = list(coin_names)
+        self.circuit_breaker = CircuitBreaker(self.update_interval)
+        self.fiat_currency = fiat_currency
+        self.hashrate_floors = dict(hashrate_floors or {})
+        self.invalid_shares_percent = invalid_shares_percent
+        self.payout_thresholds = dict(payout_thresholds or {})
+        # Coins whose invalid share percentage is at or above the threshold.
+        self._invalid_share_spikes: Set[str] = set()
+        # Coins whose balances in ``data`` came from getuserallbalances rather
+        # than from their dashboard.
+        self._listed_balances: Set[str] = set()
+        self._store = store
+        self._price_cache = price_cache
+        self._prices: Dict[str, float] = {}
+        self._price_update: Optional[asyncio.Task] = None
+        self._last_updated = dt_util.utcnow()
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+        # When each field group was last fetched, by group and coin name.
+        self._group_updated: Dict[str, Dict[str, datetime]] = {
+            name: {} for name in FIELD_GROUPS
+        }
+        self._dashboards: Dict[str, Dict[str, Any]] = {}
+        self._balances: Dict[str, Dict[str, Any]] = {}
+        self._pool_statuses: Dict[str, Dict[str, Any]] = {}
+        self.workers: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.history: Dict[str, CoinHistory] = {
+            coin_name: CoinHistory(self.intervals) for coin_name in self.coin_names
+        }
+        self.earnings: Dict[str, EarningsEstimator] = {
+            coin_name: EarningsEstimator() for coin_name in self.coin_names
+        }
+        # Digest of each coin's latest data, lets sensors skip identical writes.
+        self.digests: Dict[str, int] = {}
+        self.skipped_state_writes = 0
+        # (coin name, field group) pairs read by enabled entities.
+        self._consumers: Counter = Counter()
+        # Listeners notified of data changed between refreshes.
+        self._update_callbacks: List[CALLBACK_TYPE] = []
+        self.only_consumed = False
+        self._skip_unconsumed = False
+        self.update_duration = Histogram(UPDATE_BUCKETS)
+        self.parse_duration = Histogram(PARSE_BUCKETS)
+        self.last_update_duration: Optional[float] = None
+        self.update_errors: Counter = Counter()
+        self._parse_seconds = 0.0
+
+    def _is_due(self, name: str, coin_name: str, now: datetime) -> bool:
+        updated = self._group_updated[name].get(coin_name)
+        return updated is None or (
+            now - updated >= self.intervals[name] - SCHEDULE_TOLERANCE
+        )
+
+    def due_coins(self, name: str) -> List[str]:
+        """Return the coins whose field group refresh interval has elapsed."""
+        now = dt_util.utcnow()
+        return [
+            coin_name
+            for coin_name in self.coin_names
+            if self._is_due(name, coin_name, now)
+        ]
+
+    def due_groups(self) -> Set[str]:
+        """Return the field groups whose refresh interval has elapsed for a coin."""
+        return {name for name in self.intervals if self.due_coins(name)}
+
+    @callback
+    def async_add_consumer(
+        self, coin_name: str, groups: Iterable[str]
+    ) -> Callable[[], None]:
+        """Register an entity reading field groups of a coin
+
+        Parameters
+        ----------
+        coin_name : str
+            Coin whose data the entity reads
+        groups : Iterable[str]
+            Field groups the entity reads
+
+        Returns
+        -------
+        Callable[[], None]
+            Unregisters the entity
+        """
+        keys = [(coin_name, group) for group in groups]
+        self._consumers.update(keys)
+
+        @callback
+        def remove_consumer() -> None:
+            self._consumers.subtract(keys)
+
+        return remove_consumer
+
+    @callback
+    def async_skip_unconsumed(self) -> None:
+        """Only fetch what enabled entities read from the next refresh on."""
+        if not self.only_consumed:
+            self._skip_unconsumed = True
+
+    def consumed_coins(self, group: str) -> List[str]:
+        """Return the coins whose group is read by an enabled entity."""
+        return [
+            coin_name
+            for coin_name in self.coin_names
+            if not self.only_consumed or self._consumers[(coin_name, group)] > 0
+        ]
+
+    def _mark_updated(self, endpoint: str, coin_names: Iterable[str]) -> None:
+        now = dt_util.utcnow()
+        for name, group in FIELD_GROUPS.items():
+            if group.endpoint == endpoint:
+                self._group_updated[name].update(
+                    (coin_name, now) for coin_name in coin_names
+                )
+
+    def _clear_updated(
+        self, coin_names: Iterable[str], endpoint: Optional[str] = None
+    ) -> None:
+        coin_names = list(coin_names)
+        for name, group in FIELD_GROUPS.items():
+            if endpoint is None or group.endpoint == endpoint:
+                for coin_name in coin_names:
+                    self._group_updated[name].pop(coin_name, None)
+
+    async def _async_get_dashboard(self, coin_name: str) -> Dict[str, Any]:
+        async with self._semaphore:
+            return await self.miningpoolhub_api.async_get_dashboard(coin_name)
+
+    async def _async_update_dashboards(self, coin_names: List[str]) -> None:
+        results = await asyncio.gather(
+            *[self._async_get_dashboard(coin) for coin in coin_names],
+            return_exceptions=True,
+        )
+
+        started = monotonic()
+        failed = []
+        fetched = []
+        for coin_name, result in zip(coin_names, results):
+            if coin_name not in self.coin_names:
+                # Removed while the request was in flight.
+                continue
+            if isinstance(result, UPDATE_ERRORS):
+                failed.append(coin_name)
+                self._dashboards.pop(coin_name, None)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            try:
+                self._dashboards[coin_name] = parse_dashboard(result)
+            except SchemaError as err:
+                _LOGGER.warning("Unexpected dashboard of %s: %s", coin_name, err)
+                failed.append(coin_name)
+                self._dashboards.pop(coin_name, None)
+                continue
+            fetched.append(coin_name)
+        self._parse_seconds += monotonic() - started
+        # Failed coins stay due and are requested again on the next tick.
+        self._mark_updated(ACTION_DASHBOARD, fetched)
+
+        if failed and not self._dashboards:
+            raise UpdateFailed(
+                f"Error retrieving data from MiningPoolHub for {', '.join(failed)}"
+            )
+        if failed:
+            _LOGGER.warning(
+                "Error retrieving data from MiningPoolHub for %s", ", ".join(failed)
+            )
+
+    async def _async_update_balances(self) -> bool:
+        try:
+            all_balances = await self.miningpoolhub_api.async_get_user_all_balances()
+        except UPDATE_ERRORS as err:
+            # Keep serving the last known balances, retry on the next tick.
+            if not self.circuit_breaker.is_open:
+                _LOGGER.warning(
+                    "Error retrieving balances from MiningPoolHub: %s", repr(err)
+                )
+            return False
+        started = monotonic()
+        balances = {}
+        for balance in all_balances:
+            try:
+                coin_name = parse_balance_coin(balance)
+            except SchemaError as err:
+                _LOGGER.debug("Skipping unexpected balance entry: %s", err)
+                continue
+            if coin_name not in self.coin_names:
+                continue
+            try:
+                balances[coin_name] = parse_balance(balance)
+            except SchemaError as err:
+                # The coin falls back to the balances of its dashboard.
+                _LOGGER.warning("Unexpected balance of %s: %s", coin_name, err)
+        self._balances = balances
+        self._parse_seconds += monotonic() - started
+        self._mark_updated(ACTION_USER_ALL_BALANCES, self.coin_names)
+        return True
+
+    async def _async_get_workers(self, coin_name: str) -> Any:
+        async with self._semaphore:
+            return await self.miningpoolhub_api.async_get_user_workers(coin_name)
+
+    async def _async_update_workers(self, coin_names: List[str]) -> None:
+        results = await asyncio.gather(
+            *[self._async_get_workers(coin) for coin in coin_names],
+            return_exceptions=True,
+        )
+
+        started = monotonic()
+        now = dt_util.utcnow().isoformat()
+        failed = []
+        fetched = []
+        for coin_name, result in zip(coin_names, results):
+            if coin_name not in self.coin_names:
+                continue
+            if isinstance(result, UPDATE_ERRORS):
+                # Keep the last known workers so their entities stay around.
+                failed.append(coin_name)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            known = self.workers.get(coin_name, {})
+            workers = {}
+            for worker_data in result:
+                try:
+                    worker_name = _extract_worker_name(worker_data)[ATTR_NAME]
+                    worker = parse_worker(worker_data)
+                except SchemaError as err:
+                    _LOGGER.warning("Unexpected worker of %s: %s", coin_name, err)
+                    continue
+                worker[ATTR_LAST_SHARE] = (
+                    now
+                    if worker[ATTR_ONLINE]
+                    else known.get(worker_name, {}).get(ATTR_LAST_SHARE)
+                )
+                workers[worker_name] = worker
+            self.workers[coin_name] = workers
+            fetched.append(coin_name)
+        self._parse_seconds += monotonic() - started
+        self._mark_updated(ACTION_USER_WORKERS, fetched)
+
+        if failed:
+            _LOGGER.warning(
+                "Error retrieving workers from MiningPoolHub for %s", ", ".join(failed)
+            )
+
+    async def _async_get_pool_status(self, coin_name: str) -> Dict[str, Any]:
+        async with self._semaphore:
+            return await self.miningpoolhub_api.async_get_pool_status(coin_name)
+
+    async def _async_update_pool_statuses(self, coin_names: List[str]) -> None:
+        results = await asyncio.gather(
+            *[self._async_get_pool_status(coin) for coin in coin_names],
+            return_exceptions=True,
+        )
+
+        started = monotonic()
+        failed = []
+        fetched = []
+        for coin_name, result in zip(coin_names, results):
+            if coin_name not in self.coin_names:
+                continue
+            if isinstance(result, UPDATE_ERRORS):
+                # Pool statistics change slowly, keep the last known ones.
+                failed.append(coin_name)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            try:
+                self._pool_statuses[coin_name] = parse_pool_status(result)
+            except SchemaError as err:
+                _LOGGER.warning("Unexpected pool status of %s: %s", coin_name, err)
+                self._pool_statuses.pop(coin_name, None)
+                continue
+            fetched.append(coin_name)
+        self._parse_seconds += monotonic() - started
+        self._mark_updated(ACTION_POOL_STATUS, fetched)
+
+        if failed:
+            _LOGGER.warning(
+                "Error retrieving pool status from MiningPoolHub for %s",
+                ", ".join(failed),
+            )
+
+    async def async_set_coins(self, coin_names: Iterable[str]) -> List[str]:
+        """Follow coins being added to or removed from the account
+
+        Removed coins are dropped right away. Added coins are fetched in the
+        background with one dashboard, getuserworkers and getpoolstatus request
+        each, all sent at once. The other coins keep their data, history and
+        refresh schedule.
+
+        Parameters
+        ----------
+        coin_names : Iterable[str]
+            Every coin the account should now follow
+
+        Returns
+        -------
+        List[str]
+            Coins that were added
+        """
+        coin_names = list(coin_names)
+        added = [coin_name for coin_name in coin_names if coin_name not in self.history]
+        removed = [
+            coin_name for coin_name in self.coin_names if coin_name not in coin_names
+        ]
+        if not added and not removed:
+            return []
+
+        self.coin_names = coin_names
+        for coin_name in removed:
+            self._dashboards.pop(coin_name, None)
+            self._balances.pop(coin_name, None)
+            self._pool_statuses.pop(coin_name, None)
+            self.workers.pop(coin_name, None)
+            self.history.pop(coin_name, None)
+            self.earnings.pop(coin_name, None)
+        self._clear_updated(removed)
+        for coin_name in added:
+            self.history[coin_name] = CoinHistory(self.intervals)
+            self.earnings[coin_name] = EarningsEstimator()
+        if added:
+            # Not tracked by Home Assistant, setting up a configuration that
+            # joins the coordinator does not wait on MiningPoolHub.
+            self.hass.loop.create_task(self._async_fetch_coins(added))
+
+        if self._store is not None:
+            self._store.async_delay_save(self._snapshot, STORAGE_SAVE_DELAY)
+        self.async_set_updated_data(self._build_data())
+        return added
+
+    async def _async_fetch_coins(self, coin_names: List[str]) -> None:
+        # Every group is due for a new coin, and its entities have not been
+        # added yet to register what they read.
+        results = await asyncio.gather(
+            self._async_update_dashboards(coin_names),
+            self._async_update_workers(coin_names),
+            self._async_update_pool_statuses(coin_names),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, UpdateFailed):
+                # The coins are picked up by the next scheduled refresh.
+                _LOGGER.warning("%s", result)
+            elif isinstance(result, BaseException):
+                _LOGGER.error(
+                    "Unexpected error fetching %s",
+                    ", ".join(coin_names),
+                    exc_info=result,
+                )
+
+        if self._store is not None:
+            self._store.async_delay_save(self._snapshot, STORAGE_SAVE_DELAY)
+        self.async_set_updated_data(self._build_data())
+
+    async def async_configure(
+        self,
+        intervals: Optional[Mapping[str, timedelta]] = None,
+        store: Optional[Store] = None,
+        fiat_currency: Optional[str] = None,
+        hashrate_floors: Optional[Mapping[str, float]] = None,
+        invalid_shares_percent: float = DEFAULT_INVALID_SHARES_PERCENT,
+        payout_thresholds: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        """Apply new settings to the running coordinator
+
+        Takes the settings of the constructor, those left out return to their
+        defaults. The collected data and history are kept.
+
+        Parameters
+        ----------
+        intervals : Optional[Mapping[str, timedelta]]
+            Refresh interval of field groups
+        store : Optional[Store]
+            Store of the snapshot, a replaced store gets the latest snapshot
+            and no later writes
+        fiat_currency : Optional[str]
+            Currency the coins are valued in
+        hashrate_floors : Optional[Mapping[str, float]]
+            Hashrate of each coin below which an event is fired
+        invalid_shares_percent : float
+            Invalid share percentage from which an event is fired
+        payout_thresholds : Optional[Mapping[str, float]]
+            Balance at which each coin is paid out
+        """
+        self.async_set_intervals({**intervals_from_config({}), **(intervals or {})})
+        self.fiat_currency = fiat_currency
+        self.hashrate_floors = dict(hashrate_floors or {})
+        self.invalid_shares_percent = invalid_shares_percent
+        self.payout_thresholds = dict(payout_thresholds or {})
+        if store is self._store:
+            return
+        # Detached first, a refresh ending during the final write must not
+        # schedule another one.
+        previous, self._store = self._store, store
+        if store is not None and self.data is not None:
+            store.async_delay_save(self._snapshot, STORAGE_SAVE_DELAY)
+        if previous is not None:
+            # Also cancels its pending delayed save.
+            await previous.async_save(self._snapshot())
+
+    @callback
+    def async_set_intervals(self, intervals: Mapping[str, timedelta]) -> None:
+        """Apply new refresh intervals without losing the collected history."""
+        intervals = {**self.intervals, **intervals}
+        if intervals == self.intervals:
+            return
+        self.intervals = intervals
+        self.circuit_breaker.base_delay = min(intervals.values())
+        if not self.circuit_breaker.is_open:
+            self.update_interval = self.circuit_breaker.delay
+        for coin_name, history in self.history.items():
+            # Buffers are sized for the intervals, move the samples over.
+            self.history[coin_name] = CoinHistory(intervals)
+            self.history[coin_name].restore(history.as_dict())
+        if self._update_callbacks:
+            # The refresh is rescheduled with the new interval when it ends.
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_set_hashrate(self, coin_name: str, hashrate: float) -> None:
+        """Apply a hashrate reading delivered between refreshes
+
+        Listeners are notified and events fired right away, the refresh
+        schedule and the hashrate history are left alone.
+
+        Parameters
+        ----------
+        coin_name : str
+            Coin the reading belongs to
+        hashrate : float
+            Current hashrate of the account on the coin's pool
+        """
+        dashboard = self._dashboards.get(coin_name)
+        if dashboard is None or dashboard.get(ATTR_CURRENT_HASHRATE) == hashrate:
+            return
+        dashboard[ATTR_CURRENT_HASHRATE] = hashrate
+        data = self._build_data()
+        if self.data:
+            self._async_fire_events(self.data, data)
+        # Unlike async_set_updated_data this does not postpone the next refresh.
+        self.data = data
+        self.async_update_listeners()
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for data updates, including those applied between refreshes."""
+        self._update_callbacks.append(update_callback)
+        return super().async_add_listener(update_callback)
+
+    @callback
+    def async_remove_listener(self, update_callback: CALLBACK_TYPE) -> None:
+        """Remove a data update listener."""
+        self._update_callbacks.remove(update_callback)
+        super().async_remove_listener(update_callback)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify listeners of ``data`` changed without a refresh."""
+        for update_callback in list(self._update_callbacks):
+            update_callback()
+
+    @callback
+    def _async_fire_events(
+        self,
+        previous: Mapping[str, Dict[str, Any]],
+        data: Mapping[str, Dict[str, Any]],
+    ) -> None:
+        """Fire the events of transitions between two updates of every coin."""
+        for coin_name, coin_data in data.items():
+            before = previous.get(coin_name)
+            if before is None:
+                continue
+
+            confirmed = coin_data.get(ATTR_BALANCE_CONFIRMED)
+            confirmed_before = before.get(ATTR_BALANCE_CONFIRMED)
+            # Only compare balances of the same source, the dashboard's may
+            # lag behind the one of getuserallbalances.
+            if (
+                (coin_name in self._balances) == (coin_name in self._listed_balances)
+                and confirmed is not None
+                and confirmed_before is not None
+                and confirmed < confirmed_before
+            ):
+                self.hass.bus.async_fire(
+                    EVENT_PAYOUT,
+                    {
+                        ATTR_COIN: coin_name,
+                        ATTR_CURRENCY: coin_data.get(ATTR_CURRENCY),
+                        ATTR_AMOUNT: confirmed_before - confirmed,
+                        ATTR_BALANCE_CONFIRMED: confirmed,
+                    },
+                )
+
+            floor = self.hashrate_floors.get(coin_name)
+            hashrate = coin_data.get(ATTR_CURRENT_HASHRATE)
+            hashrate_before = before.get(ATTR_CURRENT_HASHRATE)
+            if None not in (floor, hashrate, hashrate_before) and (
+                (hashrate < floor) != (hashrate_before < floor)
+            ):
+                self.hass.bus.async_fire(
+                    EVENT_HASHRATE_LOW if hashrate < floor else EVENT_HASHRATE_RESTORED,
+                    {
+                        ATTR_COIN: coin_name,
+                        ATTR_CURRENT_HASHRATE: hashrate,
+                        ATTR_FLOOR: floor,
+                    },
+                )
+
+            self._async_check_invalid_shares(coin_name, before, coin_data)
+
+    @callback
+    def _async_check_invalid_shares(
+        self, coin_name: str, before: Dict[str, Any], coin_data: Dict[str, Any]
+    ) -> None:
+        try:
+            valid = coin_data[ATTR_VALID_SHARES] - before[ATTR_VALID_SHARES]
+            invalid = coin_data[ATTR_INVALID_SHARES] - before[ATTR_INVALID_SHARES]
+        except KeyError:
+            return
+        if valid < 0 or invalid < 0 or valid + invalid == 0:
+            # Counters were reset or no shares were submitted.
+            return
+        percent = round(100 * invalid / (valid + invalid), 1)
+        if percent < self.invalid_shares_percent:
+            self._invalid_share_spikes.discard(coin_name)
+            return
+        if coin_name in self._invalid_share_spikes:
+            return
+        self._invalid_share_spikes.add(coin_name)
+        self.hass.bus.async_fire(
+            EVENT_INVALID_SHARES,
+            {
+                ATTR_COIN: coin_name,
+                ATTR_INVALID_PERCENT: percent,
+                ATTR_VALID_SHARES: valid,
+                ATTR_INVALID_SHARES: invalid,
+            },
+        )
+
+    def _back_off(self) -> None:
+        self.update_interval = self.circuit_breaker.record_failure()
+        _LOGGER.info(
+            "MiningPoolHub request failed %d time(s) in a row, retrying in %s",
+            self.circuit_breaker.failures,
+            self.update_interval,
+        )
+
+    def _resume(self) -> None:
+        if self.circuit_breaker.is_open:
+            _LOGGER.info("MiningPoolHub recovered, resuming polling")
+        self.circuit_breaker.record_success()
+        self.update_interval = self.circuit_breaker.delay
+
+    @callback
+    def _async_schedule_price_update(self) -> None:
+        """Update prices off the refresh, a slow CoinGecko must not hold it up."""
+        if self._price_update is None or self._price_update.done():
+            self._price_update = self.hass.async_create_task(
+                self._async_update_prices()
+            )
+
+    async def _async_update_prices(self) -> None:
+        prices = await self._price_cache.async_get_prices(
+            self.coin_names, self.fiat_currency
+        )
+        if prices == self._prices:
+            return
+        self._prices = prices
+        if self.data is not None:
+            self.data = self._build_data()
+            self.async_update_listeners()
+
+    def _valuation(self, coin_name: str, coin_data: Dict[str, Any]) -> Dict[str, Any]:
+        valuation: Dict[str, Any] = {}
+        price = self._prices.get(coin_name)
+        if price is not None and ATTR_BALANCE_CONFIRMED in coin_data:
+            unpaid = (
+                coin_data[ATTR_BALANCE_CONFIRMED] + coin_data[ATTR_BALANCE_UNCONFIRMED]
+            )
+            valuation[ATTR_SINGLE_COIN_LOCAL_CURRENCY] = price
+            valuation[ATTR_TOTAL_UNPAID_FIAT] = round(unpaid * price, 2)
+        return valuation
+
+    def _build_data(
+        self, refreshed: Optional[Mapping[str, Set[str]]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Merge the parsed responses of every coin.
+
+        ``refreshed`` maps each coin to the field groups fetched for it by
+        this update, only those are sampled into its history.
+        """
+        now = dt_util.utcnow()
+        data = {}
+        for coin_name in self.coin_names:
+            dashboard = self._dashboards.get(coin_name)
+            if dashboard is None and coin_name not in self._balances:
+                continue
+            coin_data = {
+                **(dashboard or {}),
+                **self._pool_statuses.get(coin_name, {}),
+                **self._balances.get(coin_name, {}),
+            }
+            if coin_name in self.workers:
+                coin_data[ATTR_ACTIVE_WORKERS] = sum(
+                    worker[ATTR_ONLINE] for worker in self.workers[coin_name].values()
+                )
+            history = self.history[coin_name]
+            earnings = self.earnings[coin_name]
+            groups = (refreshed or {}).get(coin_name, set())
+            if groups:
+                history.record(now, coin_data, groups)
+            if GROUP_HASHRATE in groups and ATTR_CURRENT_HASHRATE in coin_data:
+                earnings.record(now, coin_data[ATTR_CURRENT_HASHRATE])
+            coin_data.update(history.attributes(now))
+            coin_data.update(
+                earnings.attributes(coin_data, self.payout_thresholds.get(coin_name))
+            )
+            coin_data.update(self._valuation(coin_name, coin_data))
+            data[coin_name] = coin_data
+        self.digests = {
+            coin_name: hash(tuple(coin_data.items()))
+            for coin_name, coin_data in data.items()
+        }
+        return data
+
+    @callback
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "updated": self._last_updated.isoformat(),
+            "dashboards": self._dashboards,
+            "balances": self._balances,
+            "pool_statuses": self._pool_statuses,
+            "workers": self.workers,
+            "history": {
+                coin_name: history.as_dict()
+                for coin_name, history in self.history.items()
+            },
+            "earnings": {
+                coin_name: earnings.as_dict()
+                for coin_name, earnings in self.earnings.items()
+            },
+            "group_updated": self._group_updated_as_dict(),
+        }
+
+    def _group_updated_as_dict(self) -> Dict[str, Dict[str, str]]:
+        return {
+            name: {
+                coin_name: updated.isoformat()
+                for coin_name, updated in coin_updated.items()
+            }
+            for name, coin_updated in self._group_updated.items()
+        }
+
+    async def async_load_snapshot(self, max_age: timedelta) -> bool:
+        """Restore the data persisted by a previous run
+
+        Each coin's groups keep their persisted update time, so the next
+        refresh only requests what has become due since the snapshot was taken.
+
+        Parameters
+        ----------
+        max_age : timedelta
+            Snapshots taken longer ago than this are ignored
+
+        Returns
+        -------
+        bool
+            True if ``data`` was populated from the snapshot
+        """
+        if self._store is None:
+            return False
+        snapshot = await self._store.async_load()
+        if not snapshot:
+            return False
+
+        updated = dt_util.parse_datetime(snapshot["updated"])
+        if updated is None or dt_util.utcnow() - updated > max_age:
+            return False
+
+        self._last_updated = updated
+        for name, group_updated in snapshot["group_updated"].items():
+            if name not in FIELD_GROUPS:
+                continue
+            if isinstance(group_updated, str):
+                # Older snapshots hold one update time for all coins.
+                group_updated = dict.fromkeys(self.coin_names, group_updated)
+            self._group_updated[name] = {
+                coin_name: dt_util.parse_datetime(coin_updated)
+                for coin_name, coin_updated in group_updated.items()
+                if coin_name in self.coin_names and dt_util.parse_datetime(coin_updated)
+            }
+        self._dashboards = {
+            coin_name: dashboard
+            for coin_name, dashboard in snapshot["dashboards"].items()
+            if coin_name in self.coin_names
+        }
+        # Coins added since the snapshot need their responses right away.
+        self._clear_updated(
+            [
+                coin_name
+                for coin_name in self.coin_names
+                if coin_name not in self._dashboards
+            ],
+            ACTION_DASHBOARD,
+        )
+        self._balances = {
+            coin_name: balance
+            for coin_name, balance in snapshot["balances"].items()
+            if coin_name in self.coin_names
+        }
+        self._listed_balances = set(self._balances)
+        self.workers = {
+            coin_name: workers
+            for coin_name, workers in snapshot.get("workers", {}).items()
+            if coin_name in self.coin_names
+        }
+        self._clear_updated(
+            [
+                coin_name
+                for coin_name in self.coin_names
+                if coin_name not in self.workers
+            ],
+            ACTION_USER_WORKERS,
+        )
+        self._pool_statuses = {
+            coin_name: pool_status
+            for coin_name, pool_status in snapshot.get("pool_statuses", {}).items()
+            if coin_name in self.coin_names
+        }
+        self._clear_updated(
+            [
+                coin_name
+                for coin_name in self.coin_names
+                if coin_name not in self._pool_statuses
+            ],
+            ACTION_POOL_STATUS,
+        )
+        for coin_name, samples in snapshot.get("history", {}).items():
+            if coin_name in self.history:
+                self.history[coin_name].restore(samples)
+        for coin_name, state in snapshot.get("earnings", {}).items():
+            if coin_name in self.earnings:
+                self.earnings[coin_name].restore(state)
+        self.data = self._build_data()
+        return True
+
+    def diagnostics(self) -> Dict[str, Any]:
+        """Return the refresh schedule and statistics of this account
+
+        Returns
+        -------
+        Dict[str, Any]
+            Update and parse durations, errors and the client's request metrics
+        """
+        return {
+            "coins": self.coin_names,
+            "intervals": {
+                name: interval.total_seconds()
+                for name, interval in self.intervals.items()
+            },
+            "group_updated": self._group_updated_as_dict(),
+            "consecutive_failures": self.circuit_breaker.failures,
+            "last_update_duration": self.last_update_duration,
+            "update_duration": self.update_duration.as_dict(),
+            "parse_duration": self.parse_duration.as_dict(),
+            "update_errors": dict(self.update_errors),
+            "skipped_state_writes": self.skipped_state_writes,
+            "requests": self.miningpoolhub_api.metrics.as_dict(),
+        }
+
+    async def _async_update_data(self) -> Dict[str, Dict[str, Any]]:
+        started = monotonic()
+        self._parse_seconds = 0.0
+        try:
+            data = await self._async_update_groups()
+        except Exception as err:
+            self.update_errors[type(err).__name__] += 1
+            raise
+        finally:
+            self.last_update_duration = monotonic() - started
+            self.update_duration.record(self.last_update_duration)
+            self.parse_duration.record(self._parse_seconds)
+        if self._skip_unconsumed:
+            self.only_consumed = True
+            self._skip_unconsumed = False
+        return data
+
+    async def _async_update_groups(self) -> Dict[str, Dict[str, Any]]:
+        if self.circuit_breaker.is_open:
+            # Probe with a single request before resuming full polling.
+            if not await self._async_update_balances():
+                self._back_off()
+                raise UpdateFailed("MiningPoolHub is still unavailable")
+            self._resume()
+
+        group_updated = {
+            name: dict(coin_updated)
+            for name, coin_updated in self._group_updated.items()
+        }
+        # Due coins to request from each endpoint, skipping what nobody reads.
+        endpoint_coins: Dict[str, Set[str]] = {}
+        for name in self.intervals:
+            due = self.due_coins(name)
+            coin_names = [
+                coin_name for coin_name in self.consumed_coins(name) if coin_name in due
+            ]
+            if coin_names:
+                endpoint_coins.setdefault(FIELD_GROUPS[name].endpoint, set()).update(
+                    coin_names
+                )
+
+        if ACTION_DASHBOARD in endpoint_coins:
+            try:
+                await self._async_update_dashboards(
+                    [
+                        coin_name
+                        for coin_name in self.coin_names
+                        if coin_name in endpoint_coins[ACTION_DASHBOARD]
+                    ]
+                )
+            except UpdateFailed:
+                self._back_off()
+                raise
+        if ACTION_USER_ALL_BALANCES in endpoint_coins and not (
+            await self._async_update_balances()
+        ):
+            self._back_off()
+        else:
+            self._resume()
+        if ACTION_USER_WORKERS in endpoint_coins:
+            await self._async_update_workers(
+                [
+                    coin_name
+                    for coin_name in self.coin_names
+                    if coin_name in endpoint_coins[ACTION_USER_WORKERS]
+                ]
+            )
+        if ACTION_POOL_STATUS in endpoint_coins:
+            await self._async_update_pool_statuses(
+                [
+                    coin_name
+                    for coin_name in self.coin_names
+                    if coin_name in endpoint_coins[ACTION_POOL_STATUS]
+                ]
+            )
+
+        if self._price_cache is not None and self.fiat_currency:
+            self._prices = self._price_cache.cached_prices(
+                self.coin_names, self.fiat_currency
+            )
+            self._async_schedule_price_update()
+
+        self._last_updated = dt_util.utcnow()
+        if self._store is not None:
+            self._store.async_delay_save(self._snapshot, STORAGE_SAVE_DELAY)
+        started = monotonic()
+        refreshed: Dict[str, Set[str]] = {}
+        for name, coin_updated in self._group_updated.items():
+            for coin_name, updated in coin_updated.items():
+                if group_updated[name].get(coin_name) != updated:
+                    refreshed.setdefault(coin_name, set()).add(name)
+        data = self._build_data(refreshed)
+        self._parse_seconds += monotonic() - started
+        if self.data:
+            self._async_fire_events(self.data, data)
+        self._listed_balances = set(self._balances)
+        return data
+
+
+class CoordinatorRegistry:
+    """Coordinators of every account, one per API key.
+
+    A config entry and a YAML platform configured with the same API key share
+    one coordinator, and with it the client, caches and refresh schedule. Each
+    configuration registers the coins it follows and the coordinator follows
+    all of them. Each configuration also registers its settings, those of a
+    configuration take precedence over the ones registered before it. When a
+    configuration releases the coordinator, it goes back to the settings of
+    the remaining ones, including their snapshot store.
+    """
+
+    def __init__(self, hass: core.HomeAssistant):
+        self.hass = hass
+        self._coordinators: Dict[str, MiningPoolHubDataUpdateCoordinator] = {}
+        # Coins of every configuration using an API key, by owner.
+        self._owners: Dict[str, Dict[str, List[str]]] = {}
+        # Coordinator settings of every configuration using an API key, by owner.
+        self._settings: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def _coin_names(self, api_key: str) -> List[str]:
+        coin_names: List[str] = []
+        for owner_coins in self._owners[api_key].values():
+            coin_names.extend(
+                coin_name for coin_name in owner_coins if coin_name not in coin_names
+            )
+        return coin_names
+
+    def _merged_settings(self, api_key: str) -> Dict[str, Any]:
+        settings: Dict[str, Any] = {}
+        for owner_settings in self._settings[api_key].values():
+            settings.update(owner_settings)
+        return settings
+
+    async def async_acquire(
+        self, api_key: str, owner: str, coin_names: Iterable[str], **kwargs: Any
+    ) -> MiningPoolHubDataUpdateCoordinator:
+        """Return the coordinator of an API key, creating it on first use
+
+        Parameters
+        ----------
+        api_key : str
+            MiningPoolHub API key
+        owner : str
+            Configuration using the coordinator, e.g. a config entry id
+        coin_names : Iterable[str]
+            Coins the configuration follows
+        **kwargs
+            Settings of the configuration, see
+            ``MiningPoolHubDataUpdateCoordinator.async_configure``
+
+        Returns
+        -------
+        MiningPoolHubDataUpdateCoordinator
+            Coordinator following the coins of every configuration of api_key
+        """
+        self._owners.setdefault(api_key, {})[owner] = list(coin_names)
+        self._settings.setdefault(api_key, {})[owner] = kwargs
+        if api_key not in self._coordinators:
+            self._coordinators[api_key] = MiningPoolHubDataUpdateCoordinator(
+                self.hass,
+                async_get_client(self.hass, api_key),
+                self._coin_names(api_key),
+                price_cache=async_get_price_cache(self.hass),
+                **kwargs,
+            )
+            return self._coordinators[api_key]
+
+        coordinator = self._coordinators[api_key]
+        await coordinator.async_configure(**self._merged_settings(api_key))
+        await coordinator.async_set_coins(self._coin_names(api_key))
+        return coordinator
+
+    async def async_set_coins(
+        self, api_key: str, owner: str, coin_names: Iterable[str]
+    ) -> None:
+        """Change the coins a configuration follows."""
+        self._owners[api_key][owner] = list(coin_names)
+        await self._coordinators[api_key].async_set_coins(self._coin_names(api_key))
+
+    async def async_set_settings(self, api_key: str, owner: str, **kwargs: Any) -> None:
+        """Change the coordinator settings of a configuration."""
+        self._settings[api_key][owner].update(kwargs)
+        await self._coordinators[api_key].async_configure(
+            **self._merged_settings(api_key)
+        )
+
+    async def async_release(self, api_key: str, owner: str) -> None:
+        """Stop following the coins and settings of a configuration
+
+        The coordinator is dropped along with the last configuration using it.
+        """
+        owners = self._owners.get(api_key, {})
+        owners.pop(owner, None)
+        self._settings.get(api_key, {}).pop(owner, None)
+        if api_key not in self._coordinators:
+            return
+        coordinator = self._coordinators[api_key]
+        if owners:
+            await coordinator.async_configure(**self._merged_settings(api_key))
+            await coordinator.async_set_coins(self._coin_names(api_key))
+            return
+        # Write the snapshot now, a pending delayed write would recreate it
+        # after a removed entry deleted it.
+        await coordinator.async_configure(store=None)
+        self._owners.pop(api_key, None)
+        self._settings.pop(api_key, None)
+        self._coordinators.pop(api_key, None)
+
+
+@callback
+def async_get_coordinator_registry(hass: core.HomeAssistant) -> CoordinatorRegistry:
+    """Return the registry of coordinators shared by every configuration."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_COORDINATOR_REGISTRY not in domain_data:
+        domain_data[DATA_COORDINATOR_REGISTRY] = CoordinatorRegistry(hass)
+    return domain_data[DATA_COORDINATOR_REGISTRY]
@@ -0,0 +1,44 @@
+"""Diagnostics support for MiningPoolHub."""
+from typing import Any, Dict
+
+from homeassistant import config_entries, core
+from homeassistant.const import CONF_API_KEY
+
+from .client import async_get_client_manager
+from .const import DATA_COORDINATOR, DOMAIN
+
+REDACTED = "**REDACTED**"
+TO_REDACT = {CONF_API_KEY}
+
+
+def _redact(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: REDACTED if key in TO_REDACT else value for key, value in data.items()}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry
+
+    Parameters
+    ----------
+    hass : core.HomeAssistant
+        hass instance
+    entry : config_entries.ConfigEntry
+        Config entry of the account
+
+    Returns
+    -------
+    Dict[str, Any]
+        Entry configuration without the API key, the account's refresh and
+        request statistics and the rate limiter shared by every account
+    """
+    coordinator = hass.data[DOMAIN][entry.entry_id][DATA_COORDINATOR]
+    return {
+        "entry": {
+            "data": _redact(dict(entry.data)),
+            "options": _redact(dict(entry.options)),
+        },
+        "coordinator": coordinator.diagnostics(),
+        "rate_limiter": async_get_client_manager(hass).metrics,
+    }
@@ -0,0 +1,144 @@
+"""Projection of a coin's earnings updated with every refresh."""
+from datetime import datetime, timedelta
+import math
+from typing import Any, Dict, List, Mapping, Optional
+
+from .const import (
+    ATTR_BALANCE_CONFIRMED,
+    ATTR_BALANCE_UNCONFIRMED,
+    ATTR_COINS_PER_MINUTE,
+    ATTR_ESTIMATED_PAYOUT,
+    ATTR_ESTIMATED_TIME_TO_BLOCK,
+    ATTR_PROJECTED_DAILY_EARNINGS,
+    ATTR_PROJECTED_WEEKLY_EARNINGS,
+    ATTR_RECENT_CREDITS_24_HOURS,
+    ATTR_TIME_TO_PAYOUT,
+    HISTORY_LONG_WINDOW,
+    HISTORY_SHORT_WINDOW,
+)
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+class MovingAverage:
+    """Exponentially weighted average of irregularly spaced samples.
+
+    A sample's weight decays with its age, by a factor of e every
+    ``time_constant``. Adding a sample costs the same however many came
+    before it.
+    """
+
+    __slots__ = ("time_constant", "value", "updated")
+
+    def __init__(self, time_constant: timedelta):
+        self.time_constant = time_constant.total_seconds()
+        self.value: Optional[float] = None
+        self.updated: Optional[float] = None
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Fold in a sample taken at timestamp, older samples are ignored."""
+        if self.value is None or self.updated is None:
+            self.value = value
+        elif timestamp <= self.updated:
+            return
+        else:
+            weight = 1 - math.exp((self.updated - timestamp) / self.time_constant)
+            self.value += weight * (value - self.value)
+        self.updated = timestamp
+
+    def as_list(self) -> List[Optional[float]]:
+        """Return the average and its time in a JSON serializable form."""
+        return [self.updated, self.value]
+
+    def restore(self, state: List[Optional[float]]) -> None:
+        """Restore an average persisted with as_list."""
+        self.updated, self.value = state
+
+
+class EarningsEstimator:
+    """Projects one coin's earnings rate, daily and weekly earnings and payout.
+
+    The credits of the last day are what the account earned at its hashrate
+    of that day. The projected rate scales them by the recent hashrate over
+    the day's, both kept as moving averages whose time constant is half
+    their window, the mean sample age of a plain average over the window.
+
+    Without credits, e.g. for a new miner, the rate is the dashboard's
+    estimated payout of the current round spread over the pool's estimated
+    time to find a block.
+    """
+
+    def __init__(self):
+        self.recent_hashrate = MovingAverage(HISTORY_SHORT_WINDOW / 2)
+        self.daily_hashrate = MovingAverage(HISTORY_LONG_WINDOW / 2)
+
+    def record(self, when: datetime, hashrate: float) -> None:
+        """Add a hashrate sample taken at when."""
+        timestamp = when.timestamp()
+        self.recent_hashrate.add(timestamp, hashrate)
+        self.daily_hashrate.add(timestamp, hashrate)
+
+    def coins_per_minute(self, coin_data: Mapping[str, Any]) -> Optional[float]:
+        """Return the projected coins earned per minute, None if unknown."""
+        credits = coin_data.get(ATTR_RECENT_CREDITS_24_HOURS)
+        if credits:
+            rate = credits / MINUTES_PER_DAY
+            recent = self.recent_hashrate.value
+            daily = self.daily_hashrate.value
+            if recent is not None and daily:
+                rate *= recent / daily
+            return rate
+        payout = coin_data.get(ATTR_ESTIMATED_PAYOUT)
+        seconds = coin_data.get(ATTR_ESTIMATED_TIME_TO_BLOCK)
+        if payout is not None and seconds:
+            return payout / (seconds / 60)
+        return credits
+
+    def attributes(
+        self, coin_data: Mapping[str, Any], payout_threshold: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Project the earnings of a coin's latest data
+
+        Parameters
+        ----------
+        coin_data : Mapping[str, Any]
+            Parsed attributes of the coin
+        payout_threshold : Optional[float]
+            Balance at which MiningPoolHub pays the coin out
+
+        Returns
+        -------
+        Dict[str, Any]
+            Coins per minute, projected daily and weekly earnings and, with a
+            threshold, the hours until the unpaid balance reaches it
+        """
+        rate = self.coins_per_minute(coin_data)
+        if rate is None:
+            return {}
+        attributes: Dict[str, Any] = {
+            ATTR_COINS_PER_MINUTE: rate,
+            ATTR_PROJECTED_DAILY_EARNINGS: rate * MINUTES_PER_DAY,
+            ATTR_PROJECTED_WEEKLY_EARNINGS: rate * MINUTES_PER_WEEK,
+        }
+        if payout_threshold is not None and ATTR_BALANCE_CONFIRMED in coin_data:
+            missing = payout_threshold - (
+                coin_data[ATTR_BALANCE_CONFIRMED] + coin_data[ATTR_BALANCE_UNCONFIRMED]
+            )
+            if missing <= 0:
+                attributes[ATTR_TIME_TO_PAYOUT] = 0.0
+            elif rate > 0:
+                attributes[ATTR_TIME_TO_PAYOUT] = round(missing / rate / 60, 2)
+        return attributes
+
+    def as_dict(self) -> Dict[str, List[Optional[float]]]:
+        """Return the moving averages in a JSON serializable form."""
+        return {
+            "recent_hashrate": self.recent_hashrate.as_list(),
+            "daily_hashrate": self.daily_hashrate.as_list(),
+        }
+
+    def restore(self, state: Mapping[str, List[Optional[float]]]) -> None:
+        """Restore moving averages persisted with as_dict."""
+        self.recent_hashrate.restore(state["recent_hashrate"])
+        self.daily_hashrate.restore(state["daily_hashrate"])
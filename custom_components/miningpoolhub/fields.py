@@ -0,0 +1,78 @@
+"""Declarative extraction of sensor attributes from API responses."""
+from functools import reduce
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Tuple
+
+# Default of fields that have to be present in a response
+REQUIRED = object()
+
+
+class SchemaError(ValueError):
+    """A response does not have the shape its field specs describe."""
+
+
+class FieldSpec(NamedTuple):
+    """Where to find an attribute in a response and how to convert it.
+
+    A field with a ``default`` may be missing, null or empty, every other
+    field has to be present and convertible. An empty ``path`` is the whole
+    response, e.g. a bare number.
+    """
+
+    attribute: str
+    path: Tuple[str, ...]
+    convert: Callable[[Any], Any]
+    default: Any = REQUIRED
+
+
+def _getter(path: Tuple[str, ...]) -> Callable[[Any], Any]:
+    if not path:
+        return lambda data: data
+    if len(path) == 1:
+        return itemgetter(path[0])
+    getters = [itemgetter(key) for key in path]
+    return lambda data: reduce(lambda value, get: get(value), getters, data)
+
+
+def compile_fields(
+    specs: Iterable[FieldSpec],
+) -> Callable[[Any], Dict[str, Any]]:
+    """Builds a function extracting the fields of a response
+
+    Parameters
+    ----------
+    specs : Iterable[FieldSpec]
+        Fields to extract, the rest of the response is ignored
+
+    Returns
+    -------
+    Callable[[Any], Dict[str, Any]]
+        Returns the converted fields keyed by attribute name and raises
+        ``SchemaError`` naming the path of a missing or malformed field
+    """
+    fields = [
+        (spec.attribute, ".".join(spec.path) or "response", _getter(spec.path), spec)
+        for spec in specs
+    ]
+
+    def extract(data: Any) -> Dict[str, Any]:
+        attributes = {}
+        for attribute, name, get, spec in fields:
+            try:
+                raw = get(data)
+            except (KeyError, IndexError, TypeError):
+                if spec.default is REQUIRED:
+                    raise SchemaError(f"{name} is missing") from None
+                raw = None
+            if spec.default is not REQUIRED and (raw is None or raw == ""):
+                attributes[attribute] = spec.default
+                continue
+            try:
+                attributes[attribute] = spec.convert(raw)
+            except (TypeError, ValueError):
+                raise SchemaError(
+                    f"{name} is not a valid {spec.convert.__name__}: {raw!r}"
+                ) from None
+        return attributes
+
+    return extract
@@ -0,0 +1,24 @@
+"""Identifiers shared by the integration setup, config flow and platforms."""
+from typing import Optional
+
+
+def scoped_id(scope: Optional[str], object_id: str) -> str:
+    """Return the unique ID of an entity or device of an account
+
+    Config entries scope their IDs with the entry id so that accounts mining
+    the same coin each get their own devices and entities. The YAML platform
+    has no entry and keeps the unscoped IDs it always used.
+
+    Parameters
+    ----------
+    scope : Optional[str]
+        Entry id of the account, None for the YAML platform
+    object_id : str
+        ID within the account, e.g. the coin name
+
+    Returns
+    -------
+    str
+        ID unique across accounts
+    """
+    return object_id if scope is None else f"{scope}_{object_id}"
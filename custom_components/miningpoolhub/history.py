@@ -0,0 +1,173 @@
+"""Rolling history of coin samples kept in memory."""
+from array import array
+from datetime import datetime, timedelta
+import math
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+from .const import (
+    ATTR_AVERAGE_HASHRATE_1H,
+    ATTR_AVERAGE_HASHRATE_24h,
+    ATTR_BALANCE_CONFIRMED,
+    ATTR_BALANCE_UNCONFIRMED,
+    ATTR_CURRENT_HASHRATE,
+    ATTR_INVALID_SHARES,
+    ATTR_INVALID_SHARES_1H,
+    ATTR_MAX_BALANCE_24H,
+    ATTR_MAX_HASHRATE_24H,
+    ATTR_MIN_BALANCE_24H,
+    ATTR_MIN_HASHRATE_24H,
+    ATTR_VALID_SHARES,
+    ATTR_VALID_SHARES_1H,
+    GROUP_BALANCES,
+    GROUP_HASHRATE,
+    HISTORY_LONG_WINDOW,
+    HISTORY_SHORT_WINDOW,
+    METRIC_BALANCE,
+)
+
+# Sampled metrics and the field group whose refresh produces a new sample
+METRIC_GROUPS = {
+    ATTR_CURRENT_HASHRATE: GROUP_HASHRATE,
+    ATTR_VALID_SHARES: GROUP_HASHRATE,
+    ATTR_INVALID_SHARES: GROUP_HASHRATE,
+    METRIC_BALANCE: GROUP_BALANCES,
+}
+
+
+class RingBuffer:
+    """Fixed number of timestamped samples, the oldest is overwritten first.
+
+    Timestamps and values are stored in two preallocated double arrays so a
+    day of samples costs 16 bytes each regardless of how many are kept.
+    """
+
+    __slots__ = ("capacity", "_times", "_values", "_start", "_size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a sample, dropping the oldest one when the buffer is full."""
+        index = (self._start + self._size) % self.capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+        if self._size == self.capacity:
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._size += 1
+
+    def samples(self, since: float = -math.inf) -> Iterator[Tuple[float, float]]:
+        """Yield (timestamp, value) pairs no older than since, oldest first."""
+        for offset in range(self._size):
+            index = (self._start + offset) % self.capacity
+            if self._times[index] >= since:
+                yield self._times[index], self._values[index]
+
+    def values(self, since: float = -math.inf) -> List[float]:
+        """Return the values no older than since, oldest first."""
+        return [value for _, value in self.samples(since)]
+
+    def increase(self, since: float = -math.inf) -> Optional[float]:
+        """Return how much a counter grew since, counting from zero after resets."""
+        values = self.values(since)
+        if len(values) < 2:
+            return None
+        increase = 0.0
+        for previous, value in zip(values, values[1:]):
+            increase += value - previous if value >= previous else value
+        return increase
+
+
+class CoinHistory:
+    """Ring buffers of one coin's samples with rolling aggregates.
+
+    Each buffer holds a day of samples at the refresh interval of the field
+    group producing them.
+    """
+
+    def __init__(self, intervals: Mapping[str, timedelta]):
+        self.buffers: Dict[str, RingBuffer] = {
+            metric: RingBuffer(
+                math.ceil(
+                    HISTORY_LONG_WINDOW / max(intervals[group], timedelta(minutes=1))
+                )
+                + 1
+            )
+            for metric, group in METRIC_GROUPS.items()
+        }
+
+    def record(
+        self, when: datetime, coin_data: Mapping[str, Any], groups: Set[str]
+    ) -> None:
+        """Sample the metrics of the field groups refreshed at when."""
+        timestamp = when.timestamp()
+        for metric, group in METRIC_GROUPS.items():
+            if group not in groups:
+                continue
+            if metric == METRIC_BALANCE:
+                if ATTR_BALANCE_CONFIRMED not in coin_data:
+                    continue
+                value = (
+                    coin_data[ATTR_BALANCE_CONFIRMED]
+                    + coin_data[ATTR_BALANCE_UNCONFIRMED]
+                )
+            elif metric in coin_data:
+                value = coin_data[metric]
+            else:
+                continue
+            self.buffers[metric].append(timestamp, float(value))
+
+    def attributes(self, now: datetime) -> Dict[str, Any]:
+        """Return the rolling aggregates of the samples as sensor attributes."""
+        short = (now - HISTORY_SHORT_WINDOW).timestamp()
+        long = (now - HISTORY_LONG_WINDOW).timestamp()
+        attributes: Dict[str, Any] = {}
+
+        hashrate_short = self.buffers[ATTR_CURRENT_HASHRATE].values(short)
+        if hashrate_short:
+            attributes[ATTR_AVERAGE_HASHRATE_1H] = sum(hashrate_short) / len(
+                hashrate_short
+            )
+        hashrate_long = self.buffers[ATTR_CURRENT_HASHRATE].values(long)
+        if hashrate_long:
+            attributes[ATTR_AVERAGE_HASHRATE_24h] = sum(hashrate_long) / len(
+                hashrate_long
+            )
+            attributes[ATTR_MIN_HASHRATE_24H] = min(hashrate_long)
+            attributes[ATTR_MAX_HASHRATE_24H] = max(hashrate_long)
+
+        for metric, attribute in (
+            (ATTR_VALID_SHARES, ATTR_VALID_SHARES_1H),
+            (ATTR_INVALID_SHARES, ATTR_INVALID_SHARES_1H),
+        ):
+            increase = self.buffers[metric].increase(short)
+            if increase is not None:
+                attributes[attribute] = int(increase)
+
+        balance_long = self.buffers[METRIC_BALANCE].values(long)
+        if balance_long:
+            attributes[ATTR_MIN_BALANCE_24H] = min(balance_long)
+            attributes[ATTR_MAX_BALANCE_24H] = max(balance_long)
+        return attributes
+
+    def as_dict(self) -> Dict[str, List[List[float]]]:
+        """Return the samples in a JSON serializable form."""
+        return {
+            metric: [list(sample) for sample in buffer.samples()]
+            for metric, buffer in self.buffers.items()
+        }
+
+    def restore(self, samples: Mapping[str, List[List[float]]]) -> None:
+        """Append samples persisted with as_dict."""
+        for metric, metric_samples in samples.items():
+            if metric not in self.buffers:
+                continue
+            for timestamp, value in metric_samples:
+                self.buffers[metric].append(timestamp, value)
@@ -0,0 +1,106 @@
+"""Request and refresh statistics of the integration."""
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+# Upper bounds in seconds of the histogram buckets, a last bucket counts the rest
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPDATE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PARSE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+
+class Histogram:
+    """Counts durations into fixed buckets and tracks their average and maximum."""
+
+    def __init__(self, buckets: Tuple[float, ...] = REQUEST_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add a duration in seconds."""
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def average(self) -> Optional[float]:
+        """Return the average duration, None before the first one."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the histogram, buckets are keyed by their upper bound."""
+        buckets = {
+            f"le_{bound:g}": count for bound, count in zip(self.buckets, self.counts)
+        }
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "average": self.average,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class RequestMetrics:
+    """Latency, errors and cache hits of one account's requests.
+
+    Latency only covers requests that reached MiningPoolHub, the time spent
+    waiting for the rate limiter is not part of it.
+    """
+
+    def __init__(self):
+        self.latency: Dict[str, Histogram] = {}
+        self.errors: Counter = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def requests(self) -> int:
+        """Return the number of responses and errors."""
+        return sum(histogram.count for histogram in self.latency.values())
+
+    @property
+    def cache_hit_rate(self) -> Optional[float]:
+        """Return the percentage of calls answered by the request cache."""
+        calls = self.cache_hits + self.cache_misses
+        return round(100 * self.cache_hits / calls, 1) if calls else None
+
+    @property
+    def average_latency(self) -> Optional[float]:
+        """Return the average latency in seconds over every endpoint."""
+        requests = self.requests
+        if not requests:
+            return None
+        return sum(histogram.total for histogram in self.latency.values()) / requests
+
+    def _histogram(self, endpoint: str) -> Histogram:
+        if endpoint not in self.latency:
+            self.latency[endpoint] = Histogram(REQUEST_BUCKETS)
+        return self.latency[endpoint]
+
+    def record_response(self, endpoint: str, seconds: float) -> None:
+        """Record a successful request taking seconds."""
+        self._histogram(endpoint).record(seconds)
+
+    def record_error(self, endpoint: str, seconds: float, err: BaseException) -> None:
+        """Record a failed request, errors are counted by exception type."""
+        self._histogram(endpoint).record(seconds)
+        self.errors[type(err).__name__] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the statistics for diagnostics."""
+        return {
+            "requests": self.requests,
+            "latency": {
+                endpoint: histogram.as_dict()
+                for endpoint, histogram in self.latency.items()
+            },
+            "errors": dict(self.errors),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": self.cache_hit_rate,
+        }
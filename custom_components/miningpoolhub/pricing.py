@@ -0,0 +1,127 @@
+"""Coin prices from CoinGecko."""
+import asyncio
+from datetime import timedelta
+import logging
+from time import monotonic
+from typing import Dict, Iterable, List, Tuple
+
+from aiohttp import ClientError, ClientSession
+import async_timeout
+from homeassistant import core
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    COINGECKO_API_ENDPOINT,
+    COINGECKO_IDS,
+    DATA_PRICE_CACHE,
+    DOMAIN,
+    PRICE_CACHE_TTL,
+    PRICE_REQUEST_TIMEOUT,
+)
+from .fields import FieldSpec, SchemaError, compile_fields
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def coingecko_id(coin_name: str) -> str:
+    """Return the CoinGecko id of a MiningPoolHub coin name."""
+    return COINGECKO_IDS.get(coin_name, coin_name)
+
+
+class PriceCache:
+    """Fetches coin prices in batches and keeps them for ``ttl``.
+
+    All coins whose price is missing or expired are requested with a single
+    simple/price call, bounded by ``PRICE_REQUEST_TIMEOUT``. When that call
+    fails the last known prices are used.
+    """
+
+    def __init__(self, session: ClientSession, ttl: timedelta = PRICE_CACHE_TTL):
+        self._session = session
+        self.ttl = ttl.total_seconds()
+        self._prices: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._lock = asyncio.Lock()
+
+    async def async_get_prices(
+        self, coin_names: Iterable[str], fiat_currency: str
+    ) -> Dict[str, float]:
+        """Return the price of each coin in fiat_currency
+
+        Parameters
+        ----------
+        coin_names : Iterable[str]
+            MiningPoolHub coin names
+        fiat_currency : str
+            Currency code, e.g. USD
+
+        Returns
+        -------
+        Dict[str, float]
+            Price keyed by coin name, coins without a known price are missing
+        """
+        fiat_currency = fiat_currency.lower()
+        ids = {coin_name: coingecko_id(coin_name) for coin_name in coin_names}
+
+        # Accounts refreshing at the same time wait for each other's batch.
+        async with self._lock:
+            now = monotonic()
+            stale = sorted(
+                {
+                    coin_id
+                    for coin_id in ids.values()
+                    if (coin_id, fiat_currency) not in self._prices
+                    or now - self._prices[(coin_id, fiat_currency)][0] >= self.ttl
+                }
+            )
+            if stale:
+                await self._async_fetch(stale, fiat_currency)
+
+        return self.cached_prices(coin_names, fiat_currency)
+
+    def cached_prices(
+        self, coin_names: Iterable[str], fiat_currency: str
+    ) -> Dict[str, float]:
+        """Return the last known price of each coin without requesting any."""
+        fiat_currency = fiat_currency.lower()
+        prices = {}
+        for coin_name in coin_names:
+            cached = self._prices.get((coingecko_id(coin_name), fiat_currency))
+            if cached is not None:
+                prices[coin_name] = cached[1]
+        return prices
+
+    async def _async_fetch(self, coin_ids: List[str], fiat_currency: str) -> None:
+        try:
+            async with async_timeout.timeout(PRICE_REQUEST_TIMEOUT.total_seconds()):
+                response = await self._session.get(
+                    COINGECKO_API_ENDPOINT,
+                    params={"ids": ",".join(coin_ids), "vs_currencies": fiat_currency},
+                )
+                response.raise_for_status()
+                prices = await response.json()
+        except (asyncio.TimeoutError, ClientError, ValueError) as err:
+            _LOGGER.warning("Error retrieving prices from CoinGecko: %s", repr(err))
+            return
+        if not isinstance(prices, dict):
+            _LOGGER.warning("Unexpected prices from CoinGecko: %r", prices)
+            return
+
+        now = monotonic()
+        extract_price = compile_fields((FieldSpec("price", (fiat_currency,), float),))
+        for coin_id, price in prices.items():
+            try:
+                value = extract_price(price)["price"]
+            except SchemaError:
+                # Unknown to CoinGecko in this currency, or not a number.
+                continue
+            self._prices[(coin_id, fiat_currency)] = (now, value)
+
+
+@callback
+def async_get_price_cache(hass: core.HomeAssistant) -> PriceCache:
+    """Return the price cache shared by every account."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PRICE_CACHE not in domain_data:
+        domain_data[DATA_PRICE_CACHE] = PriceCache(async_get_clientsession(hass))
+    return domain_data[DATA_PRICE_CACHE]
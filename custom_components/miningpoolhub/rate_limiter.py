@@ -0,0 +1,147 @@
+"""Rate limiting of MiningPoolHub requests shared by every account."""
+import asyncio
+from collections import OrderedDict, deque
+from time import monotonic
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+from homeassistant.core import callback
+
+from .const import MAX_CONNECTIONS, RATE_LIMIT_BURST, RATE_LIMIT_PER_SECOND
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = monotonic()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def time_until_token(self) -> float:
+        """Return how many seconds until a token is available."""
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def take(self) -> None:
+        """Consume a token, time_until_token must have returned 0."""
+        self._tokens -= 1
+
+
+class RateLimiter:
+    """Schedules requests of all accounts through one token bucket.
+
+    Waiting requests are queued per account and granted round-robin, so an
+    account refreshing many coins cannot starve the others. At most
+    ``max_connections`` requests run at the same time.
+    """
+
+    def __init__(
+        self,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: float = RATE_LIMIT_BURST,
+        max_connections: int = MAX_CONNECTIONS,
+    ):
+        self._bucket = TokenBucket(rate, burst)
+        self._connections = asyncio.Semaphore(max_connections)
+        self._queues: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+        self._dispatcher: Optional["asyncio.Future[None]"] = None
+        self.requests = 0
+        self.max_queue_depth = 0
+        self._total_wait = 0.0
+        self._total_latency = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of requests waiting for their turn."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue depth and latency statistics."""
+        return {
+            "requests": self.requests,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "average_wait": self._total_wait / self.requests if self.requests else 0.0,
+            "average_latency": (
+                self._total_latency / self.requests if self.requests else 0.0
+            ),
+        }
+
+    async def async_request(
+        self, account: Hashable, request: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Wait for account's turn and perform request
+
+        Parameters
+        ----------
+        account : Hashable
+            Identifies the account requests are scheduled fairly between
+        request : Callable[[], Awaitable[Any]]
+            Performs the request
+
+        Returns
+        -------
+        Any
+            Result of the request
+        """
+        queued = monotonic()
+        grant = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(account, deque()).append(grant)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._async_dispatch())
+
+        try:
+            await grant
+        except asyncio.CancelledError:
+            if grant.done() and not grant.cancelled():
+                # Granted right before the cancellation, hand the slot back.
+                self._connections.release()
+            raise
+
+        started = monotonic()
+        self.requests += 1
+        self._total_wait += started - queued
+        try:
+            return await request()
+        finally:
+            self._total_latency += monotonic() - started
+            self._connections.release()
+
+    async def _async_dispatch(self) -> None:
+        while self._queues:
+            delay = self._bucket.time_until_token()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+            await self._connections.acquire()
+            if not self._grant_next():
+                self._connections.release()
+                continue
+            self._bucket.take()
+
+    @callback
+    def _grant_next(self) -> bool:
+        """Grant the oldest request of the next account in turn."""
+        while self._queues:
+            account, queue = next(iter(self._queues.items()))
+            grant = queue.popleft()
+            # Move the account to the back so the others get their turn.
+            self._queues.move_to_end(account)
+            if not queue:
+                del self._queues[account]
+            if not grant.done():
+                grant.set_result(None)
+                return True
+        return False
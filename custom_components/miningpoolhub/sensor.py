@@ -1,51 +1,373 @@
 """MiningPoolHub sensor platform."""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
 import logging
-from datetime import timedelta
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import miningpoolhub_py.exceptions
 import voluptuous as vol
-from aiohttp import ClientError
-from aiohttp import ClientResponseError
 from homeassistant import config_entries, core
-from homeassistant.components.sensor import PLATFORM_SCHEMA
-from homeassistant.const import ATTR_NAME, CONF_API_KEY
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.components.sensor import (
+    PLATFORM_SCHEMA,
+    STATE_CLASS_MEASUREMENT,
+    STATE_CLASS_TOTAL,
+    STATE_CLASS_TOTAL_INCREASING,
+    SensorEntity,
+    SensorEntityDescription,
+)
+from homeassistant.const import (
+    ATTR_UNIT_OF_MEASUREMENT,
+    CONF_API_KEY,
+    PERCENTAGE,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    TIME_HOURS,
+    TIME_MILLISECONDS,
+    TIME_SECONDS,
+)
+from homeassistant.core import State, callback
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_registry import async_get as async_get_registry
+from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import (
     ConfigType,
     DiscoveryInfoType,
     HomeAssistantType,
 )
-from miningpoolhub_py import MiningPoolHubAPI
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
+    ATTR_ACTIVE_WORKERS,
+    ATTR_AVERAGE_HASHRATE_24h,
     ATTR_BALANCE_AUTO_EXCHANGE_CONFIRMED,
     ATTR_BALANCE_AUTO_EXCHANGE_UNCONFIRMED,
     ATTR_BALANCE_CONFIRMED,
     ATTR_BALANCE_ON_EXCHANGE,
     ATTR_BALANCE_UNCONFIRMED,
-    ATTR_CURRENT_HASHRATE,
+    ATTR_COINS_PER_MINUTE,
     ATTR_CURRENCY,
+    ATTR_CURRENT_HASHRATE,
+    ATTR_ESTIMATED_TIME_TO_BLOCK,
     ATTR_INVALID_SHARES,
-    ATTR_VALID_SHARES,
+    ATTR_LAST_BLOCK,
+    ATTR_NETWORK_DIFFICULTY,
+    ATTR_ONLINE,
+    ATTR_POOL_HASHRATE,
+    ATTR_PROJECTED_DAILY_EARNINGS,
+    ATTR_PROJECTED_WEEKLY_EARNINGS,
     ATTR_RECENT_CREDITS_24_HOURS,
+    ATTR_SINGLE_COIN_LOCAL_CURRENCY,
+    ATTR_TIME_SINCE_LAST_BLOCK,
+    ATTR_TIME_TO_PAYOUT,
+    ATTR_TOTAL_UNPAID_FIAT,
+    ATTR_VALID_SHARES,
     CONF_CURRENCY_NAMES,
     CONF_FIAT_CURRENCY,
+    CONF_STATE_ATTRIBUTES,
+    DATA_COORDINATOR,
+    DEFAULT_STATE_ATTRIBUTES,
     SENSOR_PREFIX,
     DOMAIN,
+    GROUP_BALANCES,
+    GROUP_CREDITS,
+    GROUP_HASHRATE,
+    GROUP_POOL_INFO,
+    GROUP_POOL_STATUS,
+    GROUP_WORKERS,
+    METRIC_BALANCE,
+    SIGNAL_COINS_ADDED,
+)
+from .coordinator import (
+    MiningPoolHubDataUpdateCoordinator,
+    async_get_coordinator_registry,
+    intervals_from_config,
 )
+from .helpers import scoped_id
 
 _LOGGER = logging.getLogger(__name__)
-# Time between updating data from MiningPoolHub
-SCAN_INTERVAL = timedelta(minutes=2)
+
+UNIT_COIN = "coin"
+UNIT_FIAT = "fiat"
+
+# Field groups the earnings projection is derived from
+EARNINGS_GROUPS = (GROUP_CREDITS, GROUP_HASHRATE, GROUP_POOL_STATUS)
+
+
+@dataclass
+class MiningPoolHubSensorEntityDescription(SensorEntityDescription):
+    """Describes a single metric of a coin.
+
+    ``groups`` are the field groups the value is derived from, only those are
+    fetched for the coin while the sensor is enabled. ``unit_source`` takes
+    the unit from the coin's currency (``UNIT_COIN``), which also needs the
+    pool info, or the configured fiat currency (``UNIT_FIAT``). Without a
+    ``value_fn`` the value is the coin data field named by ``key``.
+    """
+
+    groups: Tuple[str, ...] = ()
+    unit_source: Optional[str] = None
+    value_fn: Optional[Callable[[Dict[str, Any]], Any]] = None
+
+
+def _balance(coin_data: Dict[str, Any]) -> Optional[float]:
+    if ATTR_BALANCE_CONFIRMED not in coin_data:
+        return None
+    return coin_data[ATTR_BALANCE_CONFIRMED] + coin_data[ATTR_BALANCE_UNCONFIRMED]
+
+
+METRIC_SENSORS: Tuple[MiningPoolHubSensorEntityDescription, ...] = (
+    MiningPoolHubSensorEntityDescription(
+        key=METRIC_BALANCE,
+        groups=(GROUP_BALANCES,),
+        name="Balance",
+        icon="mdi:wallet",
+        state_class=STATE_CLASS_TOTAL,
+        unit_source=UNIT_COIN,
+        value_fn=_balance,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_BALANCE_CONFIRMED,
+        groups=(GROUP_BALANCES,),
+        name="Confirmed Balance",
+        icon="mdi:wallet",
+        unit_source=UNIT_COIN,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_BALANCE_UNCONFIRMED,
+        groups=(GROUP_BALANCES,),
+        name="Unconfirmed Balance",
+        icon="mdi:wallet-outline",
+        unit_source=UNIT_COIN,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_BALANCE_AUTO_EXCHANGE_CONFIRMED,
+        groups=(GROUP_BALANCES,),
+        name="Auto Exchange Confirmed Balance",
+        icon="mdi:swap-horizontal",
+        unit_source=UNIT_COIN,
+        entity_registry_enabled_default=False,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_BALANCE_AUTO_EXCHANGE_UNCONFIRMED,
+        groups=(GROUP_BALANCES,),
+        name="Auto Exchange Unconfirmed Balance",
+        icon="mdi:swap-horizontal",
+        unit_source=UNIT_COIN,
+        entity_registry_enabled_default=False,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_BALANCE_ON_EXCHANGE,
+        groups=(GROUP_BALANCES,),
+        name="Balance On Exchange",
+        icon="mdi:swap-horizontal",
+        unit_source=UNIT_COIN,
+        entity_registry_enabled_default=False,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_VALID_SHARES,
+        groups=(GROUP_HASHRATE,),
+        name="Valid Shares",
+        icon="mdi:check-circle-outline",
+        native_unit_of_measurement="shares",
+        state_class=STATE_CLASS_MEASUREMENT,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_INVALID_SHARES,
+        groups=(GROUP_HASHRATE,),
+        name="Invalid Shares",
+        icon="mdi:close-circle-outline",
+        native_unit_of_measurement="shares",
+        state_class=STATE_CLASS_MEASUREMENT,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_AVERAGE_HASHRATE_24h,
+        groups=(GROUP_HASHRATE,),
+        name="Average Hashrate 24h",
+        icon="mdi:speedometer",
+        entity_registry_enabled_default=False,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_ACTIVE_WORKERS,
+        groups=(GROUP_WORKERS,),
+        name="Active Workers",
+        icon="mdi:pickaxe",
+        native_unit_of_measurement="workers",
+        state_class=STATE_CLASS_MEASUREMENT,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_RECENT_CREDITS_24_HOURS,
+        groups=(GROUP_CREDITS,),
+        name="Credits 24h",
+        icon="mdi:cash-plus",
+        unit_source=UNIT_COIN,
+        state_class=STATE_CLASS_MEASUREMENT,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_COINS_PER_MINUTE,
+        groups=EARNINGS_GROUPS,
+        name="Coins Per Minute",
+        icon="mdi:timer-outline",
+        unit_source=UNIT_COIN,
+        entity_registry_enabled_default=False,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_PROJECTED_DAILY_EARNINGS,
+        groups=EARNINGS_GROUPS,
+        name="Projected Daily Earnings",
+        icon="mdi:chart-line",
+        unit_source=UNIT_COIN,
+        state_class=STATE_CLASS_MEASUREMENT,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_PROJECTED_WEEKLY_EARNINGS,
+        groups=EARNINGS_GROUPS,
+        name="Projected Weekly Earnings",
+        icon="mdi:chart-line",
+        unit_source=UNIT_COIN,
+        entity_registry_enabled_default=False,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_TIME_TO_PAYOUT,
+        groups=(*EARNINGS_GROUPS, GROUP_BALANCES),
+        name="Time To Payout",
+        icon="mdi:cash-clock",
+        native_unit_of_measurement=TIME_HOURS,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_SINGLE_COIN_LOCAL_CURRENCY,
+        groups=(GROUP_BALANCES,),
+        name="Price",
+        icon="mdi:currency-usd",
+        unit_source=UNIT_FIAT,
+        state_class=STATE_CLASS_MEASUREMENT,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_TOTAL_UNPAID_FIAT,
+        groups=(GROUP_BALANCES,),
+        name="Unpaid Value",
+        icon="mdi:cash",
+        unit_source=UNIT_FIAT,
+        state_class=STATE_CLASS_TOTAL,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_POOL_HASHRATE,
+        groups=(GROUP_POOL_STATUS,),
+        name="Pool Hashrate",
+        icon="mdi:server-network",
+        state_class=STATE_CLASS_MEASUREMENT,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_NETWORK_DIFFICULTY,
+        groups=(GROUP_POOL_STATUS,),
+        name="Network Difficulty",
+        icon="mdi:chart-bell-curve",
+        state_class=STATE_CLASS_MEASUREMENT,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_LAST_BLOCK,
+        groups=(GROUP_POOL_STATUS,),
+        name="Last Block",
+        icon="mdi:cube-outline",
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_TIME_SINCE_LAST_BLOCK,
+        groups=(GROUP_POOL_STATUS,),
+        name="Time Since Last Block",
+        icon="mdi:timer-sand",
+        native_unit_of_measurement=TIME_SECONDS,
+        entity_registry_enabled_default=False,
+    ),
+    MiningPoolHubSensorEntityDescription(
+        key=ATTR_ESTIMATED_TIME_TO_BLOCK,
+        groups=(GROUP_POOL_STATUS,),
+        name="Estimated Time To Block",
+        icon="mdi:timer-outline",
+        native_unit_of_measurement=TIME_SECONDS,
+    ),
+)
+
+
+@dataclass
+class MiningPoolHubDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a statistic of an account's refreshes and requests."""
+
+    value_fn: Optional[Callable[[MiningPoolHubDataUpdateCoordinator], Any]] = None
+
+
+def _restored_value(state: Optional[State]) -> Any:
+    """Return the value of a state saved by the last run, None if it had none."""
+    if state is None or state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+        return None
+    try:
+        return float(state.state)
+    except ValueError:
+        return state.state
+
+
+def _milliseconds(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+DIAGNOSTIC_SENSORS: Tuple[MiningPoolHubDiagnosticSensorEntityDescription, ...] = (
+    MiningPoolHubDiagnosticSensorEntityDescription(
+        key="skipped_state_writes",
+        name="Skipped State Writes",
+        icon="mdi:database-off",
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.skipped_state_writes,
+    ),
+    MiningPoolHubDiagnosticSensorEntityDescription(
+        key="update_duration",
+        name="Update Duration",
+        icon="mdi:timer-sand",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=STATE_CLASS_MEASUREMENT,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: _milliseconds(coordinator.last_update_duration),
+    ),
+    MiningPoolHubDiagnosticSensorEntityDescription(
+        key="request_latency",
+        name="Request Latency",
+        icon="mdi:timer-outline",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=STATE_CLASS_MEASUREMENT,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: _milliseconds(
+            coordinator.miningpoolhub_api.metrics.average_latency
+        ),
+    ),
+    MiningPoolHubDiagnosticSensorEntityDescription(
+        key="request_errors",
+        name="Request Errors",
+        icon="mdi:alert-circle-outline",
+        native_unit_of_measurement="errors",
+        state_class=STATE_CLASS_TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: sum(
+            coordinator.miningpoolhub_api.metrics.errors.values()
+        ),
+    ),
+    MiningPoolHubDiagnosticSensorEntityDescription(
+        key="cache_hit_rate",
+        name="Cache Hit Rate",
+        icon="mdi:cached",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=STATE_CLASS_MEASUREMENT,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: (
+            coordinator.miningpoolhub_api.metrics.cache_hit_rate
+        ),
+    ),
+)
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
         vol.Required(CONF_API_KEY): cv.string,
         vol.Required(CONF_CURRENCY_NAMES): vol.All(cv.ensure_list, [cv.string]),
         vol.Required(CONF_FIAT_CURRENCY): cv.string,
+        vol.Optional(
+            CONF_STATE_ATTRIBUTES, default=DEFAULT_STATE_ATTRIBUTES
+        ): cv.boolean,
     }
 )
 
@@ -57,16 +379,50 @@ async def async_setup_entry(
 ):
     """Setup sensors from a config entry created in the integrations UI."""
     config = hass.data[DOMAIN][config_entry.entry_id]
-    # Update our config to include new coins and remove those that have been removed.
-    if config_entry.options:
-        config.update(config_entry.options)
-    session = async_get_clientsession(hass)
-    miningpoolhub_api = MiningPoolHubAPI(session, api_key=config[CONF_API_KEY])
-    sensors = [
-        MiningPoolHubSensor(miningpoolhub_api, coin, config[CONF_FIAT_CURRENCY])
-        for coin in config[CONF_CURRENCY_NAMES]
-    ]
-    async_add_entities(sensors, update_before_add=True)
+    coordinator = config[DATA_COORDINATOR]
+    detailed_attributes = config.get(CONF_STATE_ATTRIBUTES, DEFAULT_STATE_ATTRIBUTES)
+    sensors = _coin_sensors(
+        coordinator,
+        config[CONF_CURRENCY_NAMES],
+        config[CONF_FIAT_CURRENCY],
+        detailed_attributes,
+        config_entry.entry_id,
+    )
+    sensors.extend(
+        MiningPoolHubDiagnosticSensor(coordinator, config_entry.entry_id, description)
+        for description in DIAGNOSTIC_SENSORS
+    )
+    async_add_entities(sensors)
+    # Once they registered, only fetch what the enabled sensors read.
+    coordinator.async_skip_unconsumed()
+    config_entry.async_on_unload(
+        async_track_workers(
+            hass,
+            coordinator,
+            async_add_entities,
+            config_entry.entry_id,
+            lambda: config[CONF_CURRENCY_NAMES],
+        )
+    )
+
+    @callback
+    def async_add_coins(coin_names: List[str]) -> None:
+        """Add the sensors of coins added through the options flow."""
+        async_add_entities(
+            _coin_sensors(
+                coordinator,
+                coin_names,
+                config[CONF_FIAT_CURRENCY],
+                detailed_attributes,
+                config_entry.entry_id,
+            )
+        )
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_COINS_ADDED.format(config_entry.entry_id), async_add_coins
+        )
+    )
 
 
 # noinspection PyUnusedLocal
@@ -76,38 +432,235 @@ async def async_setup_platform(
     async_add_entities: Callable,
     discovery_info: Optional[DiscoveryInfoType] = None,
 ) -> None:
-    """Set up the sensor platform."""
-    session = async_get_clientsession(hass)
-    miningpoolhub_api = MiningPoolHubAPI(session, api_key=config[CONF_API_KEY])
-    fiat_currency = config[CONF_FIAT_CURRENCY]
-    sensors = [
-        MiningPoolHubSensor(miningpoolhub_api, coin, fiat_currency)
-        for coin in config[CONF_CURRENCY_NAMES]
-    ]
-    async_add_entities(sensors, update_before_add=True)
+    """Set up the sensor platform.
+
+    A config entry with the same API key shares the coordinator, so the
+    account's data is only requested once. Its sensors have entry scoped
+    unique IDs and do not clash with the ones set up here.
+
+    Setup does not wait on MiningPoolHub, the sensors start from their
+    restored state and pick up the first refresh whenever it completes.
+    """
+    coordinator = await async_get_coordinator_registry(hass).async_acquire(
+        config[CONF_API_KEY],
+        f"yaml_{id(config)}",
+        config[CONF_CURRENCY_NAMES],
+        intervals=intervals_from_config(config),
+        fiat_currency=config.get(CONF_FIAT_CURRENCY),
+    )
+    if coordinator.data is None:
+        # Not tracked by Home Assistant so a slow MiningPoolHub does not hold
+        # up its startup. A refresh of a config entry that is already in
+        # flight shares its requests through the client's cache.
+        hass.loop.create_task(coordinator.async_refresh())
+    sensors = _coin_sensors(
+        coordinator,
+        config[CONF_CURRENCY_NAMES],
+        config[CONF_FIAT_CURRENCY],
+        config[CONF_STATE_ATTRIBUTES],
+    )
+    async_add_entities(sensors)
+    coordinator.async_skip_unconsumed()
+    async_track_workers(
+        hass,
+        coordinator,
+        async_add_entities,
+        coin_names=lambda: config[CONF_CURRENCY_NAMES],
+    )
+
+
+def _coin_sensors(
+    coordinator: MiningPoolHubDataUpdateCoordinator,
+    coin_names: List[str],
+    fiat_currency: str,
+    detailed_attributes: bool,
+    scope: Optional[str] = None,
+) -> List[CoordinatorEntity]:
+    """Return the hashrate sensor and the metric sensors of every coin."""
+    sensors: List[CoordinatorEntity] = []
+    for coin in coin_names:
+        sensors.append(
+            MiningPoolHubSensor(
+                coordinator, coin, fiat_currency, detailed_attributes, scope
+            )
+        )
+        sensors.extend(
+            MiningPoolHubMetricSensor(
+                coordinator, coin, fiat_currency, description, scope
+            )
+            for description in METRIC_SENSORS
+        )
+    return sensors
+
+
+def _coin_device_info(coin_name: str, scope: Optional[str]) -> Dict[str, Any]:
+    """Return the device every sensor of a coin belongs to."""
+    return {
+        "identifiers": {(DOMAIN, scoped_id(scope, coin_name))},
+        "name": SENSOR_PREFIX + coin_name.title(),
+        "manufacturer": "Mining Pool Hub",
+        "entry_type": "service",
+    }
+
+
+@callback
+def async_track_workers(
+    hass: core.HomeAssistant,
+    coordinator: MiningPoolHubDataUpdateCoordinator,
+    async_add_entities: Callable,
+    scope: Optional[str] = None,
+    coin_names: Optional[Callable[[], List[str]]] = None,
+) -> Callable[[], None]:
+    """Add and remove worker sensors as workers appear and disappear
+
+    Workers come from the coordinator's shared getuserworkers fetch, so the
+    number of worker sensors does not change how many requests are made.
+    Configurations sharing a coordinator each track the workers of their own
+    coins.
+
+    Parameters
+    ----------
+    hass : core.HomeAssistant
+        hass instance
+    coordinator : MiningPoolHubDataUpdateCoordinator
+        Coordinator of the account the workers belong to
+    async_add_entities : Callable
+        Adds entities to the sensor platform
+    scope : Optional[str]
+        Entry id scoping the unique IDs of the sensors, see ``scoped_id``
+    coin_names : Optional[Callable[[], List[str]]]
+        Returns the coins whose workers are tracked, all of the coordinator's
+        coins if omitted
+
+    Returns
+    -------
+    Callable[[], None]
+        Stops tracking workers
+    """
+    sensors: Dict[Tuple[str, str], MiningPoolHubWorkerSensor] = {}
+
+    @callback
+    def async_update_workers() -> None:
+        tracked = coordinator.coin_names if coin_names is None else coin_names()
+        workers = {
+            (coin_name, worker_name)
+            for coin_name, coin_workers in coordinator.workers.items()
+            if coin_name in tracked
+            for worker_name in coin_workers
+        }
+
+        new_sensors = [
+            MiningPoolHubWorkerSensor(coordinator, coin_name, worker_name, scope)
+            for coin_name, worker_name in workers - sensors.keys()
+        ]
+        for sensor in new_sensors:
+            sensors[(sensor.coin_name, sensor.worker_name)] = sensor
+        if new_sensors:
+            async_add_entities(new_sensors)
+
+        registry = async_get_registry(hass)
+        for key in sensors.keys() - workers:
+            sensor = sensors.pop(key)
+            if sensor.registry_entry is not None:
+                # Also removes the entity from the state machine.
+                registry.async_remove(sensor.entity_id)
+            elif sensor.hass is not None:
+                hass.async_create_task(sensor.async_remove())
+
+    async_update_workers()
+    return coordinator.async_add_listener(async_update_workers)
+
+
+class MiningPoolHubEntity(CoordinatorEntity, ABC):
+    """Coordinator entity that only writes its state when it changed.
+
+    ``_write_key`` returns what the state is derived from. A coordinator update
+    leaving it unchanged is counted in the coordinator's
+    ``skipped_state_writes`` instead of being written.
+    """
 
+    _written: Any
 
-class MiningPoolHubSensor(Entity):
-    """Representation of a Mining Pool Hub Coin sensor."""
+    @abstractmethod
+    def _write_key(self) -> Any:
+        """Return what the last written state was derived from."""
+
+    def _update_from_coordinator(self) -> None:
+        """Copy the entity's latest data from the coordinator."""
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        write_key = self._write_key()
+        if write_key == self._written:
+            # Nothing changed since the last write, don't spam the recorder.
+            self.coordinator.skipped_state_writes += 1
+            return
+        self._written = write_key
+        self._update_from_coordinator()
+        self.async_write_ha_state()
+
+
+class MiningPoolHubSensor(MiningPoolHubEntity, SensorEntity, RestoreEntity):
+    """Representation of a Mining Pool Hub Coin sensor.
+
+    The state is the current hashrate, compiled into long-term statistics as a
+    measurement. Without ``detailed_attributes`` the other fields are left out of
+    the state so the recorder only stores the hashrate. With them, the other
+    fields are mirrored as they are refreshed for the coin's enabled metric
+    sensors, the sensor itself only has the hashrate and pool info fetched.
+
+    Until the coordinator's first refresh completes the sensor shows the
+    hashrate it had when Home Assistant last stopped.
+    """
+
+    _attr_state_class = STATE_CLASS_MEASUREMENT
 
     def __init__(
-        self, miningpoolhub_api: MiningPoolHubAPI, coin_name: str, fiat_currency: str
+        self,
+        coordinator: MiningPoolHubDataUpdateCoordinator,
+        coin_name: str,
+        fiat_currency: str,
+        detailed_attributes: bool = DEFAULT_STATE_ATTRIBUTES,
+        scope: Optional[str] = None,
     ):
-        super().__init__()
-        self.miningpoolhub_api = miningpoolhub_api
+        super().__init__(coordinator)
         self.coin_name = coin_name
         self.fiat_currency = fiat_currency
+        self.detailed_attributes = detailed_attributes
+        self.scope = scope
         self.attrs: Dict[str, Any] = {}
         self._icon = "mdi:ethereum" if coin_name == "ethereum" else None
         self._name = SENSOR_PREFIX + self.coin_name.title()
         self._state = None
+        self._restored = False
         self._unit_of_measurement = "\u200b"
-        self._available = True
+        self._update_from_coordinator()
+        self._written = self._write_key()
+
+    async def async_added_to_hass(self) -> None:
+        """Register the field groups this sensor reads with the coordinator."""
+        await super().async_added_to_hass()
+        groups = (GROUP_HASHRATE, GROUP_POOL_INFO)
+        self.async_on_remove(
+            self.coordinator.async_add_consumer(self.coin_name, groups)
+        )
+        if self.coordinator.data is None:
+            value = _restored_value(await self.async_get_last_state())
+            if value is not None:
+                self._state = value
+                self._restored = True
+                self._written = self._write_key()
 
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        return self._available
+        if self.coordinator.data is None:
+            return self._restored and self.coordinator.last_update_success
+        return (
+            self.coordinator.last_update_success
+            and ATTR_CURRENT_HASHRATE in self.coordinator.data.get(self.coin_name, {})
+        )
 
     @property
     def icon(self):
@@ -119,66 +672,245 @@ class MiningPoolHubSensor(Entity):
         return self._name
 
     @property
-    def state(self) -> Optional[str]:
+    def native_value(self) -> Optional[str]:
         return self._state
 
     @property
     def unique_id(self) -> str:
         """Return the unique ID of the sensor."""
-        return self.coin_name
+        return scoped_id(self.scope, self.coin_name)
+
+    @property
+    def device_info(self) -> Dict[str, Any]:
+        return _coin_device_info(self.coin_name, self.scope)
 
     @property
-    def unit_of_measurement(self):
+    def native_unit_of_measurement(self):
         return self._unit_of_measurement
 
     @property
-    def device_state_attributes(self) -> Dict[str, Any]:
-        return self.attrs
+    def device_state_attributes(self) -> Optional[Dict[str, Any]]:
+        return self.attrs if self.detailed_attributes else None
 
-    async def async_update(self):
-        try:
-            dashboard_data = await self.miningpoolhub_api.async_get_dashboard(
-                self.coin_name
-            )
-            self.attrs[ATTR_NAME] = dashboard_data["pool"]["info"]["name"]
-            self.attrs[ATTR_CURRENCY] = dashboard_data["pool"]["info"]["currency"]
-            self.attrs[ATTR_CURRENT_HASHRATE] = float(
-                dashboard_data["personal"]["hashrate"]
-            )
+    def _write_key(self) -> Tuple[bool, Optional[int]]:
+        """Return what the last written state was derived from."""
+        if not self.detailed_attributes:
+            coin_data = (self.coordinator.data or {}).get(self.coin_name, {})
+            return self.available, coin_data.get(ATTR_CURRENT_HASHRATE)
+        return self.available, self.coordinator.digests.get(self.coin_name)
 
-            self.attrs[ATTR_VALID_SHARES] = int(
-                dashboard_data["personal"]["shares"]["valid"]
-            )
+    def _update_from_coordinator(self) -> None:
+        """Copy this coin's latest data from the coordinator."""
+        coin_data = (self.coordinator.data or {}).get(self.coin_name)
+        if coin_data is None or ATTR_CURRENT_HASHRATE not in coin_data:
+            return
+        self.attrs.update(coin_data)
+        self._state = self.attrs[ATTR_CURRENT_HASHRATE]
 
-            self.attrs[ATTR_INVALID_SHARES] = int(
-                dashboard_data["personal"]["shares"]["invalid"]
-            )
 
-            self.attrs[ATTR_BALANCE_CONFIRMED] = float(
-                dashboard_data["balance"]["confirmed"]
-            )
-            self.attrs[ATTR_BALANCE_UNCONFIRMED] = float(
-                dashboard_data["balance"]["unconfirmed"]
-            )
-            self.attrs[ATTR_BALANCE_AUTO_EXCHANGE_CONFIRMED] = float(
-                dashboard_data["balance_for_auto_exchange"]["confirmed"]
-            )
-            self.attrs[ATTR_BALANCE_AUTO_EXCHANGE_UNCONFIRMED] = float(
-                dashboard_data["balance_for_auto_exchange"]["unconfirmed"]
-            )
+class MiningPoolHubMetricSensor(MiningPoolHubEntity, SensorEntity, RestoreEntity):
+    """A single metric of a coin, grouped with the coin's other sensors.
 
-            self.attrs[ATTR_BALANCE_ON_EXCHANGE] = float(
-                dashboard_data["balance_on_exchange"]
-            )
+    Every metric sensor reads the coordinator's shared parsed data and only
+    keeps the value it last wrote, a coordinator update that leaves the value
+    unchanged does not write a new state.
 
-            self.attrs[ATTR_RECENT_CREDITS_24_HOURS] = float(
-                dashboard_data["recent_credits_24hours"]["amount"]
-            )
+    Until the coordinator's first refresh completes the sensor shows the value
+    and unit it had when Home Assistant last stopped.
+    """
+
+    entity_description: MiningPoolHubSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: MiningPoolHubDataUpdateCoordinator,
+        coin_name: str,
+        fiat_currency: str,
+        description: MiningPoolHubSensorEntityDescription,
+        scope: Optional[str] = None,
+    ):
+        super().__init__(coordinator)
+        self.entity_description = description
+        self.coin_name = coin_name
+        self.fiat_currency = fiat_currency
+        self._attr_name = f"{SENSOR_PREFIX}{coin_name.title()} {description.name}"
+        self._attr_unique_id = scoped_id(scope, f"{coin_name}_{description.key}")
+        self._attr_device_info = _coin_device_info(coin_name, scope)
+        self._restored = False
+        self._written = self._write_key()
+
+    async def async_added_to_hass(self) -> None:
+        """Register the field groups this sensor reads with the coordinator."""
+        await super().async_added_to_hass()
+        groups = self.entity_description.groups
+        if self.entity_description.unit_source == UNIT_COIN:
+            groups += (GROUP_POOL_INFO,)
+        self.async_on_remove(
+            self.coordinator.async_add_consumer(self.coin_name, groups)
+        )
+        if self.coordinator.data is None:
+            last_state = await self.async_get_last_state()
+            value = _restored_value(last_state)
+            if value is not None:
+                self._restored = True
+                self._written = (
+                    self.available,
+                    value,
+                    last_state.attributes.get(ATTR_UNIT_OF_MEASUREMENT),
+                )
 
-            self._state = self.attrs[ATTR_CURRENT_HASHRATE]
-            self._available = True
-        except (ClientError, miningpoolhub_py.exceptions.APIError, ClientResponseError):
-            self._available = False
-            _LOGGER.exception(
-                "Error retrieving data from MiningPoolHub for sensor %s.", self.name
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        if self.coordinator.data is None:
+            return self._restored and self.coordinator.last_update_success
+        coin_data = self.coordinator.data.get(self.coin_name)
+        return (
+            self.coordinator.last_update_success
+            and coin_data is not None
+            # Coins known only from their balance lack the dashboard's currency.
+            and (
+                self.entity_description.unit_source != UNIT_COIN
+                or ATTR_CURRENCY in coin_data
             )
+        )
+
+    @property
+    def native_value(self) -> Any:
+        return self._written[1]
+
+    @property
+    def native_unit_of_measurement(self) -> Optional[str]:
+        return self._written[2]
+
+    def _write_key(self) -> Tuple[bool, Any, Optional[str]]:
+        """Return this metric's availability, value and unit."""
+        coin_data = (self.coordinator.data or {}).get(self.coin_name, {})
+        description = self.entity_description
+        if description.value_fn is not None:
+            value = description.value_fn(coin_data)
+        else:
+            value = coin_data.get(description.key)
+        if description.unit_source == UNIT_COIN:
+            unit = coin_data.get(ATTR_CURRENCY)
+        elif description.unit_source == UNIT_FIAT:
+            unit = self.fiat_currency
+        else:
+            unit = description.native_unit_of_measurement
+        return self.available, value, unit
+
+
+class MiningPoolHubDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Statistic of an account's refreshes and requests, disabled by default.
+
+    It stays available while MiningPoolHub is failing, that is when its
+    latency and error counts matter most.
+    """
+
+    entity_description: MiningPoolHubDiagnosticSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: MiningPoolHubDataUpdateCoordinator,
+        entry_id: str,
+        description: MiningPoolHubDiagnosticSensorEntityDescription,
+    ):
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_name = SENSOR_PREFIX + description.name
+        self._attr_unique_id = scoped_id(entry_id, description.key)
+        self._state = description.value_fn(coordinator)
+
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        return True
+
+    @property
+    def native_value(self) -> Any:
+        return self._state
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        state = self.entity_description.value_fn(self.coordinator)
+        if state == self._state:
+            return
+        self._state = state
+        self.async_write_ha_state()
+
+
+class MiningPoolHubWorkerSensor(MiningPoolHubEntity, SensorEntity):
+    """Hashrate of a single worker of a coin's pool."""
+
+    _attr_state_class = STATE_CLASS_MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: MiningPoolHubDataUpdateCoordinator,
+        coin_name: str,
+        worker_name: str,
+        scope: Optional[str] = None,
+    ):
+        super().__init__(coordinator)
+        self.coin_name = coin_name
+        self.worker_name = worker_name
+        self.scope = scope
+        self.attrs: Dict[str, Any] = {}
+        self._name = f"{SENSOR_PREFIX}{coin_name.title()} {worker_name}"
+        self._state = None
+        self._update_from_coordinator()
+        self._written = self._write_key()
+
+    async def async_added_to_hass(self) -> None:
+        """Register the field groups this sensor reads with the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_consumer(self.coin_name, (GROUP_WORKERS,))
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        return self.coordinator.last_update_success and self.worker_name in (
+            self.coordinator.workers.get(self.coin_name, {})
+        )
+
+    @property
+    def icon(self):
+        return "mdi:pickaxe" if self.attrs.get(ATTR_ONLINE) else "mdi:sleep"
+
+    @property
+    def name(self) -> str:
+        """Return the name of the entity."""
+        return self._name
+
+    @property
+    def native_value(self) -> Optional[float]:
+        return self._state
+
+    @property
+    def unique_id(self) -> str:
+        """Return the unique ID of the sensor."""
+        return scoped_id(self.scope, f"{self.coin_name}_{self.worker_name}")
+
+    @property
+    def device_info(self) -> Dict[str, Any]:
+        return _coin_device_info(self.coin_name, self.scope)
+
+    @property
+    def device_state_attributes(self) -> Dict[str, Any]:
+        return self.attrs
+
+    def _write_key(self) -> Tuple[bool, Optional[int]]:
+        """Return what the last written state was derived from."""
+        worker = self.coordinator.workers.get(self.coin_name, {}).get(self.worker_name)
+        return self.available, None if worker is None else hash(tuple(worker.items()))
+
+    def _update_from_coordinator(self) -> None:
+        """Copy this worker's latest data from the coordinator."""
+        worker = self.coordinator.workers.get(self.coin_name, {}).get(self.worker_name)
+        if worker is None:
+            return
+        self.attrs.update(worker)
+        self._state = self.attrs[ATTR_CURRENT_HASHRATE]
@@ -0,0 +1,117 @@
+"""Sources of hashrate readings fed to a coordinator between its refreshes."""
+from abc import ABC, abstractmethod
+import asyncio
+from datetime import datetime, timedelta
+import logging
+from typing import Callable, Iterable, Optional
+
+from homeassistant import core
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .client import MiningPoolHubClient
+from .const import ATTR_CURRENT_HASHRATE
+from .coordinator import UPDATE_ERRORS, MiningPoolHubDataUpdateCoordinator
+from .fields import FieldSpec, SchemaError, compile_fields
+
+_LOGGER = logging.getLogger(__name__)
+
+# getuserhashrate answers with the bare hashrate.
+_extract_hashrate = compile_fields((FieldSpec(ATTR_CURRENT_HASHRATE, (), float),))
+
+
+class HashrateTransport(ABC):
+    """Delivers hashrate readings of some coins to a coordinator as they arrive.
+
+    The coordinator keeps refreshing everything on its own schedule, a
+    transport only brings the current hashrate of its coins in sooner. A
+    push source calls ``coordinator.async_set_hashrate`` whenever a reading
+    arrives, a poller asks for it on a short interval.
+    """
+
+    def __init__(
+        self,
+        hass: core.HomeAssistant,
+        coordinator: MiningPoolHubDataUpdateCoordinator,
+        coin_names: Iterable[str],
+    ):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.coin_names = list(coin_names)
+
+    @callback
+    @abstractmethod
+    def async_start(self) -> None:
+        """Start delivering readings."""
+
+    @callback
+    @abstractmethod
+    def async_stop(self) -> None:
+        """Stop delivering readings."""
+
+
+class PollingTransport(HashrateTransport):
+    """Fast lane polling only the hashrate of its coins on a short interval.
+
+    One getuserhashrate request per coin and interval goes through the
+    client's rate limiter like every other request. Polls are skipped while
+    a previous one is still running or the coordinator is backing off.
+    """
+
+    def __init__(
+        self,
+        hass: core.HomeAssistant,
+        coordinator: MiningPoolHubDataUpdateCoordinator,
+        coin_names: Iterable[str],
+        client: MiningPoolHubClient,
+        interval: timedelta,
+    ):
+        super().__init__(hass, coordinator, coin_names)
+        self.client = client
+        self.interval = interval
+        self._polling = False
+        self._unsub: Optional[Callable[[], None]] = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start polling, a transport without coins does nothing."""
+        if self.coin_names and self._unsub is None:
+            self._unsub = async_track_time_interval(
+                self.hass, self._async_poll, self.interval
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop polling."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    async def _async_poll(self, now: Optional[datetime] = None) -> None:
+        if self._polling or self.coordinator.circuit_breaker.is_open:
+            return
+        self._polling = True
+        try:
+            results = await asyncio.gather(
+                *[
+                    self.client.async_get_user_hashrate(coin_name)
+                    for coin_name in self.coin_names
+                ],
+                return_exceptions=True,
+            )
+        finally:
+            self._polling = False
+
+        for coin_name, result in zip(self.coin_names, results):
+            if isinstance(result, UPDATE_ERRORS):
+                # The coordinator's next refresh reports lasting failures.
+                _LOGGER.debug("Error polling hashrate of %s: %s", coin_name, result)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            try:
+                hashrate = _extract_hashrate(result)[ATTR_CURRENT_HASHRATE]
+            except SchemaError as err:
+                _LOGGER.warning("Unexpected hashrate of %s: %s", coin_name, err)
+                continue
+            self.coordinator.async_set_hashrate(coin_name, hashrate)
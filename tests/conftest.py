@@ -1,5 +1,7 @@
 from pytest import fixture
 
+from custom_components.miningpoolhub.const import COINGECKO_API_ENDPOINT
+
 
 @fixture(scope="module")
 def vcr_config():
@@ -9,3 +11,10 @@ def vcr_config():
 @fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations):
     yield
+
+
+@fixture(autouse=True)
+def mock_coingecko(aioclient_mock):
+    """Keep tests from requesting prices from CoinGecko."""
+    aioclient_mock.get(COINGECKO_API_ENDPOINT, json={})
+    yield aioclient_mock
@@ -0,0 +1,180 @@
+"""Local stand-in for the MiningPoolHub and CoinGecko APIs."""
+import asyncio
+from collections import Counter
+import json
+import random
+from typing import Iterable, Optional
+
+from aiohttp import web
+from miningpoolhub_py.urls import Urls
+
+COINGECKO_PATH = "/coingecko/api/v3/simple/price"
+
+
+class FakeMiningPoolHub:
+    """aiohttp application answering MiningPoolHub and CoinGecko requests.
+
+    Every response is delayed by ``latency`` seconds, fails with an HTTP 500
+    with probability ``error_rate`` and carries ``payload_padding`` extra
+    bytes to mimic the unused fields of real responses. Every coin has
+    ``workers_per_coin`` workers, the first of them offline.
+    """
+
+    def __init__(
+        self,
+        coins: Iterable[str],
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        payload_padding: int = 0,
+        workers_per_coin: int = 2,
+        seed: Optional[int] = 0,
+    ):
+        self.coins = list(coins)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.padding = "x" * payload_padding
+        self.workers_per_coin = workers_per_coin
+        self.requests: Counter = Counter()
+        self._random = random.Random(seed)
+        self.app = web.Application()
+        self.app.router.add_get("/index.php", self._handle_account)
+        self.app.router.add_get("/{coin}/index.php", self._handle_coin)
+        self.app.router.add_get(COINGECKO_PATH, self._handle_prices)
+
+    @property
+    def request_count(self) -> int:
+        """Total number of requests served."""
+        return sum(self.requests.values())
+
+    def urls(self, base_url: str) -> Urls:
+        """Return MiningPoolHub urls pointing at this server."""
+        urls = Urls()
+        for name, value in vars(urls).items():
+            if isinstance(value, str) and value.startswith("https://"):
+                value = value.replace(
+                    "https://{coin_pool}.miningpoolhub.com/",
+                    f"{base_url}/{{coin_pool}}/",
+                )
+                value = value.replace("https://miningpoolhub.com/", f"{base_url}/")
+                setattr(urls, name, value)
+        return urls
+
+    async def _respond(self, action: str, data) -> web.Response:
+        self.requests[action] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._random.random() < self.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+        body = {action: {"version": "1.0.0", "runtime": 1.5, "data": data}}
+        if self.padding:
+            body[action]["padding"] = self.padding
+        # MiningPoolHub serves its JSON as text/html.
+        return web.Response(text=json.dumps(body), content_type="text/html")
+
+    async def _handle_account(self, request: web.Request) -> web.Response:
+        action = request.query["action"]
+        balances = [
+            {
+                "coin": coin,
+                "confirmed": 0.5 + index,
+                "unconfirmed": 0.01,
+                "ae_confirmed": 0.0,
+                "ae_unconfirmed": 0.0,
+                "exchange": 0.0,
+            }
+            for index, coin in enumerate(self.coins)
+        ]
+        return await self._respond(action, balances)
+
+    async def _handle_coin(self, request: web.Request) -> web.Response:
+        action = request.query["action"]
+        coin = request.match_info["coin"]
+        if action == "getdashboarddata":
+            return await self._respond(action, self.dashboard(coin))
+        if action == "getuserworkers":
+            return await self._respond(action, self.workers())
+        if action == "getpoolstatus":
+            return await self._respond(action, self.pool_status(coin))
+        return await self._respond(action, {})
+
+    async def _handle_prices(self, request: web.Request) -> web.Response:
+        self.requests["simple/price"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        fiat_currency = request.query["vs_currencies"]
+        prices = {
+            coin_id: {fiat_currency: 100.0 + index}
+            for index, coin_id in enumerate(request.query["ids"].split(","))
+        }
+        return web.json_response(prices)
+
+    def workers(self) -> list:
+        """Return a getuserworkers payload."""
+        return [
+            {
+                "id": index,
+                "username": f"account.rig{index}",
+                "password": "x",
+                "monitor": 0,
+                "hashrate": 0 if index == 0 else 50.0 + self._random.random(),
+                "difficulty": 1024,
+            }
+            for index in range(self.workers_per_coin)
+        ]
+
+    def pool_status(self, coin: str) -> dict:
+        """Return a getpoolstatus payload for coin."""
+        return {
+            "pool_name": f"{coin.title()} Mining Pool Hub",
+            "hashrate": 1e9 + self._random.random(),
+            "efficiency": 99.5,
+            "progress": self._random.random() * 100,
+            "workers": 1000,
+            "currentnetworkblock": 13000000,
+            "nextnetworkblock": 13000001,
+            "lastblock": 12999950,
+            "networkdiff": 1e15,
+            "esttime": 3600.0,
+            "estshares": 1e15,
+            "timesincelast": self._random.randint(0, 3600),
+            "nethashrate": 1e15,
+        }
+
+    def dashboard(self, coin: str) -> dict:
+        """Return a getdashboarddata payload for coin."""
+        return {
+            "personal": {
+                "hashrate": 100.0 + self._random.random(),
+                "sharerate": 0,
+                "sharedifficulty": 0,
+                "shares": {
+                    "valid": self._random.randint(0, 20000),
+                    "invalid": self._random.randint(0, 100),
+                    "invalid_percent": 0,
+                    "unpaid": 0,
+                },
+                "estimates": {
+                    "block": 1.733e-5,
+                    "fee": 0,
+                    "donation": 0,
+                    "payout": 1.733e-5,
+                },
+            },
+            "balance": {"confirmed": 0.05458251, "unconfirmed": 6.64e-5},
+            "balance_for_auto_exchange": {"confirmed": 5.287e-5, "unconfirmed": 0},
+            "balance_on_exchange": 0,
+            "recent_credits_24hours": {"amount": 0.0032644192},
+            "recent_credits": [
+                {"date": f"2021-10-{day:02}", "amount": 0.001} for day in range(1, 15)
+            ],
+            "pool": {
+                "info": {
+                    "name": f"{coin.title()} Mining Pool Hub",
+                    "currency": coin[:3].upper(),
+                },
+                "workers": 1000,
+                "hashrate": 1e9,
+                "shares": {"valid": 1000, "invalid": 1},
+            },
+            "network": {"block": 13000000, "difficulty": 1e15, "hashrate": 1e15},
+        }
@@ -0,0 +1,213 @@
+"""Load benchmark of the miningpoolhub integration against a local fake server.
+
+Sized by environment variables so the defaults stay fast enough for the
+regular test run, e.g. for regression numbers before an upgrade::
+
+    MPH_BENCH_COINS=50 MPH_BENCH_CYCLES=20 MPH_BENCH_LATENCY=0.2 \
+        pytest tests/test_benchmark.py -s
+"""
+import asyncio
+from datetime import timedelta
+import os
+import time
+import tracemalloc
+from typing import List, NamedTuple
+from unittest.mock import patch
+
+from aiohttp import ClientSession
+from homeassistant.const import CONF_API_KEY
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.miningpoolhub.const import (
+    CONF_CURRENCY_NAMES,
+    CONF_FIAT_CURRENCY,
+    DATA_COORDINATOR,
+    DOMAIN,
+)
+
+from .fake_miningpoolhub import COINGECKO_PATH, FakeMiningPoolHub
+
+BENCH_COINS = int(os.environ.get("MPH_BENCH_COINS", "5"))
+BENCH_CYCLES = int(os.environ.get("MPH_BENCH_CYCLES", "5"))
+BENCH_LATENCY = float(os.environ.get("MPH_BENCH_LATENCY", "0.01"))
+BENCH_ERROR_RATE = float(os.environ.get("MPH_BENCH_ERROR_RATE", "0"))
+BENCH_PAYLOAD = int(os.environ.get("MPH_BENCH_PAYLOAD", "0"))
+
+LAG_PROBE_INTERVAL = 0.005
+
+_REAL_UTCNOW = dt_util.utcnow
+
+
+class FakeClock:
+    """Moves utcnow and monotonic forward without waiting."""
+
+    def __init__(self):
+        self.offset = 0.0
+
+    def advance(self, delta: timedelta) -> None:
+        self.offset += delta.total_seconds()
+
+    def utcnow(self):
+        return _REAL_UTCNOW() + timedelta(seconds=self.offset)
+
+    def monotonic(self) -> float:
+        return time.monotonic() + self.offset
+
+
+class BenchmarkResult(NamedTuple):
+    """Measurements of one benchmark run."""
+
+    setup_requests: int
+    setup_time: float
+    requests_per_cycle: List[int]
+    wall_time_per_cycle: List[float]
+    max_loop_lag: float
+    peak_memory: int
+
+    def report(self) -> str:
+        cycles = len(self.requests_per_cycle) or 1
+        return "\n".join(
+            [
+                f"setup: {self.setup_requests} requests in {self.setup_time:.3f}s",
+                "requests/cycle: "
+                f"avg {sum(self.requests_per_cycle) / cycles:.1f} "
+                f"max {max(self.requests_per_cycle, default=0)}",
+                "wall time/cycle: "
+                f"avg {sum(self.wall_time_per_cycle) / cycles:.3f}s "
+                f"max {max(self.wall_time_per_cycle, default=0):.3f}s",
+                f"max event loop lag: {self.max_loop_lag * 1000:.1f}ms",
+                f"peak memory: {self.peak_memory / 1024:.0f}KiB",
+            ]
+        )
+
+
+def bench_coins(count: int) -> List[str]:
+    """Return count coin names, real ones first."""
+    coins = ["ethereum", "bitcoin", "monero", "ravencoin", "zcash", "litecoin"]
+    return (coins + [f"coin{index}" for index in range(count)])[:count]
+
+
+async def _monitor_loop_lag(lags: List[float]) -> None:
+    """Record how late the loop wakes a sleeping task."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - LAG_PROBE_INTERVAL)
+
+
+async def run_benchmark(
+    hass, aiohttp_server, fake, cycles, error_rate=0.0
+) -> BenchmarkResult:
+    """Set up a config entry against fake and run cycles coordinator updates.
+
+    The entry is set up against a healthy server, error_rate only applies to
+    the update cycles.
+    """
+    server = await aiohttp_server(fake.app)
+    base_url = str(server.make_url("")).rstrip("/")
+    session = ClientSession()
+    clock = FakeClock()
+    lags: List[float] = []
+    requests_per_cycle = []
+    wall_time_per_cycle = []
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: fake.coins,
+        },
+    )
+    config_entry.add_to_hass(hass)
+
+    tracemalloc.start()
+    monitor = asyncio.ensure_future(_monitor_loop_lag(lags))
+    try:
+        with patch(
+            "custom_components.miningpoolhub.client.async_get_clientsession",
+            return_value=session,
+        ), patch(
+            "custom_components.miningpoolhub.pricing.async_get_clientsession",
+            return_value=session,
+        ), patch(
+            "custom_components.miningpoolhub.pricing.COINGECKO_API_ENDPOINT",
+            f"{base_url}{COINGECKO_PATH}",
+        ), patch(
+            "miningpoolhub_py.miningpoolhubapi.Urls",
+            lambda: fake.urls(base_url),
+        ), patch(
+            "homeassistant.util.dt.utcnow", clock.utcnow
+        ), patch(
+            "custom_components.miningpoolhub.client.monotonic", clock.monotonic
+        ), patch(
+            "custom_components.miningpoolhub.pricing.monotonic", clock.monotonic
+        ):
+            start = time.perf_counter()
+            assert await hass.config_entries.async_setup(config_entry.entry_id)
+            await hass.async_block_till_done()
+            setup_time = time.perf_counter() - start
+            setup_requests = fake.request_count
+            fake.error_rate = error_rate
+
+            coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+            for _ in range(cycles):
+                clock.advance(coordinator.update_interval)
+                before = fake.request_count
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                await hass.async_block_till_done()
+                wall_time_per_cycle.append(time.perf_counter() - start)
+                requests_per_cycle.append(fake.request_count - before)
+
+            await hass.config_entries.async_unload(config_entry.entry_id)
+            await hass.async_block_till_done()
+    finally:
+        monitor.cancel()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        await session.close()
+
+    return BenchmarkResult(
+        setup_requests,
+        setup_time,
+        requests_per_cycle,
+        wall_time_per_cycle,
+        max(lags, default=0.0),
+        peak_memory,
+    )
+
+
+# The fake MiningPoolHub listens on a local socket, socket_enabled lifts the
+# socket block of pytest-homeassistant-custom-component for these tests.
+async def test_benchmark_update_cycles(hass, socket_enabled, aiohttp_server):
+    """Benchmark setup and update cycles of a single account."""
+    fake = FakeMiningPoolHub(
+        bench_coins(BENCH_COINS),
+        latency=BENCH_LATENCY,
+        payload_padding=BENCH_PAYLOAD,
+    )
+
+    result = await run_benchmark(
+        hass, aiohttp_server, fake, BENCH_CYCLES, BENCH_ERROR_RATE
+    )
+    print(f"\n{result.report()}")
+
+    assert len(result.requests_per_cycle) == BENCH_CYCLES
+    if not BENCH_ERROR_RATE:
+        # One dashboard, worker list and pool status per coin, one
+        # all-balances and one price request.
+        assert result.setup_requests == 3 * BENCH_COINS + 2
+        assert max(result.requests_per_cycle) <= 3 * BENCH_COINS + 2
+
+
+async def test_fake_server_errors(hass, socket_enabled, aiohttp_server):
+    """Test an error storm only costs one probe per cycle once the breaker opens."""
+    fake = FakeMiningPoolHub(bench_coins(2))
+
+    result = await run_benchmark(hass, aiohttp_server, fake, 3, error_rate=1.0)
+
+    # The first failing cycle requests everything that is due, after that the
+    # open circuit breaker only sends a balances probe.
+    assert result.requests_per_cycle[1:] == [1, 1]
@@ -0,0 +1,35 @@
+"""Tests for the circuit_breaker module."""
+from datetime import timedelta
+
+from custom_components.miningpoolhub.circuit_breaker import CircuitBreaker
+
+
+def test_backoff_grows_exponentially_with_jitter():
+    """Test each failure doubles the backoff window up to the maximum."""
+    breaker = CircuitBreaker(timedelta(minutes=2), timedelta(minutes=30))
+    assert breaker.is_open is False
+    assert breaker.delay == timedelta(minutes=2)
+
+    delay = breaker.record_failure()
+    assert breaker.is_open is True
+    assert timedelta(minutes=2) <= delay <= timedelta(minutes=4)
+
+    delay = breaker.record_failure()
+    assert timedelta(minutes=4) <= delay <= timedelta(minutes=8)
+
+    for _ in range(10):
+        delay = breaker.record_failure()
+    assert timedelta(minutes=15) <= delay <= timedelta(minutes=30)
+
+
+def test_success_closes_breaker():
+    """Test a success resets the backoff."""
+    breaker = CircuitBreaker(timedelta(minutes=2))
+    breaker.record_failure()
+    breaker.record_failure()
+
+    breaker.record_success()
+
+    assert breaker.is_open is False
+    assert breaker.failures == 0
+    assert breaker.delay == timedelta(minutes=2)
@@ -0,0 +1,208 @@
+"""Tests for the client module."""
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from miningpoolhub_py.exceptions import APIError
+import pytest
+
+from custom_components.miningpoolhub.client import (
+    MiningPoolHubClient,
+    RequestCache,
+    async_get_client,
+)
+from custom_components.miningpoolhub.const import DATA_CLIENT_MANAGER, DOMAIN
+from custom_components.miningpoolhub.rate_limiter import RateLimiter
+
+from .test_sensors import DASHBOARD, POOL_STATUS
+
+
+async def test_concurrent_requests_are_coalesced():
+    """Test identical concurrent requests share one in-flight request."""
+    release = asyncio.Event()
+
+    async def get_dashboard(coin_name):
+        await release.wait()
+        return DASHBOARD
+
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_dashboard = AsyncMock(side_effect=get_dashboard)
+    client = MiningPoolHubClient(miningpoolhub, "key")
+
+    waiters = [
+        asyncio.ensure_future(client.async_get_dashboard("ethereum")) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert results == [DASHBOARD] * 3
+    assert miningpoolhub.async_get_dashboard.await_count == 1
+
+
+async def test_results_cached_until_ttl():
+    """Test a fresh result is reused and an expired one is refetched."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    client = MiningPoolHubClient(miningpoolhub, "key")
+
+    await client.async_get_dashboard("ethereum")
+    await client.async_get_dashboard("ethereum")
+    assert miningpoolhub.async_get_dashboard.await_count == 1
+
+    await client.async_get_dashboard("monero")
+    assert miningpoolhub.async_get_dashboard.await_count == 2
+
+    expired = MiningPoolHubClient(miningpoolhub, "key", RequestCache(timedelta(0)))
+    await expired.async_get_dashboard("ethereum")
+    await expired.async_get_dashboard("ethereum")
+    assert miningpoolhub.async_get_dashboard.await_count == 4
+
+
+async def test_failures_are_not_cached():
+    """Test an error reaches every waiter and the next call retries."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(side_effect=APIError)
+    client = MiningPoolHubClient(miningpoolhub, "key")
+
+    with pytest.raises(APIError):
+        await client.async_get_user_all_balances()
+    miningpoolhub.async_get_user_all_balances.side_effect = None
+    miningpoolhub.async_get_user_all_balances.return_value = []
+
+    assert await client.async_get_user_all_balances() == []
+    assert miningpoolhub.async_get_user_all_balances.await_count == 2
+
+
+async def test_requests_are_instrumented():
+    """Test latency, errors and cache hits are recorded per endpoint."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    miningpoolhub.async_get_user_all_balances = AsyncMock(side_effect=APIError)
+    client = MiningPoolHubClient(miningpoolhub, "key")
+
+    await client.async_get_dashboard("ethereum")
+    await client.async_get_dashboard("ethereum")
+    with pytest.raises(APIError):
+        await client.async_get_user_all_balances()
+
+    metrics = client.metrics
+    assert metrics.cache_hits == 1
+    assert metrics.cache_misses == 2
+    assert metrics.latency["getdashboarddata"].count == 1
+    assert metrics.latency["getuserallbalances"].count == 1
+    assert metrics.errors == {"APIError": 1}
+
+
+async def test_hung_request_times_out():
+    """Test a request that never answers fails and frees its rate limiter slot."""
+
+    async def get_dashboard(coin_name):
+        await asyncio.Event().wait()
+
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_dashboard = AsyncMock(side_effect=get_dashboard)
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    rate_limiter = RateLimiter(max_connections=1)
+    client = MiningPoolHubClient(miningpoolhub, "key", rate_limiter=rate_limiter)
+
+    with patch(
+        "custom_components.miningpoolhub.client.REQUEST_TIMEOUT",
+        timedelta(seconds=0.01),
+    ), pytest.raises(asyncio.TimeoutError):
+        await client.async_get_dashboard("ethereum")
+
+    assert client.metrics.errors == {"TimeoutError": 1}
+    assert await client.async_get_user_all_balances() == []
+
+
+async def test_pool_status_shared_between_accounts():
+    """Test accounts sharing a pool cache fetch each pool's status once."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    pool_cache = RequestCache()
+    first = MiningPoolHubClient(miningpoolhub, "key", pool_cache=pool_cache)
+    second = MiningPoolHubClient(miningpoolhub, "other-key", pool_cache=pool_cache)
+
+    for client in (first, second):
+        assert await client.async_get_pool_status("ethereum") == POOL_STATUS
+        await client.async_get_dashboard("ethereum")
+    await second.async_get_pool_status("monero")
+
+    assert miningpoolhub.async_get_pool_status.await_count == 2
+    assert miningpoolhub.async_get_dashboard.await_count == 2
+    assert first.metrics.cache_misses == 2
+    assert second.metrics.cache_hits == 1
+
+
+async def test_hashrate_polls_bypass_cache():
+    """Test fast lane hashrate polls always reach MiningPoolHub."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_hash_rate = AsyncMock(return_value=150.0)
+    client = MiningPoolHubClient(miningpoolhub, "key")
+
+    assert await client.async_get_user_hashrate("ethereum") == 150.0
+    assert await client.async_get_user_hashrate("ethereum") == 150.0
+
+    assert miningpoolhub.async_get_user_hash_rate.await_count == 2
+    assert client.metrics.latency["getuserhashrate"].count == 2
+
+
+async def test_clients_share_request_cache(hass):
+    """Test clients built for the same hass share one cache and rate limiter."""
+    first = async_get_client(hass, "key")
+    second = async_get_client(hass, "other-key")
+
+    assert first.request_cache is second.request_cache
+    assert first.pool_cache is second.pool_cache
+    assert first.rate_limiter is second.rate_limiter
+    assert async_get_client(hass, "key") is first
+    manager = hass.data[DOMAIN][DATA_CLIENT_MANAGER]
+    assert manager.request_cache is first.request_cache
+    assert manager.metrics["accounts"] == 2
+
+
+async def test_rate_limited_requests_alternate_accounts():
+    """Test queued requests are granted round-robin between accounts."""
+    order = []
+
+    def request(account, index):
+        async def perform():
+            order.append((account, index))
+
+        return perform
+
+    rate_limiter = RateLimiter(rate=1000, burst=1, max_connections=1)
+    await asyncio.gather(
+        *[
+            rate_limiter.async_request(account, request(account, index))
+            for account, count in (("busy", 3), ("quiet", 1))
+            for index in range(count)
+        ]
+    )
+
+    assert order == [("busy", 0), ("quiet", 0), ("busy", 1), ("busy", 2)]
+    assert rate_limiter.metrics["requests"] == 4
+    assert rate_limiter.metrics["max_queue_depth"] == 4
+    assert rate_limiter.queue_depth == 0
+
+
+async def test_rate_limiter_limits_request_rate():
+    """Test requests beyond the burst wait for new tokens."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    client = MiningPoolHubClient(
+        miningpoolhub,
+        "key",
+        RequestCache(timedelta(0)),
+        RateLimiter(rate=20, burst=2),
+    )
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*[client.async_get_dashboard(str(coin)) for coin in range(4)])
+
+    # Two requests fit the burst, the other two wait 50ms each for a token.
+    assert loop.time() - start >= 0.09
+    assert miningpoolhub.async_get_dashboard.await_count == 4
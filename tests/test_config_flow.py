@@ -1,4 +1,5 @@
 """Tests for the config flow."""
+import asyncio
 from unittest import mock
 from unittest.mock import AsyncMock
 
@@ -8,15 +9,30 @@ import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry, patch
 from custom_components.miningpoolhub import config_flow
 from custom_components.miningpoolhub.const import (
+    CONF_BALANCE_INTERVAL,
+    CONF_CREDITS_INTERVAL,
     CONF_CURRENCY_NAMES,
+    CONF_FAST_LANE_COINS,
+    CONF_FAST_LANE_INTERVAL,
+    CONF_HASHRATE_FLOORS,
+    CONF_HASHRATE_INTERVAL,
+    CONF_INVALID_SHARES_PERCENT,
+    CONF_MAX_CACHE_AGE,
+    CONF_PAYOUT_THRESHOLDS,
+    CONF_POOL_INFO_INTERVAL,
+    CONF_POOL_STATUS_INTERVAL,
+    CONF_STATE_ATTRIBUTES,
+    CONF_WORKERS_INTERVAL,
     DOMAIN,
     CONF_FIAT_CURRENCY,
 )
 
+from .test_sensors import DASHBOARD
+
 API_KEY = "key"
 
 
-@patch("custom_components.miningpoolhub.config_flow.MiningPoolHubAPI")
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
 async def test_validate_coin_valid(m_miningpoolhubapi, hass):
     """Test no exception is raised for a valid coin."""
     m_instance = AsyncMock()
@@ -25,7 +41,7 @@ async def test_validate_coin_valid(m_miningpoolhubapi, hass):
     await config_flow.validate_coin("ethereum", API_KEY, hass)
 
 
-@patch("custom_components.miningpoolhub.config_flow.MiningPoolHubAPI")
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
 async def test_validate_coin_invalid(m_miningpoolhubapi, hass):
     """Test a ValueError is raised when the coin is not valid."""
     m_instance = AsyncMock()
@@ -38,7 +54,7 @@ async def test_validate_coin_invalid(m_miningpoolhubapi, hass):
             await config_flow.validate_coin(bad_coin, API_KEY, hass)
 
 
-@patch("custom_components.miningpoolhub.config_flow.MiningPoolHubAPI")
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
 async def test_validate_auth_valid(m_miningpoolhubapi, hass):
     """Test no exception is raised for valid API key."""
     m_instance = AsyncMock()
@@ -47,7 +63,7 @@ async def test_validate_auth_valid(m_miningpoolhubapi, hass):
     await config_flow.validate_auth(API_KEY, hass)
 
 
-@patch("custom_components.miningpoolhub.config_flow.MiningPoolHubAPI")
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
 async def test_validate_auth_invalid(m_miningpoolhubapi, hass):
     """Test ValueError is raised when API key is invalid."""
     m_instance = AsyncMock()
@@ -94,6 +110,7 @@ async def test_flow_user_init_invalid_api_key(m_validate_auth, hass):
 @patch("custom_components.miningpoolhub.config_flow.validate_auth")
 async def test_flow_user_init_data_valid(m_validate_auth, hass):
     """Test we advance to the next step when data is valid."""
+    m_validate_auth.return_value = {}
     _result = await hass.config_entries.flow.async_init(
         config_flow.DOMAIN, context={"source": "user"}
     )
@@ -109,22 +126,91 @@ async def test_flow_coin_init_form(hass):
     result = await hass.config_entries.flow.async_init(
         config_flow.DOMAIN, context={"source": "coin"}
     )
-    expected = {
-        "data_schema": config_flow.CURRENCY_NAME_SCHEMA,
-        "description_placeholders": None,
-        "errors": {},
-        "flow_id": mock.ANY,
-        "handler": "miningpoolhub",
-        "last_step": None,
-        "step_id": "coin",
-        "type": "form",
+    assert result["step_id"] == "coin"
+    assert result["type"] == "form"
+    assert result["errors"] == {}
+
+
+def test_discover_coins():
+    """Test coins of the account are listed with whether they hold a balance."""
+    balance = {
+        "confirmed": 0,
+        "unconfirmed": 0,
+        "ae_confirmed": 0,
+        "ae_unconfirmed": 0,
+        "exchange": 0,
     }
-    assert result == expected
+    discovered = config_flow.discover_coins(
+        [
+            {**balance, "coin": "monero"},
+            {**balance, "coin": "ethereum", "unconfirmed": 0.5},
+        ]
+    )
+    assert discovered == {"ethereum": True, "monero": False}
+    assert list(discovered) == ["ethereum", "monero"]
+
+
+def test_coin_values_input():
+    """Test per coin values are read from and formatted as coin=value pairs."""
+    floors = config_flow.coin_values_from_input("Ethereum = 150, monero=2.5,")
+    assert floors == {"ethereum": 150.0, "monero": 2.5}
+    assert config_flow.coin_values_to_input(floors) == "ethereum=150, monero=2.5"
+    for bad in ("ethereum", "=5", "ethereum=fast"):
+        with pytest.raises(ValueError):
+            config_flow.coin_values_from_input(bad)
+
+
+def test_coin_names_from_input():
+    """Test entered coin names are split, lower cased and deduplicated."""
+    assert config_flow.coin_names_from_input("Ethereum, monero ethereum,,") == [
+        "ethereum",
+        "monero",
+    ]
+
+
+@patch("custom_components.miningpoolhub.config_flow.validate_coin")
+async def test_validate_coins_concurrently(m_validate_coin, hass):
+    """Test every coin is validated at once and the invalid ones returned."""
+    started = []
+    release = asyncio.Event()
+
+    async def validate_coin(coin, api_key, hass):
+        started.append(coin)
+        await release.wait()
+        if coin == "bad":
+            raise ValueError
+
+    m_validate_coin.side_effect = validate_coin
+    validating = asyncio.ensure_future(
+        config_flow.validate_coins(["ethereum", "bad", "monero"], API_KEY, hass)
+    )
+    for _ in range(5):
+        await asyncio.sleep(0)
+    # All three requests are in flight before any of them completes.
+    assert started == ["ethereum", "bad", "monero"]
+    release.set()
+    assert await validating == ["bad"]
+
+
+@patch("custom_components.miningpoolhub.config_flow.validate_auth")
+async def test_flow_coin_offers_discovered_coins(m_validate_auth, hass):
+    """Test coins of the account are offered, those with a balance checked."""
+    m_validate_auth.return_value = {"ethereum": True, "monero": False}
+    _result = await hass.config_entries.flow.async_init(
+        config_flow.DOMAIN, context={"source": "user"}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        _result["flow_id"], user_input={CONF_API_KEY: "good"}
+    )
+    assert result["step_id"] == "coin"
+    coins = result["data_schema"].schema["coins"]
+    assert coins.options == {"ethereum": "Ethereum", "monero": "Monero"}
+    assert result["data_schema"]({})["coins"] == ["ethereum"]
 
 
 @patch("custom_components.miningpoolhub.config_flow.validate_coin")
 async def test_flow_coin_path_invalid(m_validate_coin, hass):
-    """Test errors populated when coin name is invalid."""
+    """Test errors populated and invalid names kept when a coin name is invalid."""
     m_validate_coin.side_effect = ValueError
     _result = await hass.config_entries.flow.async_init(
         config_flow.DOMAIN, context={"source": "coin"}
@@ -133,25 +219,18 @@ async def test_flow_coin_path_invalid(m_validate_coin, hass):
         _result["flow_id"], user_input={CONF_NAME: "bad"}
     )
     assert result["errors"] == {"base": "invalid_coin"}
+    assert result["data_schema"]({})[CONF_NAME] == "bad"
 
 
-# noinspection PyUnusedLocal
-@patch("custom_components.miningpoolhub.config_flow.validate_coin")
-async def test_flow_coin_add_another(m_validate_coin, hass):
-    """Test we show the coin flow again if the add_another box was checked."""
-    config_flow.MiningPoolHubConfigFlow.data = {
-        CONF_API_KEY: API_KEY,
-        CONF_CURRENCY_NAMES: [],
-    }
+async def test_flow_coin_requires_a_coin(hass):
+    """Test a coin has to be picked or entered."""
     _result = await hass.config_entries.flow.async_init(
         config_flow.DOMAIN, context={"source": "coin"}
     )
     result = await hass.config_entries.flow.async_configure(
-        _result["flow_id"],
-        user_input={CONF_NAME: "ethereum", "add_another": True},
+        _result["flow_id"], user_input={}
     )
-    assert result["step_id"] == "coin"
-    assert result["type"] == "form"
+    assert result["errors"] == {"base": "no_coins"}
 
 
 # noinspection PyUnusedLocal
@@ -162,15 +241,17 @@ async def test_flow_coin_creates_config_entry(m_validate_coin, hass):
         CONF_API_KEY: "key",
         CONF_CURRENCY_NAMES: [],
     }
+    config_flow.MiningPoolHubConfigFlow.discovered = {"ethereum": True}
     _result = await hass.config_entries.flow.async_init(
         config_flow.DOMAIN, context={"source": "coin"}
     )
     result = await hass.config_entries.flow.async_configure(
         _result["flow_id"],
-        user_input={CONF_NAME: "ethereum"},
+        user_input={"coins": ["ethereum"], CONF_NAME: "Monero, doge"},
     )
+    config_flow.MiningPoolHubConfigFlow.discovered = {}
     expected = {
-        "version": 1,
+        "version": 2,
         "type": "create_entry",
         "flow_id": mock.ANY,
         "handler": "miningpoolhub",
@@ -178,20 +259,21 @@ async def test_flow_coin_creates_config_entry(m_validate_coin, hass):
         "title": "MiningPoolHub",
         "data": {
             "api_key": "key",
-            "currency_names": ["ethereum"],
+            "currency_names": ["ethereum", "monero", "doge"],
         },
         "description": None,
         "description_placeholders": None,
         "result": mock.ANY,
     }
     assert result == expected
+    assert m_validate_coin.await_count == 2
 
 
-@patch("custom_components.miningpoolhub.sensor.MiningPoolHubAPI")
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
 async def test_options_flow_init(m_miningpoolhub, hass):
     """Test config flow options."""
     m_instance = AsyncMock()
-    m_instance.async_get_dashboard = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
     m_miningpoolhub.return_value = m_instance
 
     config_entry = MockConfigEntry(
@@ -218,11 +300,11 @@ async def test_options_flow_init(m_miningpoolhub, hass):
     }
 
 
-@patch("custom_components.miningpoolhub.sensor.MiningPoolHubAPI")
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
 async def test_options_flow_remove_coin(m_miningpoolhub, hass):
     """Test config flow options."""
     m_instance = AsyncMock()
-    m_instance.async_get_dashboard = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
     m_miningpoolhub.return_value = m_instance
 
     config_entry = MockConfigEntry(
@@ -247,17 +329,30 @@ async def test_options_flow_remove_coin(m_miningpoolhub, hass):
     assert result["type"] == "create_entry"
     assert result["title"] == ""
     assert result["result"] is True
-    assert result["data"] == {CONF_CURRENCY_NAMES: []}
+    assert result["data"] == {
+        CONF_CURRENCY_NAMES: [],
+        CONF_BALANCE_INTERVAL: 2,
+        CONF_CREDITS_INTERVAL: 30,
+        CONF_HASHRATE_FLOORS: {},
+        CONF_HASHRATE_INTERVAL: 10,
+        CONF_INVALID_SHARES_PERCENT: 10,
+        CONF_PAYOUT_THRESHOLDS: {},
+        CONF_FAST_LANE_COINS: [],
+        CONF_FAST_LANE_INTERVAL: 20,
+        CONF_MAX_CACHE_AGE: 60,
+        CONF_POOL_INFO_INTERVAL: 1440,
+        CONF_STATE_ATTRIBUTES: True,
+        CONF_WORKERS_INTERVAL: 10,
+        CONF_POOL_STATUS_INTERVAL: 5,
+    }
 
 
-@patch("custom_components.miningpoolhub.sensor.MiningPoolHubAPI")
-@patch("custom_components.miningpoolhub.config_flow.MiningPoolHubAPI")
-async def test_options_flow_add_coin(m_miningpoolhub, m_miningpoolhub_cf, hass):
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_options_flow_add_coin(m_miningpoolhub, hass):
     """Test config flow options."""
     m_instance = AsyncMock()
-    m_instance.async_get_dashboard = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
     m_miningpoolhub.return_value = m_instance
-    m_miningpoolhub_cf.return_value = m_instance
 
     config_entry = MockConfigEntry(
         domain=DOMAIN,
@@ -286,4 +381,73 @@ async def test_options_flow_add_coin(m_miningpoolhub, m_miningpoolhub_cf, hass):
         "ethereum",
         "doge",
     ]
-    assert result["data"] == {CONF_CURRENCY_NAMES: expected_coins}
+    assert result["data"] == {
+        CONF_CURRENCY_NAMES: expected_coins,
+        CONF_BALANCE_INTERVAL: 2,
+        CONF_CREDITS_INTERVAL: 30,
+        CONF_HASHRATE_FLOORS: {},
+        CONF_HASHRATE_INTERVAL: 10,
+        CONF_INVALID_SHARES_PERCENT: 10,
+        CONF_PAYOUT_THRESHOLDS: {},
+        CONF_FAST_LANE_COINS: [],
+        CONF_FAST_LANE_INTERVAL: 20,
+        CONF_MAX_CACHE_AGE: 60,
+        CONF_POOL_INFO_INTERVAL: 1440,
+        CONF_STATE_ATTRIBUTES: True,
+        CONF_WORKERS_INTERVAL: 10,
+        CONF_POOL_STATUS_INTERVAL: 5,
+    }
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_options_flow_change_intervals(m_miningpoolhub, hass):
+    """Test refresh intervals can be changed through the options flow."""
+    m_instance = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    m_miningpoolhub.return_value = m_instance
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="miningpoolhub_ethereum",
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum"],
+        },
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            "coins": ["sensor.miningpoolhub_ethereum"],
+            CONF_HASHRATE_INTERVAL: 1,
+            CONF_BALANCE_INTERVAL: 5,
+            CONF_STATE_ATTRIBUTES: False,
+            CONF_HASHRATE_FLOORS: "Ethereum=150.5",
+            CONF_INVALID_SHARES_PERCENT: 25,
+            CONF_PAYOUT_THRESHOLDS: "ethereum=0.05",
+            CONF_FAST_LANE_COINS: ["ethereum"],
+            CONF_FAST_LANE_INTERVAL: 15,
+        },
+    )
+    assert result["type"] == "create_entry"
+    assert result["data"] == {
+        CONF_CURRENCY_NAMES: ["ethereum"],
+        CONF_BALANCE_INTERVAL: 5,
+        CONF_CREDITS_INTERVAL: 30,
+        CONF_HASHRATE_FLOORS: {"ethereum": 150.5},
+        CONF_HASHRATE_INTERVAL: 1,
+        CONF_INVALID_SHARES_PERCENT: 25,
+        CONF_PAYOUT_THRESHOLDS: {"ethereum": 0.05},
+        CONF_FAST_LANE_COINS: ["ethereum"],
+        CONF_FAST_LANE_INTERVAL: 15,
+        CONF_MAX_CACHE_AGE: 60,
+        CONF_POOL_INFO_INTERVAL: 1440,
+        CONF_STATE_ATTRIBUTES: False,
+        CONF_WORKERS_INTERVAL: 10,
+        CONF_POOL_STATUS_INTERVAL: 5,
+    }
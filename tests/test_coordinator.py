@@ -0,0 +1,665 @@
+"""Tests for the coordinator module."""
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from miningpoolhub_py.exceptions import APIError
+from pytest_homeassistant_custom_component.common import async_capture_events
+
+from custom_components.miningpoolhub.const import (
+    CONF_HASHRATE_INTERVAL,
+    EVENT_HASHRATE_LOW,
+    EVENT_HASHRATE_RESTORED,
+    EVENT_INVALID_SHARES,
+    EVENT_PAYOUT,
+    GROUP_BALANCES,
+    GROUP_CREDITS,
+    GROUP_HASHRATE,
+    GROUP_POOL_INFO,
+    GROUP_POOL_STATUS,
+    GROUP_WORKERS,
+)
+from custom_components.miningpoolhub.coordinator import (
+    MiningPoolHubDataUpdateCoordinator,
+    async_get_coordinator_registry,
+    intervals_from_config,
+)
+
+from .test_sensors import DASHBOARD, POOL_STATUS
+
+
+async def test_update_fetches_all_coins(hass):
+    """Test one refresh fetches the dashboard of every configured coin."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum", "monero", "zcash"]
+    )
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is True
+    assert set(coordinator.data) == {"ethereum", "monero", "zcash"}
+    assert miningpoolhub.async_get_dashboard.await_count == 3
+
+
+async def test_update_partial_failure(hass):
+    """Test a failing coin is dropped without failing the whole update."""
+
+    async def get_dashboard(coin_name):
+        if coin_name == "monero":
+            raise APIError
+        return DASHBOARD
+
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = get_dashboard
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum", "monero"]
+    )
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is True
+    assert set(coordinator.data) == {"ethereum"}
+
+
+async def test_update_schema_drift(hass):
+    """Test a coin whose dashboard changed shape is dropped like a failed one."""
+
+    async def get_dashboard(coin_name):
+        if coin_name == "monero":
+            return {**DASHBOARD, "personal": {"hashrate": "n/a"}}
+        return DASHBOARD
+
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(
+        return_value=[{"hashrate": 1.0}, {"username": "user.rig", "hashrate": 2.0}]
+    )
+    miningpoolhub.async_get_dashboard = get_dashboard
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum", "monero"]
+    )
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is True
+    assert set(coordinator.data) == {"ethereum"}
+    assert list(coordinator.workers["ethereum"]) == ["user.rig"]
+
+
+async def test_update_total_failure(hass):
+    """Test the update fails when no coin could be fetched."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(side_effect=APIError)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum", "monero"]
+    )
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is False
+
+
+async def test_update_bounded_concurrency(hass):
+    """Test no more than max_concurrent_requests requests are in flight."""
+    in_flight = 0
+    peak = 0
+
+    async def get_dashboard(coin_name):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return DASHBOARD
+
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = get_dashboard
+    coins = [f"coin{i}" for i in range(10)]
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, coins, max_concurrent_requests=3
+    )
+    await coordinator.async_refresh()
+
+    assert len(coordinator.data) == 10
+    assert peak == 3
+
+
+async def test_update_balances_from_all_balances(hass):
+    """Test balances come from the bulk getuserallbalances response."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(
+        return_value=[
+            {
+                "coin": "ethereum",
+                "confirmed": 1.5,
+                "unconfirmed": 0.25,
+                "ae_confirmed": 0.1,
+                "ae_unconfirmed": 0.2,
+                "exchange": 0.3,
+            },
+            {
+                "coin": "monero",
+                "confirmed": 9,
+                "unconfirmed": 9,
+                "ae_confirmed": 9,
+                "ae_unconfirmed": 9,
+                "exchange": 9,
+            },
+        ]
+    )
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(hass, miningpoolhub, ["ethereum"])
+    await coordinator.async_refresh()
+
+    assert set(coordinator.data) == {"ethereum"}
+    ethereum = coordinator.data["ethereum"]
+    assert ethereum["balance_confirmed"] == 1.5
+    assert ethereum["balance_unconfirmed"] == 0.25
+    assert ethereum["balance_auto_exchange_confirmed"] == 0.1
+    assert ethereum["balance_auto_exchange_unconfirmed"] == 0.2
+    assert ethereum["balance_on_exchange"] == 0.3
+    assert ethereum["current_hashrate"] == 143.165577
+
+
+async def test_update_only_due_groups(hass):
+    """Test only the endpoints serving a due field group are requested."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass,
+        miningpoolhub,
+        ["ethereum"],
+        {
+            GROUP_BALANCES: timedelta(minutes=2),
+            GROUP_HASHRATE: timedelta(minutes=10),
+            GROUP_CREDITS: timedelta(minutes=30),
+            GROUP_POOL_INFO: timedelta(days=1),
+            GROUP_WORKERS: timedelta(minutes=15),
+        },
+    )
+    assert coordinator.update_interval == timedelta(minutes=2)
+
+    now = dt_util.utcnow()
+    with patch("homeassistant.util.dt.utcnow", return_value=now):
+        await coordinator.async_refresh()
+        assert coordinator.due_groups() == set()
+        await coordinator.async_refresh()
+    assert miningpoolhub.async_get_dashboard.await_count == 1
+    assert miningpoolhub.async_get_user_all_balances.await_count == 1
+
+    with patch("homeassistant.util.dt.utcnow", return_value=now + timedelta(minutes=2)):
+        assert coordinator.due_groups() == {GROUP_BALANCES}
+        await coordinator.async_refresh()
+    assert miningpoolhub.async_get_dashboard.await_count == 1
+    assert miningpoolhub.async_get_user_all_balances.await_count == 2
+
+    with patch(
+        "homeassistant.util.dt.utcnow", return_value=now + timedelta(minutes=10)
+    ):
+        assert coordinator.due_groups() == {
+            GROUP_BALANCES,
+            GROUP_HASHRATE,
+            GROUP_POOL_STATUS,
+        }
+        await coordinator.async_refresh()
+    assert miningpoolhub.async_get_dashboard.await_count == 2
+    assert miningpoolhub.async_get_pool_status.await_count == 2
+    assert "ethereum" in coordinator.data
+
+
+async def test_failed_coin_refetched_alone(hass):
+    """Test a coin whose dashboard failed is retried without the other coins."""
+    failing = {"monero"}
+
+    async def get_dashboard(coin_name):
+        if coin_name in failing:
+            raise APIError
+        return DASHBOARD
+
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(
+        return_value=[
+            {
+                "coin": "monero",
+                "confirmed": 1.5,
+                "unconfirmed": 0.25,
+                "ae_confirmed": 0,
+                "ae_unconfirmed": 0,
+                "exchange": 0,
+            }
+        ]
+    )
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(side_effect=get_dashboard)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum", "monero"]
+    )
+
+    now = dt_util.utcnow()
+    with patch("homeassistant.util.dt.utcnow", return_value=now):
+        await coordinator.async_refresh()
+    # Known from its balance until its dashboard is fetched.
+    assert coordinator.data["monero"]["balance_confirmed"] == 1.5
+    assert "current_hashrate" not in coordinator.data["monero"]
+    assert coordinator.due_coins(GROUP_POOL_INFO) == ["monero"]
+
+    failing.clear()
+    miningpoolhub.async_get_dashboard.reset_mock()
+    with patch("homeassistant.util.dt.utcnow", return_value=now + timedelta(minutes=1)):
+        await coordinator.async_refresh()
+    miningpoolhub.async_get_dashboard.assert_awaited_once_with("monero")
+    assert coordinator.data["monero"]["current_hashrate"] == 143.165577
+    assert coordinator.due_groups() == set()
+    # Only the coin fetched by the second refresh gained a hashrate sample.
+    assert len(coordinator.history["ethereum"].as_dict()["current_hashrate"]) == 1
+    assert len(coordinator.history["monero"].as_dict()["current_hashrate"]) == 1
+
+
+async def test_new_intervals_request_refresh(hass):
+    """Test changed intervals trigger a refresh that reschedules polling."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(hass, miningpoolhub, ["ethereum"])
+    coordinator.async_set_intervals({GROUP_BALANCES: timedelta(minutes=1)})
+    await hass.async_block_till_done()
+    miningpoolhub.async_get_user_all_balances.assert_not_awaited()
+
+    listener = MagicMock()
+    coordinator.async_add_listener(listener)
+    coordinator.async_set_intervals({GROUP_BALANCES: timedelta(minutes=3)})
+    await hass.async_block_till_done()
+
+    assert coordinator.update_interval == timedelta(minutes=3)
+    miningpoolhub.async_get_user_all_balances.assert_awaited_once()
+    listener.assert_called_once()
+
+
+def test_intervals_from_config():
+    """Test intervals are read from the config in minutes with defaults."""
+    intervals = intervals_from_config({CONF_HASHRATE_INTERVAL: 1})
+
+    assert intervals[GROUP_HASHRATE] == timedelta(minutes=1)
+    assert intervals[GROUP_BALANCES] == timedelta(minutes=2)
+
+
+async def test_snapshot_restores_data(hass, hass_storage):
+    """Test a persisted snapshot populates data without any request."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum"], store=Store(hass, 1, "miningpoolhub.test")
+    )
+    await coordinator.async_refresh()
+    await coordinator._store.async_save(coordinator._snapshot())
+
+    miningpoolhub.async_get_dashboard.reset_mock()
+    restored = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum"], store=Store(hass, 1, "miningpoolhub.test")
+    )
+    assert await restored.async_load_snapshot(timedelta(minutes=60)) is True
+    assert restored.data == coordinator.data
+    assert restored.digests == coordinator.digests
+    assert restored.due_groups() == set()
+    miningpoolhub.async_get_dashboard.assert_not_awaited()
+
+
+async def test_snapshot_too_old(hass, hass_storage):
+    """Test a snapshot older than the maximum age is ignored."""
+    hass_storage["miningpoolhub.test"] = {
+        "version": 1,
+        "key": "miningpoolhub.test",
+        "data": {
+            "updated": (dt_util.utcnow() - timedelta(hours=2)).isoformat(),
+            "dashboards": {"ethereum": {"current_hashrate": 1.0}},
+            "balances": {},
+            "group_updated": {},
+        },
+    }
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, MagicMock(), ["ethereum"], store=Store(hass, 1, "miningpoolhub.test")
+    )
+
+    assert await coordinator.async_load_snapshot(timedelta(minutes=60)) is False
+    assert coordinator.data is None
+
+
+async def test_snapshot_missing_coin_fetches_dashboards(hass, hass_storage):
+    """Test a coin added after the snapshot was taken makes dashboards due."""
+    now = dt_util.utcnow().isoformat()
+    hass_storage["miningpoolhub.test"] = {
+        "version": 1,
+        "key": "miningpoolhub.test",
+        "data": {
+            "updated": now,
+            "dashboards": {"ethereum": {"current_hashrate": 1.0}},
+            "balances": {},
+            "group_updated": {
+                GROUP_POOL_INFO: now,
+                GROUP_BALANCES: now,
+                GROUP_CREDITS: now,
+                GROUP_HASHRATE: now,
+            },
+        },
+    }
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass,
+        MagicMock(),
+        ["ethereum", "monero"],
+        store=Store(hass, 1, "miningpoolhub.test"),
+    )
+
+    assert await coordinator.async_load_snapshot(timedelta(minutes=60)) is True
+    assert set(coordinator.data) == {"ethereum"}
+    assert coordinator.due_groups() == {
+        GROUP_POOL_INFO,
+        GROUP_CREDITS,
+        GROUP_HASHRATE,
+        GROUP_WORKERS,
+        GROUP_POOL_STATUS,
+    }
+
+
+async def test_failures_back_off_and_probe(hass):
+    """Test a failing account backs off and is probed with a single request."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(side_effect=APIError)
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(side_effect=APIError)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum", "monero"], {GROUP_BALANCES: timedelta(0)}
+    )
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is False
+    assert coordinator.circuit_breaker.failures == 1
+    assert coordinator.update_interval >= coordinator.circuit_breaker.base_delay
+    assert miningpoolhub.async_get_dashboard.await_count == 2
+
+    # While the breaker is open only the probe request is sent.
+    await coordinator.async_refresh()
+    assert coordinator.circuit_breaker.failures == 2
+    assert miningpoolhub.async_get_dashboard.await_count == 2
+    assert miningpoolhub.async_get_user_all_balances.await_count == 1
+
+    miningpoolhub.async_get_user_all_balances.side_effect = None
+    miningpoolhub.async_get_user_all_balances.return_value = []
+    miningpoolhub.async_get_dashboard.side_effect = None
+    miningpoolhub.async_get_dashboard.return_value = DASHBOARD
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is True
+    assert coordinator.circuit_breaker.is_open is False
+    assert coordinator.update_interval == coordinator.circuit_breaker.base_delay
+    assert set(coordinator.data) == {"ethereum", "monero"}
+
+
+async def test_update_values_coins_in_fiat(hass):
+    """Test prices fetched after the refresh fill the fiat attributes."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    price_cache = MagicMock()
+    price_cache.cached_prices = MagicMock(return_value={})
+    price_cache.async_get_prices = AsyncMock(return_value={"ethereum": 2000.0})
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass,
+        miningpoolhub,
+        ["ethereum", "monero"],
+        fiat_currency="USD",
+        price_cache=price_cache,
+    )
+    listener = MagicMock()
+    coordinator.async_add_listener(listener)
+    await coordinator.async_refresh()
+    # The refresh does not wait for CoinGecko.
+    assert "single_coin_in_local_currency" not in coordinator.data["ethereum"]
+    listener.reset_mock()
+    await hass.async_block_till_done()
+
+    price_cache.async_get_prices.assert_awaited_once_with(["ethereum", "monero"], "USD")
+    listener.assert_called_once()
+    ethereum = coordinator.data["ethereum"]
+    assert ethereum["single_coin_in_local_currency"] == 2000.0
+    assert ethereum["fiat_currency_unpaid_total"] == round(
+        (0.05458251 + 6.64e-5) * 2000.0, 2
+    )
+    assert ethereum["coins_per_minute"] == 0.0032644192 / 1440
+    assert "single_coin_in_local_currency" not in coordinator.data["monero"]
+
+
+async def test_update_skips_unconsumed_groups(hass):
+    """Test groups no enabled entity reads are not requested."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum", "monero"]
+    )
+    coordinator.only_consumed = True
+    remove_consumer = coordinator.async_add_consumer("ethereum", [GROUP_BALANCES])
+
+    await coordinator.async_refresh()
+    assert miningpoolhub.async_get_user_all_balances.await_count == 1
+    miningpoolhub.async_get_dashboard.assert_not_awaited()
+    miningpoolhub.async_get_user_workers.assert_not_awaited()
+    assert coordinator.due_groups() == {
+        GROUP_POOL_INFO,
+        GROUP_CREDITS,
+        GROUP_HASHRATE,
+        GROUP_WORKERS,
+        GROUP_POOL_STATUS,
+    }
+
+    remove_consumer()
+    coordinator.async_add_consumer("monero", [GROUP_HASHRATE])
+    await coordinator.async_refresh()
+    miningpoolhub.async_get_dashboard.assert_awaited_once_with("monero")
+    miningpoolhub.async_get_user_workers.assert_not_awaited()
+    assert set(coordinator.data) == {"monero"}
+
+
+async def test_skip_unconsumed_after_next_refresh(hass):
+    """Test unread groups are fetched until a refresh ran after entities were added."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum"], {GROUP_POOL_STATUS: timedelta(0)}
+    )
+
+    # The platform added its entities, none registered yet.
+    coordinator.async_skip_unconsumed()
+    await coordinator.async_refresh()
+    miningpoolhub.async_get_pool_status.assert_awaited_once_with("ethereum")
+    assert coordinator.only_consumed is True
+
+    await coordinator.async_refresh()
+    miningpoolhub.async_get_pool_status.assert_awaited_once()
+
+
+async def test_update_fires_transition_events(hass):
+    """Test payouts, hashrate floor crossings and invalid share spikes fire once."""
+
+    def dashboard(hashrate, valid, invalid, confirmed):
+        return {
+            **DASHBOARD,
+            "personal": {
+                "hashrate": hashrate,
+                "shares": {"valid": valid, "invalid": invalid},
+            },
+            "balance": {"confirmed": confirmed, "unconfirmed": 0},
+        }
+
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(
+        side_effect=[
+            dashboard(143.0, 1000, 0, 0.5),
+            dashboard(50.0, 1080, 20, 0.1),
+            dashboard(150.0, 1180, 40, 0.2),
+        ]
+    )
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass,
+        miningpoolhub,
+        ["ethereum"],
+        {GROUP_HASHRATE: timedelta(0), GROUP_POOL_INFO: timedelta(0)},
+        hashrate_floors={"ethereum": 100.0},
+    )
+    events = {
+        event_type: async_capture_events(hass, event_type)
+        for event_type in (
+            EVENT_PAYOUT,
+            EVENT_HASHRATE_LOW,
+            EVENT_HASHRATE_RESTORED,
+            EVENT_INVALID_SHARES,
+        )
+    }
+
+    for _ in range(3):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert [event.data for event in events[EVENT_PAYOUT]] == [
+        {"coin": "ethereum", "currency": "ETH", "amount": 0.4, "balance_confirmed": 0.1}
+    ]
+    assert [event.data for event in events[EVENT_HASHRATE_LOW]] == [
+        {"coin": "ethereum", "current_hashrate": 50.0, "floor": 100.0}
+    ]
+    assert len(events[EVENT_HASHRATE_RESTORED]) == 1
+    # The spike continues on the third update without firing again.
+    assert [event.data for event in events[EVENT_INVALID_SHARES]] == [
+        {
+            "coin": "ethereum",
+            "invalid_percent": 20.0,
+            "valid_shares": 80,
+            "invalid_shares": 20,
+        }
+    ]
+
+
+async def test_balance_fallback_is_no_payout(hass):
+    """Test a coin missing from getuserallbalances fires no payout."""
+    balance = {
+        "coin": "ethereum",
+        "confirmed": 1.5,
+        "unconfirmed": 0,
+        "ae_confirmed": 0,
+        "ae_unconfirmed": 0,
+        "exchange": 0,
+    }
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(side_effect=[[balance], []])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum"], {GROUP_BALANCES: timedelta(0)}
+    )
+    payouts = async_capture_events(hass, EVENT_PAYOUT)
+
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    # Fell back to the dashboard's lower balance.
+    assert coordinator.data["ethereum"]["balance_confirmed"] < 1.5
+
+    assert payouts == []
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_registry_shares_coordinator_per_api_key(m_miningpoolhub, hass):
+    """Test configurations of one API key share a coordinator following all coins."""
+    m_instance = MagicMock()
+    m_instance.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    m_instance.async_get_user_workers = AsyncMock(return_value=[])
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    m_miningpoolhub.return_value = m_instance
+    registry = async_get_coordinator_registry(hass)
+
+    coordinator = await registry.async_acquire("api-key", "entry", ["ethereum"])
+    assert (
+        await registry.async_acquire("api-key", "yaml", ["ethereum", "monero"])
+        is coordinator
+    )
+    assert coordinator.coin_names == ["ethereum", "monero"]
+    other = await registry.async_acquire("other-key", "entry", ["ethereum"])
+    assert other is not coordinator
+    assert other.miningpoolhub_api is not coordinator.miningpoolhub_api
+
+    await registry.async_set_coins("api-key", "entry", ["zcash"])
+    assert coordinator.coin_names == ["zcash", "ethereum", "monero"]
+
+    await registry.async_release("api-key", "yaml")
+    assert coordinator.coin_names == ["zcash"]
+    await registry.async_release("api-key", "entry")
+    assert await registry.async_acquire("api-key", "entry", ["zcash"]) is not (
+        coordinator
+    )
+
+
+async def test_coin_removed_during_refresh(hass):
+    """Test a coin removed while its requests are in flight is not brought back."""
+    release = asyncio.Event()
+
+    async def get_dashboard(coin_name):
+        if coin_name == "monero":
+            await release.wait()
+        return DASHBOARD
+
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(side_effect=get_dashboard)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum", "monero"], {GROUP_HASHRATE: timedelta(0)}
+    )
+
+    refresh = asyncio.ensure_future(coordinator.async_refresh())
+    await asyncio.sleep(0)
+    await coordinator.async_set_coins(["ethereum"])
+    release.set()
+    await refresh
+
+    assert coordinator.last_update_success is True
+    assert set(coordinator.data) == {"ethereum"}
+    assert "monero" not in coordinator.workers
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success is True
+    assert set(coordinator.data) == {"ethereum"}
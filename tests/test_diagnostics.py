@@ -0,0 +1,64 @@
+"""Tests for the diagnostics module."""
+from unittest.mock import AsyncMock, patch
+
+from homeassistant.const import CONF_API_KEY
+from homeassistant.helpers import entity_registry
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.miningpoolhub.const import (
+    CONF_CURRENCY_NAMES,
+    CONF_FIAT_CURRENCY,
+    DOMAIN,
+)
+from custom_components.miningpoolhub.diagnostics import (
+    REDACTED,
+    async_get_config_entry_diagnostics,
+)
+
+from .test_sensors import DASHBOARD, POOL_STATUS
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_config_entry_diagnostics(m_miningpoolhub, hass):
+    """Test diagnostics report request statistics without the API key."""
+    m_instance = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    m_instance.async_get_user_all_balances = AsyncMock(return_value=[])
+    m_instance.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    m_instance.async_get_user_workers = AsyncMock(return_value=[])
+    m_miningpoolhub.return_value = m_instance
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum"],
+        },
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+
+    assert diagnostics["entry"]["data"][CONF_API_KEY] == REDACTED
+    coordinator = diagnostics["coordinator"]
+    assert coordinator["update_duration"]["count"] == 1
+    assert coordinator["last_update_duration"] is not None
+    assert coordinator["update_errors"] == {}
+    assert coordinator["requests"]["requests"] == 4
+    assert set(coordinator["requests"]["latency"]) == {
+        "getdashboarddata",
+        "getuserallbalances",
+        "getuserworkers",
+        "getpoolstatus",
+    }
+    assert diagnostics["rate_limiter"]["requests"] == 4
+
+    # The diagnostic sensors are registered but disabled by default.
+    registry = entity_registry.async_get(hass)
+    entity_id = registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{config_entry.entry_id}_update_duration"
+    )
+    assert registry.async_get(entity_id).disabled
+    assert hass.states.get(entity_id) is None
@@ -0,0 +1,81 @@
+"""Tests for the earnings module."""
+from datetime import timedelta
+import math
+
+from homeassistant.util import dt as dt_util
+import pytest
+
+from custom_components.miningpoolhub.earnings import EarningsEstimator, MovingAverage
+
+
+def test_moving_average_decays_with_age():
+    """Test a sample moves the average by its weight after the elapsed time."""
+    average = MovingAverage(timedelta(seconds=100))
+    average.add(0.0, 10.0)
+    average.add(100.0, 20.0)
+
+    assert average.value == pytest.approx(10.0 + (1 - math.exp(-1)) * 10.0)
+
+    # Out of order samples are ignored.
+    average.add(50.0, 1000.0)
+    assert average.updated == 100.0
+
+
+def test_projection_scales_credits_by_hashrate():
+    """Test credits are scaled by the recent hashrate over the day's."""
+    estimator = EarningsEstimator()
+    now = dt_util.utcnow()
+    estimator.record(now - timedelta(hours=12), 100.0)
+    estimator.record(now, 200.0)
+    coin_data = {"recent_credits_24_hours": 1.44}
+
+    recent = estimator.recent_hashrate.value
+    daily = estimator.daily_hashrate.value
+    assert recent > daily
+    attributes = estimator.attributes(coin_data)
+    assert attributes["coins_per_minute"] == pytest.approx(0.001 * recent / daily)
+    assert attributes["projected_daily_earnings"] == pytest.approx(
+        1.44 * recent / daily
+    )
+    assert attributes["projected_weekly_earnings"] == pytest.approx(
+        7 * 1.44 * recent / daily
+    )
+
+
+def test_projection_falls_back_to_estimates():
+    """Test a coin without credits uses the round's payout estimate."""
+    estimator = EarningsEstimator()
+    coin_data = {
+        "recent_credits_24_hours": 0.0,
+        "estimated_payout": 0.01,
+        "estimated_time_to_block": 600.0,
+    }
+
+    assert estimator.coins_per_minute(coin_data) == pytest.approx(0.001)
+    assert estimator.coins_per_minute({"recent_credits_24_hours": 0.0}) == 0.0
+    assert estimator.attributes({}) == {}
+
+
+def test_time_to_payout():
+    """Test hours until the unpaid balance reaches the payout threshold."""
+    estimator = EarningsEstimator()
+    coin_data = {
+        "recent_credits_24_hours": 1.44,
+        "balance_confirmed": 0.4,
+        "balance_unconfirmed": 0.2,
+    }
+
+    assert estimator.attributes(coin_data, 1.2)["time_to_payout"] == 10.0
+    assert estimator.attributes(coin_data, 0.5)["time_to_payout"] == 0.0
+    assert "time_to_payout" not in estimator.attributes(coin_data)
+
+
+def test_estimator_restores_persisted_state():
+    """Test the moving averages survive a round trip through as_dict."""
+    estimator = EarningsEstimator()
+    estimator.record(dt_util.utcnow(), 150.0)
+
+    restored = EarningsEstimator()
+    restored.restore(estimator.as_dict())
+
+    assert restored.as_dict() == estimator.as_dict()
@@ -0,0 +1,54 @@
+"""Tests for the fields module."""
+import pytest
+
+from custom_components.miningpoolhub.fields import (
+    FieldSpec,
+    SchemaError,
+    compile_fields,
+)
+
+EXTRACT = compile_fields(
+    (
+        FieldSpec("hashrate", ("personal", "hashrate"), float),
+        FieldSpec("valid", ("personal", "shares", "valid"), int),
+        FieldSpec("difficulty", ("difficulty",), float, default=0.0),
+    )
+)
+
+
+def test_extracts_only_specified_fields():
+    """Test nested fields are converted and unused ones left out."""
+    assert (
+        EXTRACT(
+            {
+                "personal": {"hashrate": "12.5", "shares": {"valid": "3"}},
+                "estimates": {"block": 1},
+                "difficulty": 64,
+            }
+        )
+        == {"hashrate": 12.5, "valid": 3, "difficulty": 64.0}
+    )
+
+
+def test_optional_field_defaults():
+    """Test a missing, null or empty optional field gets its default."""
+    data = {"personal": {"hashrate": 1, "shares": {"valid": 1}}}
+    assert EXTRACT(data)["difficulty"] == 0.0
+    assert EXTRACT({**data, "difficulty": None})["difficulty"] == 0.0
+    assert EXTRACT({**data, "difficulty": ""})["difficulty"] == 0.0
+
+
+def test_schema_errors_name_the_field():
+    """Test missing and malformed fields raise with their path."""
+    with pytest.raises(SchemaError, match="personal.shares.valid is missing"):
+        EXTRACT({"personal": {"hashrate": 1, "shares": []}})
+    with pytest.raises(SchemaError, match="personal.hashrate is not a valid float"):
+        EXTRACT({"personal": {"hashrate": "fast", "shares": {"valid": 1}}})
+
+
+def test_empty_path_is_whole_response():
+    """Test an empty path converts a bare response."""
+    extract = compile_fields((FieldSpec("hashrate", (), float),))
+    assert extract("12.5") == {"hashrate": 12.5}
+    with pytest.raises(SchemaError, match="response is not a valid float"):
+        extract({"hashrate": 1})
@@ -0,0 +1,77 @@
+"""Tests for the history module."""
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.miningpoolhub.const import GROUP_BALANCES, GROUP_HASHRATE
+from custom_components.miningpoolhub.coordinator import intervals_from_config
+from custom_components.miningpoolhub.history import CoinHistory, RingBuffer
+
+
+def test_ring_buffer_overwrites_oldest():
+    """Test a full buffer drops its oldest samples first."""
+    buffer = RingBuffer(3)
+    for timestamp in range(5):
+        buffer.append(float(timestamp), timestamp * 10.0)
+
+    assert len(buffer) == 3
+    assert list(buffer.samples()) == [(2.0, 20.0), (3.0, 30.0), (4.0, 40.0)]
+    assert buffer.values(since=3.0) == [30.0, 40.0]
+
+
+def test_ring_buffer_increase_counts_resets():
+    """Test a counter that restarts from zero keeps adding up."""
+    buffer = RingBuffer(10)
+    assert buffer.increase() is None
+    for timestamp, shares in enumerate([100, 150, 20, 60]):
+        buffer.append(float(timestamp), shares)
+
+    assert buffer.increase() == 50 + 20 + 40
+    assert buffer.increase(since=2.0) == 40
+
+
+def test_coin_history_rolling_aggregates():
+    """Test the 1h and 24h aggregates only use samples inside their window."""
+    history = CoinHistory(intervals_from_config({}))
+    now = dt_util.utcnow()
+    samples = [
+        (now - timedelta(hours=3), 10.0, 1000, 5, 1.0),
+        (now - timedelta(minutes=40), 20.0, 1100, 5, 1.5),
+        (now - timedelta(minutes=10), 30.0, 1300, 6, 0.5),
+    ]
+    for when, hashrate, valid, invalid, balance in samples:
+        history.record(
+            when,
+            {
+                "current_hashrate": hashrate,
+                "valid_shares": valid,
+                "invalid_shares": invalid,
+                "balance_confirmed": balance,
+                "balance_unconfirmed": 0.0,
+            },
+            {GROUP_HASHRATE, GROUP_BALANCES},
+        )
+
+    assert history.attributes(now) == {
+        "average_hashrate_1h": 25.0,
+        "average_hashrate_24h": 20.0,
+        "min_hashrate_24h": 10.0,
+        "max_hashrate_24h": 30.0,
+        "valid_shares_1h": 200,
+        "invalid_shares_1h": 1,
+        "min_balance_24h": 0.5,
+        "max_balance_24h": 1.5,
+    }
+
+
+def test_coin_history_restore():
+    """Test persisted samples are restored into a new history."""
+    history = CoinHistory(intervals_from_config({}))
+    now = dt_util.utcnow()
+    history.record(now, {"current_hashrate": 10.0}, {GROUP_HASHRATE})
+
+    restored = CoinHistory(intervals_from_config({}))
+    restored.restore(history.as_dict())
+
+    assert restored.attributes(now) == history.attributes(now)
+    assert restored.attributes(now)["average_hashrate_1h"] == 10.0
@@ -1 +1,489 @@
 """Tests for the miningpoolhub custom component."""
+import asyncio
+from datetime import timedelta
+import logging
+from unittest.mock import AsyncMock
+
+from homeassistant.const import (
+    ATTR_UNIT_OF_MEASUREMENT,
+    CONF_API_KEY,
+    STATE_UNAVAILABLE,
+)
+from homeassistant.core import State
+from homeassistant.helpers import device_registry, entity_registry
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+    mock_restore_cache,
+    patch,
+)
+
+from custom_components.miningpoolhub.const import (
+    CONF_CURRENCY_NAMES,
+    CONF_FIAT_CURRENCY,
+    CONF_HASHRATE_FLOORS,
+    CONF_HASHRATE_INTERVAL,
+    DATA_COORDINATOR,
+    DOMAIN,
+    STORAGE_SAVE_DELAY,
+)
+
+from .test_sensors import DASHBOARD, POOL_STATUS
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_setup_entry_restores_snapshot(m_miningpoolhub, hass, hass_storage):
+    """Test sensors are populated from the snapshot before any request."""
+    m_instance = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    m_instance.async_get_user_all_balances = AsyncMock(return_value=[])
+    m_instance.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    m_instance.async_get_user_workers = AsyncMock(return_value=[])
+    m_miningpoolhub.return_value = m_instance
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum"],
+        },
+    )
+    now = dt_util.utcnow().isoformat()
+    hass_storage[f"{DOMAIN}.{config_entry.entry_id}"] = {
+        "version": 1,
+        "key": f"{DOMAIN}.{config_entry.entry_id}",
+        "data": {
+            "updated": now,
+            "dashboards": {"ethereum": {"current_hashrate": 99.0}},
+            "balances": {},
+            "workers": {"ethereum": {}},
+            "pool_statuses": {"ethereum": {}},
+            "group_updated": {
+                "pool_info": now,
+                "balances": now,
+                "credits": now,
+                "hashrate": now,
+                "workers": now,
+                "pool_status": now,
+            },
+        },
+    }
+    config_entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+    assert coordinator.data == {
+        "ethereum": {"active_workers": 0, "current_hashrate": 99.0}
+    }
+    assert hass.states.get("sensor.miningpoolhub_ethereum").state == "99.0"
+    m_instance.async_get_dashboard.assert_not_awaited()
+    m_instance.async_get_pool_status.assert_not_awaited()
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_snapshot_first_refresh_fetches_due_groups(
+    m_miningpoolhub, hass, hass_storage
+):
+    """Test the refresh after a restore fetches due groups before sensors register."""
+    m_instance = _mock_api(m_miningpoolhub)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum"],
+        },
+    )
+    now = dt_util.utcnow().isoformat()
+    hass_storage[f"{DOMAIN}.{config_entry.entry_id}"] = {
+        "version": 1,
+        "key": f"{DOMAIN}.{config_entry.entry_id}",
+        "data": {
+            "updated": now,
+            "dashboards": {"ethereum": {"current_hashrate": 99.0}},
+            "balances": {},
+            "workers": {"ethereum": {}},
+            "pool_statuses": {"ethereum": {}},
+            # The pool status has become due since the snapshot was taken.
+            "group_updated": {
+                "pool_info": {"ethereum": now},
+                "balances": {"ethereum": now},
+                "credits": {"ethereum": now},
+                "hashrate": {"ethereum": now},
+                "workers": {"ethereum": now},
+            },
+        },
+    }
+    config_entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+    m_instance.async_get_pool_status.assert_awaited_once_with("ethereum")
+    m_instance.async_get_dashboard.assert_not_awaited()
+    assert coordinator.only_consumed is True
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_options_update_applies_coin_changes(m_miningpoolhub, hass):
+    """Test coins are added and removed without reloading the entry."""
+    m_instance = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    m_instance.async_get_user_all_balances = AsyncMock(return_value=[])
+    m_instance.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    m_instance.async_get_user_workers = AsyncMock(return_value=[])
+    m_miningpoolhub.return_value = m_instance
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum", "monero"],
+        },
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+    m_instance.async_get_dashboard.reset_mock()
+
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={CONF_CURRENCY_NAMES: ["ethereum", "doge"], CONF_HASHRATE_INTERVAL: 5},
+    )
+    await hass.async_block_till_done()
+
+    assert hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR] is coordinator
+    assert coordinator.coin_names == ["ethereum", "doge"]
+    assert coordinator.intervals["hashrate"] == timedelta(minutes=5)
+    m_instance.async_get_dashboard.assert_awaited_once_with("doge")
+    assert hass.states.get("sensor.miningpoolhub_doge").state == "143.165577"
+    assert hass.states.get("sensor.miningpoolhub_ethereum").state == "143.165577"
+    assert hass.states.get("sensor.miningpoolhub_monero") is None
+    registry = entity_registry.async_get(hass)
+    entry_id = config_entry.entry_id
+    assert registry.async_get_entity_id("sensor", DOMAIN, f"{entry_id}_ethereum")
+    assert registry.async_get_entity_id("sensor", DOMAIN, f"{entry_id}_monero") is None
+    assert (
+        registry.async_get_entity_id("sensor", DOMAIN, f"{entry_id}_monero_balance")
+        is None
+    )
+    devices = device_registry.async_get(hass)
+    assert devices.async_get_device({(DOMAIN, f"{entry_id}_monero")}) is None
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_setup_entry_does_not_wait_for_slow_fetch(m_miningpoolhub, hass):
+    """Test setup returns within the budget and sensors show restored states."""
+    fetched = asyncio.Event()
+
+    async def slow_dashboard(coin_name):
+        await fetched.wait()
+        return DASHBOARD
+
+    m_instance = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(side_effect=slow_dashboard)
+    m_instance.async_get_user_all_balances = AsyncMock(return_value=[])
+    m_instance.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    m_instance.async_get_user_workers = AsyncMock(return_value=[])
+    m_miningpoolhub.return_value = m_instance
+    mock_restore_cache(
+        hass,
+        [
+            State("sensor.miningpoolhub_ethereum", "42.0"),
+            State(
+                "sensor.miningpoolhub_ethereum_balance",
+                "0.5",
+                {ATTR_UNIT_OF_MEASUREMENT: "ETH"},
+            ),
+        ],
+    )
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum"],
+        },
+    )
+    config_entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.miningpoolhub.STARTUP_BUDGET", timedelta(seconds=0.01)
+    ):
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+    assert coordinator.data is None
+    assert hass.states.get("sensor.miningpoolhub_ethereum").state == "42.0"
+    balance = hass.states.get("sensor.miningpoolhub_ethereum_balance")
+    assert balance.state == "0.5"
+    assert balance.attributes[ATTR_UNIT_OF_MEASUREMENT] == "ETH"
+    # Sensors without a restored state wait for the first fetch.
+    assert (
+        hass.states.get("sensor.miningpoolhub_ethereum_active_workers").state
+        == STATE_UNAVAILABLE
+    )
+
+    updated = asyncio.Event()
+    coordinator.async_add_listener(updated.set)
+    fetched.set()
+    await asyncio.wait_for(updated.wait(), 1)
+
+    assert coordinator.data is not None
+    assert hass.states.get("sensor.miningpoolhub_ethereum").state == str(
+        DASHBOARD["personal"]["hashrate"]
+    )
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_yaml_platform_shares_entry_coordinator(m_miningpoolhub, hass, caplog):
+    """Test an entry with the API key of a YAML platform adds no requests."""
+    answer = asyncio.Event()
+
+    async def get_dashboard(coin_name):
+        await answer.wait()
+        return DASHBOARD
+
+    m_instance = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(side_effect=get_dashboard)
+    m_instance.async_get_user_all_balances = AsyncMock(return_value=[])
+    m_instance.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    m_instance.async_get_user_workers = AsyncMock(return_value=[])
+    m_miningpoolhub.return_value = m_instance
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum"],
+        },
+    )
+    assert await async_setup_component(
+        hass,
+        "sensor",
+        {
+            "sensor": {
+                "platform": DOMAIN,
+                CONF_API_KEY: "api-key",
+                CONF_FIAT_CURRENCY: "USD",
+                CONF_CURRENCY_NAMES: ["ethereum", "monero"],
+            }
+        },
+    )
+    await hass.async_block_till_done()
+    # Set up without waiting for MiningPoolHub to answer.
+    assert hass.states.get("sensor.miningpoolhub_monero").state == STATE_UNAVAILABLE
+
+    updated = asyncio.Event()
+    async_track_state_change_event(
+        hass, ["sensor.miningpoolhub_monero"], lambda event: updated.set()
+    )
+    answer.set()
+    await asyncio.wait_for(updated.wait(), 1)
+    assert m_instance.async_get_dashboard.await_count == 2
+
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+    assert coordinator.coin_names == ["ethereum", "monero"]
+    assert m_instance.async_get_dashboard.await_count == 2
+    assert m_instance.async_get_pool_status.await_count == 2
+    assert m_miningpoolhub.call_count == 1
+    assert hass.states.get("sensor.miningpoolhub_monero").state == "143.165577"
+    # The entry's sensors are scoped to it and do not clash with the YAML ones.
+    registry = entity_registry.async_get(hass)
+    assert registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{config_entry.entry_id}_ethereum"
+    )
+    assert not registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{config_entry.entry_id}_monero"
+    )
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert coordinator.coin_names == ["ethereum", "monero"]
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_entry_joins_and_leaves_yaml_coordinator(
+    m_miningpoolhub, hass, hass_storage
+):
+    """Test an entry joining a YAML coordinator brings and takes its settings."""
+    m_instance = _mock_api(m_miningpoolhub)
+    assert await async_setup_component(
+        hass,
+        "sensor",
+        {
+            "sensor": {
+                "platform": DOMAIN,
+                CONF_API_KEY: "api-key",
+                CONF_FIAT_CURRENCY: "USD",
+                CONF_CURRENCY_NAMES: ["ethereum"],
+            }
+        },
+    )
+    await hass.async_block_till_done()
+    await asyncio.sleep(0)
+
+    answer = asyncio.Event()
+
+    async def get_dashboard(coin_name):
+        if coin_name == "monero":
+            await answer.wait()
+        return DASHBOARD
+
+    m_instance.async_get_dashboard.side_effect = get_dashboard
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum", "monero"],
+        },
+        options={CONF_HASHRATE_INTERVAL: 5, CONF_HASHRATE_FLOORS: {"monero": 1.0}},
+    )
+    config_entry.add_to_hass(hass)
+
+    # Set up without waiting for the added coin's dashboard.
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+    for _ in range(5):
+        await asyncio.sleep(0)
+    m_instance.async_get_dashboard.assert_any_await("monero")
+    assert "monero" not in coordinator.data
+    assert coordinator.intervals["hashrate"] == timedelta(minutes=5)
+    assert coordinator.hashrate_floors == {"monero": 1.0}
+
+    answer.set()
+    await hass.async_block_till_done()
+    assert "monero" in coordinator.data
+    storage_key = f"{DOMAIN}.{config_entry.entry_id}"
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=STORAGE_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+    assert "monero" in hass_storage[storage_key]["data"]["dashboards"]
+
+    assert await hass.config_entries.async_remove(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert coordinator.coin_names == ["ethereum"]
+    assert coordinator.intervals["hashrate"] == timedelta(minutes=10)
+    assert coordinator.hashrate_floors == {}
+
+    # The removed entry's snapshot is not written again.
+    await coordinator.async_refresh()
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=2 * STORAGE_SAVE_DELAY + 2)
+    )
+    await hass.async_block_till_done()
+    assert storage_key not in hass_storage
+
+
+def _mock_api(m_miningpoolhub):
+    m_instance = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    m_instance.async_get_user_all_balances = AsyncMock(return_value=[])
+    m_instance.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    m_instance.async_get_user_workers = AsyncMock(return_value=[])
+    m_miningpoolhub.return_value = m_instance
+    return m_instance
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_accounts_mining_same_coin(m_miningpoolhub, hass, caplog):
+    """Test two accounts mining one coin each get their own device and sensors."""
+    _mock_api(m_miningpoolhub)
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            data={
+                CONF_API_KEY: api_key,
+                CONF_FIAT_CURRENCY: "USD",
+                CONF_CURRENCY_NAMES: ["ethereum"],
+            },
+        )
+        for api_key in ("first-key", "second-key")
+    ]
+    for config_entry in entries:
+        config_entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    registry = entity_registry.async_get(hass)
+    devices = device_registry.async_get(hass)
+    first, second = [
+        entity_registry.async_entries_for_config_entry(registry, entry.entry_id)
+        for entry in entries
+    ]
+    assert len(first) == len(second) > 1
+    for config_entry in entries:
+        device = devices.async_get_device(
+            {(DOMAIN, f"{config_entry.entry_id}_ethereum")}
+        )
+        assert device.config_entries == {config_entry.entry_id}
+    assert "does not generate unique IDs" not in caplog.text
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_migrate_entry_scopes_ids(m_miningpoolhub, hass):
+    """Test version 1 unique IDs and devices are scoped with the entry id."""
+    _mock_api(m_miningpoolhub)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum"],
+        },
+    )
+    config_entry.add_to_hass(hass)
+    devices = device_registry.async_get(hass)
+    device = devices.async_get_or_create(
+        config_entry_id=config_entry.entry_id, identifiers={(DOMAIN, "ethereum")}
+    )
+    registry = entity_registry.async_get(hass)
+    for unique_id in (
+        "ethereum",
+        "ethereum_balance",
+        f"{config_entry.entry_id}_update_duration",
+    ):
+        registry.async_get_or_create(
+            "sensor",
+            DOMAIN,
+            unique_id,
+            config_entry=config_entry,
+            device_id=device.id,
+            suggested_object_id=f"miningpoolhub_{unique_id.split('_', 1)[-1]}",
+        )
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.version == 2
+    entry_id = config_entry.entry_id
+    assert (
+        registry.async_get_entity_id("sensor", DOMAIN, f"{entry_id}_ethereum")
+        == "sensor.miningpoolhub_ethereum"
+    )
+    assert registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry_id}_ethereum_balance"
+    )
+    assert registry.async_get_entity_id("sensor", DOMAIN, f"{entry_id}_update_duration")
+    assert registry.async_get_entity_id("sensor", DOMAIN, "ethereum") is None
+    assert devices.async_get_device({(DOMAIN, f"{entry_id}_ethereum")}).id == (
+        device.id
+    )
+    assert hass.states.get("sensor.miningpoolhub_ethereum").state == "143.165577"
@@ -0,0 +1,34 @@
+"""Tests for the metrics module."""
+from miningpoolhub_py.exceptions import APIError
+
+from custom_components.miningpoolhub.metrics import Histogram, RequestMetrics
+
+
+def test_histogram_buckets():
+    """Test durations land in the first bucket whose bound they do not exceed."""
+    histogram = Histogram((0.1, 1.0))
+    assert histogram.average is None
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        histogram.record(seconds)
+
+    assert histogram.as_dict() == {
+        "count": 4,
+        "average": 0.9125,
+        "max": 3.0,
+        "buckets": {"le_0.1": 2, "le_1": 1, "inf": 1},
+    }
+
+
+def test_request_metrics():
+    """Test responses, errors and cache hits are counted per endpoint."""
+    metrics = RequestMetrics()
+    assert metrics.cache_hit_rate is None
+    metrics.record_response("getdashboarddata", 0.2)
+    metrics.record_error("getdashboarddata", 0.4, APIError())
+    metrics.cache_hits = 1
+    metrics.cache_misses = 2
+
+    assert metrics.requests == 2
+    assert abs(metrics.average_latency - 0.3) < 1e-9
+    assert metrics.as_dict()["errors"] == {"APIError": 1}
+    assert metrics.cache_hit_rate == 33.3
@@ -0,0 +1,85 @@
+"""Tests for the pricing module."""
+import asyncio
+from datetime import timedelta
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.miningpoolhub.const import COINGECKO_API_ENDPOINT
+from custom_components.miningpoolhub.pricing import PriceCache, coingecko_id
+
+
+def test_coingecko_id():
+    """Test algorithm specific pools map to the coin's CoinGecko id."""
+    assert coingecko_id("ethereum") == "ethereum"
+    assert coingecko_id("digibyte-skein") == "digibyte"
+
+
+async def test_prices_fetched_in_one_batch(hass, mock_coingecko):
+    """Test all coins are priced with a single cached request."""
+    mock_coingecko.clear_requests()
+    mock_coingecko.get(
+        COINGECKO_API_ENDPOINT,
+        json={"ethereum": {"usd": 2000}, "digibyte": {"usd": 0.05}},
+    )
+    price_cache = PriceCache(async_get_clientsession(hass))
+
+    prices = await price_cache.async_get_prices(
+        ["ethereum", "digibyte-skein", "digibyte-groestl", "unknown"], "USD"
+    )
+    assert prices == {
+        "ethereum": 2000.0,
+        "digibyte-skein": 0.05,
+        "digibyte-groestl": 0.05,
+    }
+    assert mock_coingecko.call_count == 1
+    url = mock_coingecko.mock_calls[0][1]
+    assert url.query["ids"] == "digibyte,ethereum,unknown"
+    assert url.query["vs_currencies"] == "usd"
+
+    # Cached prices are reused, only the missing coin is requested again.
+    await price_cache.async_get_prices(["ethereum", "unknown"], "USD")
+    assert mock_coingecko.call_count == 2
+    assert mock_coingecko.mock_calls[1][1].query["ids"] == "unknown"
+
+
+async def test_failed_request_keeps_last_prices(hass, mock_coingecko):
+    """Test the last known prices are served when CoinGecko fails."""
+    mock_coingecko.clear_requests()
+    mock_coingecko.get(COINGECKO_API_ENDPOINT, json={"ethereum": {"usd": 2000}})
+    price_cache = PriceCache(async_get_clientsession(hass), timedelta(0))
+    await price_cache.async_get_prices(["ethereum"], "USD")
+
+    mock_coingecko.clear_requests()
+    mock_coingecko.get(COINGECKO_API_ENDPOINT, status=500)
+
+    assert await price_cache.async_get_prices(["ethereum"], "USD") == {
+        "ethereum": 2000.0
+    }
+
+
+async def test_malformed_prices_are_skipped(hass, mock_coingecko):
+    """Test coins without a numeric price are left out and slow requests time out."""
+    mock_coingecko.clear_requests()
+    mock_coingecko.get(
+        COINGECKO_API_ENDPOINT,
+        json={
+            "ethereum": {"usd": 2000},
+            "monero": {"usd": None},
+            "zcash": None,
+            "ravencoin": {"usd": "n/a"},
+            "litecoin": {"eur": 100},
+        },
+    )
+    price_cache = PriceCache(async_get_clientsession(hass))
+
+    prices = await price_cache.async_get_prices(
+        ["ethereum", "monero", "zcash", "ravencoin", "litecoin"], "USD"
+    )
+    assert prices == {"ethereum": 2000.0}
+
+    mock_coingecko.clear_requests()
+    mock_coingecko.get(COINGECKO_API_ENDPOINT, exc=asyncio.TimeoutError)
+    assert await price_cache.async_get_prices(["monero"], "USD") == {}
+    assert price_cache.cached_prices(["ethereum", "monero"], "USD") == {
+        "ethereum": 2000.0
+    }
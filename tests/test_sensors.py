@@ -1,62 +1,123 @@
 """Tests for the sensor module."""
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from unittest.mock import AsyncMock, MagicMock
-
+from homeassistant.const import CONF_API_KEY
+from homeassistant.helpers import entity_registry
+from homeassistant.util import dt as dt_util
 from miningpoolhub_py.exceptions import APIError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.miningpoolhub.client import (
+    RequestCache,
+    async_get_client_manager,
+)
+from custom_components.miningpoolhub.const import (
+    CONF_CURRENCY_NAMES,
+    CONF_FIAT_CURRENCY,
+    CONF_STATE_ATTRIBUTES,
+    DATA_COORDINATOR,
+    DOMAIN,
+    GROUP_HASHRATE,
+)
+from custom_components.miningpoolhub.coordinator import (
+    MiningPoolHubDataUpdateCoordinator,
+)
+from custom_components.miningpoolhub.sensor import (
+    DIAGNOSTIC_SENSORS,
+    METRIC_SENSORS,
+    MiningPoolHubDiagnosticSensor,
+    MiningPoolHubMetricSensor,
+    MiningPoolHubSensor,
+)
 
-from custom_components.miningpoolhub.sensor import MiningPoolHubSensor
+DASHBOARD = {
+    "personal": {
+        "hashrate": 143.165577,
+        "sharerate": 0,
+        "sharedifficulty": 0,
+        "shares": {
+            "valid": 13056,
+            "invalid": 0,
+            "invalid_percent": 0,
+            "unpaid": 0,
+        },
+        "estimates": {
+            "block": 1.733e-5,
+            "fee": 0,
+            "donation": 0,
+            "payout": 1.733e-5,
+        },
+    },
+    "balance": {"confirmed": 0.05458251, "unconfirmed": 6.64e-5},
+    "balance_for_auto_exchange": {"confirmed": 5.287e-5, "unconfirmed": 0},
+    "balance_on_exchange": 0,
+    "recent_credits_24hours": {"amount": 0.0032644192},
+    "pool": {
+        "info": {
+            "name": "Ethereum (ETH) Mining Pool Hub",
+            "currency": "ETH",
+        }
+    },
+}
+POOL_STATUS = {
+    "pool_name": "Ethereum (ETH) Mining Pool Hub",
+    "hashrate": 1.2e12,
+    "efficiency": 99.12,
+    "progress": 42.5,
+    "workers": 3812,
+    "currentnetworkblock": 13500001,
+    "nextnetworkblock": 13500002,
+    "lastblock": 13499870,
+    "networkdiff": 9.8e15,
+    "esttime": 8166.7,
+    "estshares": 9.8e15,
+    "timesincelast": 1830,
+    "nethashrate": 7.6e14,
+}
 
 
 async def test_async_update_success(hass, aioclient_mock):
-    """Tests a fully successful async_update."""
+    """Tests a fully successful coordinator update."""
     miningpoolhub = MagicMock()
-    miningpoolhub.async_get_dashboard = AsyncMock(
-        side_effect=[
-            {
-                "personal": {
-                    "hashrate": 143.165577,
-                    "sharerate": 0,
-                    "sharedifficulty": 0,
-                    "shares": {
-                        "valid": 13056,
-                        "invalid": 0,
-                        "invalid_percent": 0,
-                        "unpaid": 0,
-                    },
-                    "estimates": {
-                        "block": 1.733e-5,
-                        "fee": 0,
-                        "donation": 0,
-                        "payout": 1.733e-5,
-                    },
-                },
-                "balance": {"confirmed": 0.05458251, "unconfirmed": 6.64e-5},
-                "balance_for_auto_exchange": {"confirmed": 5.287e-5, "unconfirmed": 0},
-                "balance_on_exchange": 0,
-                "recent_credits_24hours": {"amount": 0.0032644192},
-                "pool": {
-                    "info": {
-                        "name": "Ethereum (ETH) Mining Pool Hub",
-                        "currency": "ETH",
-                    }
-                },
-            }
-        ]
-    )
-    sensor = MiningPoolHubSensor(miningpoolhub, "ethereum", "USD")
-    await sensor.async_update()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(hass, miningpoolhub, ["ethereum"])
+    await coordinator.async_refresh()
+    sensor = MiningPoolHubSensor(coordinator, "ethereum", "USD")
 
     expected = {
+        "active_workers": 0,
+        "average_hashrate_1h": 143.165577,
+        "average_hashrate_24h": 143.165577,
+        "max_balance_24h": 0.05458251 + 6.64e-05,
+        "max_hashrate_24h": 143.165577,
+        "min_balance_24h": 0.05458251 + 6.64e-05,
+        "min_hashrate_24h": 143.165577,
         "balance_auto_exchange_confirmed": 5.287e-05,
         "balance_auto_exchange_unconfirmed": 0.0,
         "balance_confirmed": 0.05458251,
         "balance_on_exchange": 0.0,
         "balance_unconfirmed": 6.64e-05,
+        "coins_per_minute": 0.0032644192 / 1440,
         "currency": "ETH",
         "current_hashrate": 143.165577,
+        "estimated_block": 1.733e-5,
+        "estimated_donation": 0.0,
+        "estimated_fee": 0.0,
+        "estimated_payout": 1.733e-5,
+        "estimated_time_to_block": 8166.7,
         "invalid_shares": 0,
+        "last_block": 13499870,
         "name": "Ethereum (ETH) Mining Pool Hub",
+        "network_difficulty": 9.8e15,
+        "pool_hashrate": 1.2e12,
+        "projected_daily_earnings": 0.0032644192,
+        "projected_weekly_earnings": 0.0032644192 * 7,
         "recent_credits_24_hours": 0.0032644192,
+        "time_since_last_block": 1830,
         "valid_shares": 13056,
     }
 
@@ -65,13 +126,197 @@ async def test_async_update_success(hass, aioclient_mock):
     assert sensor.available is True
 
 
-async def test_async_update_failed():
-    """Tests a failed async_update."""
+async def test_async_update_failed(hass):
+    """Tests a failed coordinator update."""
     miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
     miningpoolhub.async_get_dashboard = AsyncMock(side_effect=APIError)
-    sensor = MiningPoolHubSensor(miningpoolhub, "ethereum", "USD")
-
-    await sensor.async_update()
+    coordinator = MiningPoolHubDataUpdateCoordinator(hass, miningpoolhub, ["ethereum"])
+    await coordinator.async_refresh()
+    sensor = MiningPoolHubSensor(coordinator, "ethereum", "USD")
 
     assert sensor.available is False
     assert {} == sensor.attrs
+
+
+async def test_unchanged_data_skips_state_write(hass):
+    """Tests an identical coordinator update does not write a new state."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum"], {GROUP_HASHRATE: timedelta(0)}
+    )
+    # The second sample completes the rolling share counts.
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    sensor = MiningPoolHubSensor(coordinator, "ethereum", "USD")
+    skipped_writes = MiningPoolHubDiagnosticSensor(
+        coordinator,
+        "entry",
+        next(
+            description
+            for description in DIAGNOSTIC_SENSORS
+            if description.key == "skipped_state_writes"
+        ),
+    )
+    sensor.async_write_ha_state = MagicMock()
+    skipped_writes.async_write_ha_state = MagicMock()
+    coordinator.async_add_listener(sensor._handle_coordinator_update)
+    coordinator.async_add_listener(skipped_writes._handle_coordinator_update)
+
+    await coordinator.async_refresh()
+    assert sensor.async_write_ha_state.call_count == 0
+    assert coordinator.skipped_state_writes == 1
+    assert skipped_writes.native_value == 1
+    assert skipped_writes.entity_registry_enabled_default is False
+
+    miningpoolhub.async_get_dashboard.return_value = {
+        **DASHBOARD,
+        "personal": {**DASHBOARD["personal"], "hashrate": 150.0},
+    }
+    await coordinator.async_refresh()
+    assert sensor.async_write_ha_state.call_count == 1
+    assert sensor.native_value == 150.0
+    assert coordinator.skipped_state_writes == 1
+    assert skipped_writes.async_write_ha_state.call_count == 1
+
+
+def _worker(username, hashrate):
+    return {
+        "id": 1,
+        "username": username,
+        "password": "x",
+        "monitor": 0,
+        "hashrate": hashrate,
+        "difficulty": 1024,
+    }
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_worker_sensors_follow_workers(m_miningpoolhub, hass):
+    """Tests worker sensors are added and removed without reloading the entry."""
+    m_instance = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    m_instance.async_get_user_all_balances = AsyncMock(return_value=[])
+    m_instance.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    m_instance.async_get_user_workers = AsyncMock(
+        return_value=[_worker("user.rig1", 10.0), _worker("user.rig2", 0)]
+    )
+    m_miningpoolhub.return_value = m_instance
+    async_get_client_manager(hass).request_cache = RequestCache(timedelta(0))
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum"],
+        },
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    rig1 = hass.states.get("sensor.miningpoolhub_ethereum_user_rig1")
+    assert rig1.state == "10.0"
+    assert rig1.attributes["online"] is True
+    rig2 = hass.states.get("sensor.miningpoolhub_ethereum_user_rig2")
+    assert rig2.attributes["online"] is False
+    assert rig2.attributes["last_share"] is None
+    assert (
+        hass.states.get("sensor.miningpoolhub_ethereum").attributes["active_workers"]
+        == 1
+    )
+
+    m_instance.async_get_user_workers.return_value = [
+        _worker("user.rig1", 12.0),
+        _worker("user.rig3", 5.0),
+    ]
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+    with patch(
+        "homeassistant.util.dt.utcnow",
+        return_value=dt_util.utcnow() + timedelta(minutes=10),
+    ):
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.miningpoolhub_ethereum_user_rig1").state == "12.0"
+    assert hass.states.get("sensor.miningpoolhub_ethereum_user_rig2") is None
+    assert hass.states.get("sensor.miningpoolhub_ethereum_user_rig3").state == "5.0"
+    registry = entity_registry.async_get(hass)
+    assert registry.async_get_entity_id("sensor", DOMAIN, "ethereum_user.rig2") is None
+    assert m_instance.async_get_user_workers.await_count == 2
+
+
+@patch("custom_components.miningpoolhub.client.MiningPoolHubAPI")
+async def test_statistics_without_detailed_attributes(m_miningpoolhub, hass):
+    """Tests sensors declare state classes and can leave out the attributes."""
+    m_instance = AsyncMock()
+    m_instance.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    m_instance.async_get_user_all_balances = AsyncMock(return_value=[])
+    m_instance.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    m_instance.async_get_user_workers = AsyncMock(return_value=[])
+    m_miningpoolhub.return_value = m_instance
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_KEY: "api-key",
+            CONF_FIAT_CURRENCY: "USD",
+            CONF_CURRENCY_NAMES: ["ethereum"],
+        },
+        options={CONF_STATE_ATTRIBUTES: False},
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    hashrate = hass.states.get("sensor.miningpoolhub_ethereum")
+    assert hashrate.state == "143.165577"
+    assert hashrate.attributes["state_class"] == "measurement"
+    assert "balance_confirmed" not in hashrate.attributes
+    balance = hass.states.get("sensor.miningpoolhub_ethereum_balance")
+    assert float(balance.state) == 0.05458251 + 6.64e-5
+    assert balance.attributes["state_class"] == "total"
+    assert balance.attributes["unit_of_measurement"] == "ETH"
+
+
+async def test_metric_sensor_writes_only_own_changes(hass):
+    """Tests a metric sensor ignores updates that change other metrics."""
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum"], {GROUP_HASHRATE: timedelta(0)}
+    )
+    await coordinator.async_refresh()
+    description = next(d for d in METRIC_SENSORS if d.key == "valid_shares")
+    sensor = MiningPoolHubMetricSensor(coordinator, "ethereum", "USD", description)
+    sensor.async_write_ha_state = MagicMock()
+    coordinator.async_add_listener(sensor._handle_coordinator_update)
+    assert sensor.unique_id == "ethereum_valid_shares"
+    assert sensor.native_value == 13056
+    assert sensor.device_info["identifiers"] == {(DOMAIN, "ethereum")}
+
+    miningpoolhub.async_get_dashboard.return_value = {
+        **DASHBOARD,
+        "personal": {**DASHBOARD["personal"], "hashrate": 150.0},
+    }
+    await coordinator.async_refresh()
+    assert sensor.async_write_ha_state.call_count == 0
+
+    miningpoolhub.async_get_dashboard.return_value = {
+        **DASHBOARD,
+        "personal": {
+            **DASHBOARD["personal"],
+            "shares": {**DASHBOARD["personal"]["shares"], "valid": 14000},
+        },
+    }
+    await coordinator.async_refresh()
+    assert sensor.async_write_ha_state.call_count == 1
+    assert sensor.native_value == 14000
@@ -0,0 +1,102 @@
+"""Tests for the transport module."""
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+from miningpoolhub_py.exceptions import APIError
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.miningpoolhub.const import EVENT_HASHRATE_LOW
+from custom_components.miningpoolhub.coordinator import (
+    MiningPoolHubDataUpdateCoordinator,
+)
+from custom_components.miningpoolhub.transport import (
+    HashrateTransport,
+    PollingTransport,
+)
+
+from .test_sensors import DASHBOARD, POOL_STATUS
+
+
+async def _coordinator(hass, **kwargs):
+    miningpoolhub = MagicMock()
+    miningpoolhub.async_get_user_all_balances = AsyncMock(return_value=[])
+    miningpoolhub.async_get_pool_status = AsyncMock(return_value=POOL_STATUS)
+    miningpoolhub.async_get_user_workers = AsyncMock(return_value=[])
+    miningpoolhub.async_get_dashboard = AsyncMock(return_value=DASHBOARD)
+    miningpoolhub.async_get_user_hashrate = AsyncMock(return_value=0.0)
+    coordinator = MiningPoolHubDataUpdateCoordinator(
+        hass, miningpoolhub, ["ethereum", "monero"], **kwargs
+    )
+    await coordinator.async_refresh()
+    return coordinator
+
+
+async def test_fast_lane_delivers_hashrate(hass):
+    """Test a polled hashrate reaches listeners and events right away."""
+    coordinator = await _coordinator(hass, hashrate_floors={"ethereum": 100.0})
+    events = async_capture_events(hass, EVENT_HASHRATE_LOW)
+    listener = MagicMock()
+    coordinator.async_add_listener(listener)
+    transport = PollingTransport(
+        hass,
+        coordinator,
+        ["ethereum"],
+        coordinator.miningpoolhub_api,
+        timedelta(seconds=20),
+    )
+
+    transport.async_start()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=21))
+    await hass.async_block_till_done()
+    transport.async_stop()
+
+    coordinator.miningpoolhub_api.async_get_user_hashrate.assert_awaited_once_with(
+        "ethereum"
+    )
+    assert coordinator.data["ethereum"]["current_hashrate"] == 0.0
+    assert (
+        coordinator.data["monero"]["current_hashrate"]
+        == DASHBOARD["personal"]["hashrate"]
+    )
+    assert listener.call_count == 1
+    assert len(events) == 1
+    # The reading does not count as a hashrate refresh.
+    assert coordinator.miningpoolhub_api.async_get_dashboard.await_count == 2
+
+
+async def test_fast_lane_skips_failures_and_backoff(hass):
+    """Test failed polls are dropped and no polls are sent while backing off."""
+    coordinator = await _coordinator(hass)
+    client = coordinator.miningpoolhub_api
+    client.async_get_user_hashrate.side_effect = APIError
+    transport = PollingTransport(
+        hass, coordinator, ["ethereum"], client, timedelta(seconds=20)
+    )
+
+    await transport._async_poll()
+    assert (
+        coordinator.data["ethereum"]["current_hashrate"]
+        == DASHBOARD["personal"]["hashrate"]
+    )
+
+    coordinator.circuit_breaker.record_failure()
+    await transport._async_poll()
+    assert client.async_get_user_hashrate.await_count == 1
+
+
+async def test_transport_requires_start_and_stop(hass):
+    """Test a transport has to implement starting and stopping."""
+    coordinator = await _coordinator(hass)
+    with pytest.raises(TypeError):
+        HashrateTransport(hass, coordinator, ["ethereum"])
+
+    listener = MagicMock()
+    coordinator.async_add_listener(listener)()
+    coordinator.async_set_hashrate("ethereum", 1.0)
+    listener.assert_not_called()